@@ -0,0 +1,902 @@
+# benchmarks.py
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time as timer
+from datetime import time, datetime, timedelta
+from typing import Callable, Dict, List, Tuple, Sequence, Optional, Any, Iterator
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod, SizeCategory, Preference, ProposalOrder, MatchingStats,
+    ProblemSet, MatchingState, NO_MATCH, is_schedule_conflict, get_teacher_preference_score, match_problem,
+    initial_proposal_order, run_proposals,
+)
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Student counts / capacities drawn for each SizeCategory
+SIZE_RANGES = {SizeCategory.SMALL: (3, 10), SizeCategory.MEDIUM: (11, 20), SizeCategory.LARGE: (21, 150)}
+# Start times (hour, minute) of the 90-minute slot grid in each TimePeriod
+SLOT_STARTS = {
+    TimePeriod.MORNING: [(8, 0), (9, 45), (11, 0)],
+    TimePeriod.MIDDAY: [(12, 30), (14, 0)],
+    TimePeriod.AFTERNOON: [(15, 30), (17, 15), (19, 0)],
+}
+SCALING_SIZES = (10, 30, 100, 300, 1000, 3000, 10000, 30000, 100000)
+
+
+def _best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Best wall-clock time of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = timer.perf_counter()
+        func()
+        best = min(best, timer.perf_counter() - start)
+    return best
+
+
+def _random_slot(rng: random.Random) -> TimeSlot:
+    start = rng.randrange(8 * 60, 19 * 60, 5)  # Minutes since midnight; latest end is 21:00
+    end = start + rng.choice([45, 60, 90, 120])
+    return TimeSlot(time(start // 60, start % 60), time(end // 60, end % 60))
+
+
+def _linear_schedule_conflict(teacher: Teacher, auditorium: Auditorium) -> bool:
+    """The pre-index implementation of is_schedule_conflict, for comparison."""
+    for assigned_aud in teacher.schedule:
+        if assigned_aud.day == auditorium.day and assigned_aud.time_slot.overlaps(auditorium.time_slot):
+            return True
+    return False
+
+
+def bench_schedule_conflict(bookings_per_teacher=(10, 100, 1000), probes: int = 2000, repeat: int = 3,
+                            seed: int = 0) -> List[Dict[str, float]]:
+    """
+    Times is_schedule_conflict against a linear scan for teachers with many existing bookings.
+
+    Bookings are spread over a term (about three per day) so most probes don't conflict and the
+    linear scan can't stop early, which is the case that hurts in the matcher.
+    """
+    rng = random.Random(seed)
+    results = []
+    for num_bookings in bookings_per_teacher:
+        days = [f"Week {i // len(DAYS) + 1} {DAYS[i % len(DAYS)]}" for i in range(max(1, num_bookings // 3))]
+        schedule = [Auditorium(f"Booked {i}", 30, rng.choice(days), _random_slot(rng)) for i in range(num_bookings)]
+        teacher = Teacher("Busy", "Teacher", Group("Group", 10), TimePeriod.MORNING, schedule)
+        candidates = [Auditorium(f"Probe {i}", 30, rng.choice(days), _random_slot(rng)) for i in range(probes)]
+        is_schedule_conflict(teacher, candidates[0])  # Build the index outside the timed loop
+
+        linear = _best_of(repeat, lambda: [_linear_schedule_conflict(teacher, aud) for aud in candidates])
+        indexed = _best_of(repeat, lambda: [is_schedule_conflict(teacher, aud) for aud in candidates])
+        results.append({
+            "bookings": num_bookings,
+            "probes": probes,
+            "linear_s": linear,
+            "indexed_s": indexed,
+            "speedup": linear / indexed if indexed else float("inf"),
+        })
+    return results
+
+
+def dense_problem(num_teachers: int, num_auditoriums: int, seed: int = 0) -> Tuple[Dict[str, Teacher], List[Auditorium]]:
+    """A contested instance: more teachers than rooms, few distinct slots, so rooms see many proposals."""
+    rng = random.Random(seed)
+    slots = [_random_slot(rng) for _ in range(6)]
+    auditoriums = [Auditorium(f"Room {i}", rng.choice([8, 10, 12, 15, 20, 25, 30, 40, 60]), rng.choice(DAYS[:2]),
+                              rng.choice(slots)) for i in range(num_auditoriums)]
+    teachers = {}
+    for i in range(num_teachers):
+        teacher = Teacher("Teacher", str(i), Group(f"Group {i}", rng.randint(5, 45)), rng.choice(list(TimePeriod)))
+        teachers[teacher.full_name] = teacher
+    return teachers, auditoriums
+
+
+def synthetic_problem(
+        num_teachers: int,
+        num_auditoriums: int,
+        num_days: int = 5,
+        size_mix: Sequence[float] = (0.4, 0.4, 0.2),
+        period_mix: Sequence[float] = (0.45, 0.3, 0.25),
+        bookings_per_teacher: float = 0.0,
+        seed: int = 0
+) -> Tuple[Dict[str, Teacher], List[Auditorium]]:
+    """
+    A campus-like instance: rooms on a 90-minute slot grid over `num_days` days, groups and room
+    capacities drawn per SizeCategory with weights `size_mix`, time preferences and room slots
+    drawn per TimePeriod with weights `period_mix`. Each teacher gets on average
+    `bookings_per_teacher` existing bookings on the same grid. Time slots are shared objects.
+    """
+    rng = random.Random(seed)
+    categories, periods, days = list(SizeCategory), list(TimePeriod), DAYS[:num_days]
+    slots = {period: [TimeSlot(time(h, m), time(h + (m + 90) // 60, (m + 90) % 60)) for h, m in starts]
+             for period, starts in SLOT_STARTS.items()}
+    all_slots = [slot for period_slots in slots.values() for slot in period_slots]
+
+    auditoriums = []
+    for i in range(num_auditoriums):
+        low, high = SIZE_RANGES[rng.choices(categories, size_mix)[0]]
+        period = rng.choices(periods, period_mix)[0]
+        auditoriums.append(Auditorium(f"Room {i}", rng.randint(low, high), rng.choice(days), rng.choice(slots[period])))
+
+    teachers = {}
+    for i in range(num_teachers):
+        low, high = SIZE_RANGES[rng.choices(categories, size_mix)[0]]
+        num_bookings = int(bookings_per_teacher) + (rng.random() < bookings_per_teacher % 1)
+        schedule = [Auditorium(f"Booked {i}-{j}", high, rng.choice(days), rng.choice(all_slots))
+                    for j in range(num_bookings)]
+        teacher = Teacher("Teacher", str(i), Group(f"Group {i}", rng.randint(low, high)),
+                          rng.choices(periods, period_mix)[0], schedule)
+        teachers[teacher.full_name] = teacher
+    return teachers, auditoriums
+
+
+def bench_problem(teachers: Dict[str, Teacher], auditoriums: List[Auditorium], samples: int = 20000,
+                  seed: int = 0) -> Dict[str, float]:
+    """Times each stage of a matching run on one instance, plus per-call scoring and conflict checks."""
+    rng = random.Random(seed)
+    teacher_list = list(teachers.values())
+    pairs = [(rng.choice(teacher_list), rng.choice(auditoriums)) for _ in range(samples)] if auditoriums else []
+
+    start = timer.perf_counter()
+    problem = ProblemSet.from_objects(teachers, auditoriums)
+    build_s = timer.perf_counter() - start
+
+    start = timer.perf_counter()
+    ranked = [problem.rank_auditoriums(t) for t in range(problem.num_teachers)]
+    rank_s = timer.perf_counter() - start
+
+    stats = MatchingStats()
+    state = MatchingState(problem.num_teachers, problem.num_auditoriums, initial_proposal_order(problem, ranked))
+    start = timer.perf_counter()
+    run_proposals(problem, ranked, state, stats)
+    match_s = timer.perf_counter() - start
+
+    # The default path: CandidateIndex lists that are only ranked as far as each teacher proposes
+    lazy_s = _best_of(1, lambda: match_problem(problem))
+
+    score_s = _best_of(1, lambda: [get_teacher_preference_score(t, a) for t, a in pairs])
+    conflict_s = _best_of(1, lambda: [is_schedule_conflict(t, a) for t, a in pairs])
+    return {
+        "build_s": build_s,
+        "rank_s": rank_s,
+        "match_s": match_s,
+        "total_s": build_s + rank_s + match_s,
+        "lazy_match_s": lazy_s,
+        "score_us_per_call": score_s / len(pairs) * 1e6 if pairs else 0.0,
+        "conflict_us_per_call": conflict_s / len(pairs) * 1e6 if pairs else 0.0,
+        "ranked_entries": sum(len(r) for r in ranked),
+        "matched": problem.num_teachers - state.teacher_match.count(-1),
+        **stats.as_dict(),
+    }
+
+
+def bench_scaling(sizes: Sequence[int] = SCALING_SIZES, auditoriums_per_teacher: float = 1.0,
+                  max_seconds: float = 60.0, **problem_options: Any) -> List[Dict[str, Any]]:
+    """
+    Scaling curve over `sizes` teachers (and auditoriums_per_teacher rooms each). Ranking is
+    O(T*A), so the curve stops after the first point whose run takes longer than max_seconds.
+    """
+    results = []
+    for size in sizes:
+        num_auditoriums = max(1, int(size * auditoriums_per_teacher))
+        teachers, auditoriums = synthetic_problem(size, num_auditoriums, **problem_options)
+        row = {"teachers": size, "auditoriums": num_auditoriums, **problem_options, **bench_problem(teachers, auditoriums)}
+        results.append(row)
+        if row["total_s"] > max_seconds:
+            break
+    return results
+
+
+def _environment() -> Dict[str, str]:
+    """Metadata stored with every result so runs from different commits can be compared."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {"commit": commit, "python": platform.python_version(), "timestamp": datetime.now().isoformat()}
+
+
+def write_results(path: str, benchmark: str, rows: List[Dict[str, Any]]) -> None:
+    """Appends one JSON line per result row, tagged with the benchmark name and environment."""
+    environment = _environment()
+    with open(path, "a", encoding="utf-8") as output:
+        for row in rows:
+            output.write(json.dumps({"benchmark": benchmark, **environment, **row}) + "\n")
+
+
+def compare_results(baseline_path: str, candidate_path: str, metric: str = "total_s") -> List[Dict[str, Any]]:
+    """Pairs rows of two result files by benchmark and size, and reports candidate/baseline for `metric`."""
+    def load(path):
+        rows = {}
+        with open(path, encoding="utf-8") as results:
+            for line in results:
+                row = json.loads(line)
+                if metric in row:
+                    rows[(row["benchmark"], row.get("teachers"), row.get("auditoriums"))] = row  # Last run wins
+        return rows
+
+    baseline, candidate = load(baseline_path), load(candidate_path)
+    comparison = []
+    for key in sorted(baseline.keys() & candidate.keys(), key=lambda k: (k[0], k[1] or 0, k[2] or 0)):
+        before, after = baseline[key][metric], candidate[key][metric]
+        comparison.append({
+            "benchmark": key[0], "teachers": key[1], "auditoriums": key[2],
+            "baseline": before, "candidate": after, "ratio": after / before if before else float("inf"),
+            "baseline_commit": baseline[key]["commit"], "candidate_commit": candidate[key]["commit"],
+        })
+    return comparison
+
+
+def bench_proposal_orders(num_teachers: int = 2000, num_auditoriums: int = 1500, seeds=(0, 1, 2),
+                          repeat: int = 3) -> List[Dict[str, float]]:
+    """Proposal/rejection/displacement counts and matching time for each ProposalOrder on dense instances."""
+    results = []
+    for seed in seeds:
+        teachers, auditoriums = dense_problem(num_teachers, num_auditoriums, seed)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        ranked = [problem.rank_auditoriums(t) for t in range(problem.num_teachers)]
+        for order in ProposalOrder:
+            stats = MatchingStats()
+            teacher_match = match_problem(problem, ranked, order=order, seed=seed, stats=stats)
+            elapsed = _best_of(repeat, lambda: match_problem(problem, ranked, order=order, seed=seed))
+            results.append({
+                "seed": seed,
+                "order": order.value,
+                "matched": sum(a >= 0 for a in teacher_match),
+                **stats.as_dict(),
+                "match_s": elapsed,
+            })
+    return results
+
+
+def bench_incremental(num_teachers: int = 2000, num_auditoriums: int = 1500, edits: int = 5,
+                      seed: int = 0) -> List[Dict[str, float]]:
+    """From-scratch matching vs IncrementalMatcher updates (exact replay and warm start) for single-room removals."""
+    from incremental_matching import IncrementalMatcher
+
+    teachers, auditoriums = dense_problem(num_teachers, num_auditoriums, seed)
+    from_scratch = _best_of(1, lambda: match_problem(ProblemSet.from_objects(teachers, auditoriums)))
+    rng = random.Random(seed)
+    results = []
+    for exact in (True, False):
+        matcher = IncrementalMatcher(teachers, auditoriums)
+        removed = rng.sample(auditoriums, edits)
+        per_edit = sum(_best_of(1, lambda: matcher.update(removed_auditoriums=[aud], exact=exact)) for aud in removed)
+        results.append({
+            "mode": "exact" if exact else "warm",
+            "from_scratch_s": from_scratch,
+            "update_s": per_edit / edits,
+            "speedup": from_scratch / (per_edit / edits),
+        })
+    return results
+
+
+_SLOT_STRINGS = [(f"{h:02d}:{m:02d}", f"{h + (m + 90) // 60:02d}:{(m + 90) % 60:02d}")
+                 for starts in SLOT_STARTS.values() for h, m in starts]
+
+
+def synthetic_auditorium_rows(num_auditoriums: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Auditorium rows in the loader.py format, generated one at a time."""
+    rng = random.Random(seed)
+    for i in range(num_auditoriums):
+        start, end = rng.choice(_SLOT_STRINGS)
+        yield {"name": f"Room {i}", "capacity": rng.randint(3, 150), "day": rng.choice(DAYS[:5]),
+               "start": start, "end": end}
+
+
+def synthetic_teacher_rows(num_teachers: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Teacher rows in the loader.py format (bookings as a list), generated one at a time."""
+    rng = random.Random(-1 - seed)
+    for i in range(num_teachers):
+        bookings = [f"{rng.choice(DAYS[:5])} {'-'.join(rng.choice(_SLOT_STRINGS))}" for _ in range(rng.randint(0, 2))]
+        yield {"name": "Teacher", "surname": str(i), "group": f"Group {i % 5000}", "students": i % 5000 % 40 + 1,
+               "time_preference": rng.choice(["morning", "midday", "afternoon"]), "bookings": bookings}
+
+
+def write_synthetic_csv(directory: str, num_teachers: int, num_auditoriums: int, seed: int = 0) -> Tuple[str, str]:
+    """Writes teachers.csv and auditoriums.csv in the loader.py format, row by row; returns their paths."""
+    teachers_path, auditoriums_path = os.path.join(directory, "teachers.csv"), os.path.join(directory, "auditoriums.csv")
+    with open(auditoriums_path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.DictWriter(output, ["name", "capacity", "day", "start", "end"])
+        writer.writeheader()
+        writer.writerows(synthetic_auditorium_rows(num_auditoriums, seed))
+    with open(teachers_path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.DictWriter(output, ["name", "surname", "group", "students", "time_preference", "bookings"])
+        writer.writeheader()
+        for row in synthetic_teacher_rows(num_teachers, seed):
+            writer.writerow({**row, "bookings": ";".join(row["bookings"])})
+    return teachers_path, auditoriums_path
+
+
+def bench_load(num_teachers: int = 1_000_000, num_auditoriums: int = 100_000, seed: int = 0) -> Dict[str, float]:
+    """Time to stream synthetic CSV exports into a ProblemSet with loader.load_problem."""
+    from loader import load_problem
+
+    with tempfile.TemporaryDirectory() as directory:
+        teachers_path, auditoriums_path = write_synthetic_csv(directory, num_teachers, num_auditoriums, seed)
+        start = timer.perf_counter()
+        loader = load_problem(teachers_path, auditoriums_path)
+        load_s = timer.perf_counter() - start
+    rows = loader.problem.num_teachers + loader.problem.num_auditoriums
+    return {"rows": rows, "load_s": load_s, "rows_per_s": rows / load_s, "time_slots": len(loader.time_slots),
+            "groups": len(loader.group_names)}
+
+
+def bench_score_cache(num_teachers: int = 3000, num_auditoriums: int = 3000, changed: float = 0.05,
+                      seed: int = 0) -> Dict[str, float]:
+    """Ranking from scratch vs a cold and a warm ScoreCache, the warm run with a share of teachers changed."""
+    from score_cache import ScoreCache
+
+    teachers, auditoriums = synthetic_problem(num_teachers, num_auditoriums, bookings_per_teacher=2, seed=seed)
+    problem = ProblemSet.from_objects(teachers, auditoriums)
+    uncached_s = _best_of(1, lambda: [problem.rank_auditoriums(t) for t in range(problem.num_teachers)])
+    edited_teachers, _ = synthetic_problem(num_teachers, num_auditoriums, bookings_per_teacher=2, seed=seed + 1)
+    rng = random.Random(seed)
+    for name in rng.sample(list(teachers), int(changed * num_teachers)):
+        teachers[name] = edited_teachers[name]
+    edited = ProblemSet.from_objects(teachers, auditoriums)
+
+    with tempfile.TemporaryDirectory() as directory:
+        with ScoreCache(directory) as cache:
+            cold_s = _best_of(1, lambda: cache.ranked_lists(problem))
+        with ScoreCache(directory) as cache:
+            warm_s = _best_of(1, lambda: cache.ranked_lists(edited))
+            hits, misses = cache.hits, cache.misses
+    return {"uncached_s": uncached_s, "cold_s": cold_s, "warm_s": warm_s, "hits": hits, "misses": misses}
+
+
+def bench_stability(sizes: Sequence[int] = (1000, 3000, 10000, 30000), max_pairwise: int = 3000,
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """stability.check_matching vs the pairwise check on matcher results (pairwise only up to max_pairwise)."""
+    from stability import check_matching, blocking_pairs_pairwise
+
+    rows = []
+    for size in sizes:
+        teachers, auditoriums = synthetic_problem(size, size, bookings_per_teacher=2, seed=seed)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        teacher_match = match_problem(problem)
+        start = timer.perf_counter()
+        report = check_matching(problem, teacher_match)
+        row = {"teachers": size, "auditoriums": size, "check_s": timer.perf_counter() - start,
+               "blocking_pairs": len(report.blocking_pairs), "pairwise_s": None}
+        if size <= max_pairwise:
+            row["pairwise_s"] = _best_of(1, lambda: blocking_pairs_pairwise(problem, teacher_match))
+        rows.append(row)
+    return rows
+
+
+def bench_utilization(num_teachers: int = 2000, num_auditoriums: int = 3000, seed: int = 0) -> List[Dict[str, Any]]:
+    """utilization.improve_utilization on a matcher result, with and without the stability constraint."""
+    from utilization import improve_utilization
+
+    teachers, auditoriums = synthetic_problem(num_teachers, num_auditoriums, bookings_per_teacher=2, seed=seed)
+    problem = ProblemSet.from_objects(teachers, auditoriums)
+    teacher_match = match_problem(problem)
+    rows = []
+    for require_stable, keep_scores in ((True, True), (False, True), (False, False)):
+        start = timer.perf_counter()
+        _, report = improve_utilization(problem, teacher_match, require_stable=require_stable, keep_scores=keep_scores)
+        rows.append({"require_stable": require_stable, "keep_scores": keep_scores,
+                     "seconds": timer.perf_counter() - start, **report.as_dict()})
+    return rows
+
+
+def bench_solvers(sizes: Sequence[int] = (300, 1000, 3000), auditoriums_per_teacher: float = 1.2,
+                  seed: int = 0) -> List[Dict[str, Any]]:
+    """Each solvers.py backend on identical synthetic inputs: time, total score, matched teachers, blocking pairs."""
+    from solvers import available_solvers, solve_problem, total_score
+    from stability import check_matching
+
+    rows = []
+    for size in sizes:
+        teachers, auditoriums = synthetic_problem(size, int(size * auditoriums_per_teacher), bookings_per_teacher=2,
+                                                  seed=seed)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        for solver in available_solvers():
+            start = timer.perf_counter()
+            teacher_match = solve_problem(problem, solver)
+            elapsed = timer.perf_counter() - start
+            rows.append({"teachers": size, "auditoriums": problem.num_auditoriums, "solver": solver,
+                         "seconds": elapsed, "total_score": total_score(problem, teacher_match),
+                         "matched": sum(a != NO_MATCH for a in teacher_match),
+                         "blocking_pairs": len(check_matching(problem, teacher_match).blocking_pairs)})
+    return rows
+
+
+def bench_startup(jobs: int = 20, num_teachers: int = 200, num_auditoriums: int = 300, repeat: int = 5,
+                  seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Cold-start wall time of fresh interpreters (best of `repeat`): bare Python, importing the
+    matcher, cli.py --help, the demo and one cli match. Then `jobs` small jobs run as one process
+    each vs one cli batch manifest.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+
+    def run(name: str, args: List[str], count: int = 1) -> None:
+        command = [sys.executable] + args
+        seconds = _best_of(repeat, lambda: subprocess.run(command, cwd=here, check=True, stdout=subprocess.DEVNULL))
+        rows.append({"command": name, "jobs": count, "seconds": seconds, "per_job_ms": seconds / count * 1e3})
+
+    with tempfile.TemporaryDirectory() as directory:
+        teachers, auditoriums = write_synthetic_csv(directory, num_teachers, num_auditoriums, seed)
+        output = os.path.join(directory, "out.jsonl")
+        run("python -c pass", ["-c", "pass"])
+        run("import matcher", ["-c", "import gale_shapley_matching"])
+        run("cli.py --help", ["cli.py", "--help"])  # A script is compiled on every run, a module uses its .pyc
+        run("python -m cli --help", ["-m", "cli", "--help"])
+        run("main.py (demo)", ["main.py"])
+        run("cli match", ["-m", "cli", "match", teachers, auditoriums, "-o", output])
+        manifest = os.path.join(directory, "manifest.jsonl")
+        with open(manifest, "w", encoding="utf-8") as lines:
+            for job in range(jobs):
+                lines.write(json.dumps({"teachers": teachers, "auditoriums": auditoriums, "output": output,
+                                        "order": "random", "seed": job}) + "\n")
+        processes = [[sys.executable, "-m", "cli", "match", teachers, auditoriums, "-o", output, "--order", "random",
+                      "--seed", str(job)] for job in range(jobs)]
+        seconds = _best_of(max(1, repeat // 2), lambda: [subprocess.run(command, cwd=here, check=True)
+                                                         for command in processes])
+        rows.append({"command": "cli match per job", "jobs": jobs, "seconds": seconds,
+                     "per_job_ms": seconds / jobs * 1e3})
+        run("cli batch", ["-m", "cli", "batch", manifest], jobs)
+    return rows
+
+
+def bench_calendar(num_rooms: int = 2000, num_days: int = 5, slots_per_day: int = 6, num_teachers: int = 2000,
+                   seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Setup time and traced memory of a room inventory as Auditorium objects (ProblemSet.from_objects)
+    vs room_calendar.RoomInventory, then the matching time on each.
+    """
+    import tracemalloc
+    from room_calendar import RoomCalendar, RoomInventory, weekly_template
+
+    rng = random.Random(seed)
+    starts = [start for period in TimePeriod for start in SLOT_STARTS[period]][:slots_per_day]
+    slots = [TimeSlot(time(h, m), (datetime(2000, 1, 1, h, m) + timedelta(minutes=90)).time()) for h, m in starts]
+    template = weekly_template(DAYS[:num_days], slots)
+    rooms = [(f"Room {i}", rng.randint(*SIZE_RANGES[rng.choice(list(SizeCategory))])) for i in range(num_rooms)]
+    closed = [[rng.choice(DAYS[:num_days])] if rng.random() < 0.2 else [] for _ in rooms]
+    teachers, _ = synthetic_problem(num_teachers, 0, num_days=num_days, seed=seed)
+
+    def objects() -> ProblemSet:
+        auditoriums = [Auditorium(name, capacity, day, slot) for (name, capacity), days_closed in zip(rooms, closed)
+                       for day in template if day not in days_closed for slot in slots]
+        return ProblemSet.from_objects({}, auditoriums)
+
+    def calendars() -> ProblemSet:
+        inventory = RoomInventory(RoomCalendar(name, capacity, template, days_closed)
+                                  for (name, capacity), days_closed in zip(rooms, closed))
+        return inventory.problem()
+
+    rows = []
+    for mode, build in (("auditoriums", objects), ("calendars", calendars)):
+        start = timer.perf_counter()
+        problem = build()
+        setup = timer.perf_counter() - start
+        del problem
+        tracemalloc.start()
+        problem = build()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        for name, teacher in teachers.items():
+            problem.add_teacher(name, teacher)
+        start = timer.perf_counter()
+        teacher_match = match_problem(problem)
+        rows.append({"mode": mode, "room_slots": problem.num_auditoriums, "setup_s": setup, "memory_mb": memory / 1e6,
+                     "match_s": timer.perf_counter() - start,
+                     "matched": sum(a != NO_MATCH for a in teacher_match)})
+    return rows
+
+
+def bench_scenarios(num_teachers: int = 2000, num_auditoriums: int = 2500, num_scenarios: int = 48,
+                    workers: Sequence[int] = (1, 2), seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    What-if throughput: `num_scenarios` variants (a few rooms closed, teachers moved to MORNING, a
+    group resized) as from-scratch ProblemSet.from_objects + match_problem runs vs a
+    scenarios.ScenarioRunner, in-process and over worker processes.
+    """
+    from scenarios import Scenario, ScenarioRunner
+
+    teachers, auditoriums = synthetic_problem(num_teachers, num_auditoriums, bookings_per_teacher=2, seed=seed)
+    rng = random.Random(seed)
+    names = list(teachers)
+    scenarios = [Scenario(f"scenario {i}", closed=rng.sample(auditoriums, 5),
+                          time_preferences={name: TimePeriod.MORNING for name in rng.sample(names, 50)},
+                          group_sizes={rng.choice(names): rng.randint(*SIZE_RANGES[SizeCategory.LARGE])})
+                 for i in range(num_scenarios)]
+
+    def from_scratch(scenario: Scenario) -> List[int]:
+        closed = {id(aud) for aud in scenario.closed}
+        changed = {}
+        for name, teacher in teachers.items():
+            group = teacher.group
+            if name in scenario.group_sizes:
+                group = Group(group.name, scenario.group_sizes[name])
+            changed[name] = Teacher(teacher.name, teacher.surname, group,
+                                    scenario.time_preferences.get(name, teacher.time_preference), teacher.schedule)
+        return match_problem(ProblemSet.from_objects(changed, [aud for aud in auditoriums if id(aud) not in closed]))
+
+    rows = []
+    start = timer.perf_counter()
+    for scenario in scenarios:
+        from_scratch(scenario)
+    elapsed = timer.perf_counter() - start
+    rows.append({"mode": "from scratch", "workers": 1, "setup_s": 0.0, "run_s": elapsed,
+                 "scenarios_per_s": num_scenarios / elapsed})
+    start = timer.perf_counter()
+    runner = ScenarioRunner(teachers, auditoriums)
+    setup = timer.perf_counter() - start
+    for count in workers:
+        start = timer.perf_counter()
+        runner.run(scenarios, max_workers=count)
+        elapsed = timer.perf_counter() - start
+        rows.append({"mode": "runner", "workers": count, "setup_s": setup, "run_s": elapsed,
+                     "scenarios_per_s": num_scenarios / elapsed})
+    return rows
+
+
+def contested_problem(num_pairs: int) -> ProblemSet:
+    """
+    Worst case for the stable-matching lattice: pairs of a morning and an afternoon room whose
+    size preferences oppose what the small-group morning teachers and large-group afternoon
+    teachers want, so every pair of teachers can swap and the rotations chain up.
+    """
+    slots = (TimeSlot(time(9, 45), time(11, 15)), TimeSlot(time(15, 30), time(17, 0)))
+    small, large = SizeCategory.SMALL, SizeCategory.LARGE
+    teachers, auditoriums = {}, []
+    for i in range(num_pairs):
+        for slot, liked in zip(slots, (large, small)):
+            aud = Auditorium(f"Room {len(auditoriums)}", 40, "Monday", slot)
+            aud.preferences = {category: Preference.HIGH if category == liked else Preference.LOW
+                               for category in SizeCategory}
+            auditoriums.append(aud)
+        teachers[f"Morning {i}"] = Teacher("Morning", str(i), Group(f"Small {i}", 5), TimePeriod.MORNING, [])
+        teachers[f"Afternoon {i}"] = Teacher("Afternoon", str(i), Group(f"Large {i}", 30), TimePeriod.AFTERNOON, [])
+    return ProblemSet.from_objects(teachers, auditoriums)
+
+
+def bench_lattice(sizes: Sequence[int] = (1000, 3000), auditoriums_per_teacher: float = 1.2,
+                  max_matchings: int = 1000, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Stable-matching lattice per size, on a synthetic_problem with custom size preferences in half
+    the rooms and on a contested_problem: teacher-proposing match_problem, the StableLattice build
+    (both optimal matchings and every rotation) and the time per matching while enumerating up to
+    `max_matchings` of them.
+    """
+    from lattice import StableLattice
+
+    rows = []
+    for size in sizes:
+        teachers, auditoriums = synthetic_problem(size, int(size * auditoriums_per_teacher),
+                                                  bookings_per_teacher=1, seed=seed)
+        rng = random.Random(seed)
+        for aud in auditoriums[::2]:
+            aud.preferences = {category: rng.choice(list(Preference)) for category in SizeCategory}
+        for mode, problem in (("synthetic", ProblemSet.from_objects(teachers, auditoriums)),
+                              ("contested", contested_problem(size // 2))):
+            match_s = _best_of(1, lambda: match_problem(problem))
+            start = timer.perf_counter()
+            lattice = StableLattice(problem)
+            build_s = timer.perf_counter() - start
+            start = timer.perf_counter()
+            count = 0
+            for _ in lattice.matchings():
+                count += 1
+                if count >= max_matchings:
+                    break
+            rows.append({"mode": mode, "teachers": problem.num_teachers, "auditoriums": problem.num_auditoriums,
+                         "match_s": match_s, "build_s": build_s, "rotations": len(lattice.rotations),
+                         "matchings": count, "per_matching_ms": (timer.perf_counter() - start) / count * 1e3})
+    return rows
+
+
+def bench_groups(num_teachers: int = 5000, num_auditoriums: int = 6000,
+                 teachers_per_group: Sequence[int] = (1, 3, 10, 30), seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    match_problem on a synthetic_problem whose teachers share Group objects, `teachers_per_group`
+    teachers per group (1: nothing shared), and the group_clashes check of the result. The
+    proposal loop keeps one IntervalIndex per shared group, so a popular group costs a lookup
+    per proposal whatever the number of its teachers.
+    """
+    from stability import group_clashes
+
+    rows = []
+    for per_group in teachers_per_group:
+        teachers, auditoriums = synthetic_problem(num_teachers, num_auditoriums, bookings_per_teacher=1, seed=seed)
+        shared = [teacher.group for teacher in list(teachers.values())[::per_group]]
+        for i, teacher in enumerate(teachers.values()):
+            teacher.group = shared[i // per_group]
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        stats = MatchingStats()
+        start = timer.perf_counter()
+        teacher_match = match_problem(problem, stats=stats)
+        match_s = timer.perf_counter() - start
+        clashes = group_clashes(problem, teacher_match)
+        rows.append({"teachers_per_group": per_group, "teachers": num_teachers, "match_s": match_s,
+                     "check_s": timer.perf_counter() - start - match_s, "group_clashes": stats.group_clashes,
+                     "matched": sum(a != NO_MATCH for a in teacher_match), "double_booked": len(clashes)})
+    return rows
+
+
+def bench_checkpoint(num_teachers: int = 10000, num_auditoriums: int = 12000, slices: int = 10,
+                     seed: int = 0) -> Dict[str, Any]:
+    """
+    A synthetic run matched in one go, with an unlimited Budget (the cost of checking it), and in
+    `slices` proposal-budgeted calls, each on a freshly built problem resumed from a checkpoint
+    file: the time of the calls, of saving and loading the checkpoints, and their size.
+    """
+    from gale_shapley_matching import Budget, MatchingCheckpoint, match_problem_budgeted
+
+    teachers, auditoriums = synthetic_problem(num_teachers, num_auditoriums, bookings_per_teacher=1, seed=seed)
+    stats = MatchingStats()
+    start = timer.perf_counter()
+    expected = match_problem(ProblemSet.from_objects(teachers, auditoriums), stats=stats)
+    full_s = timer.perf_counter() - start
+    start = timer.perf_counter()
+    match_problem_budgeted(ProblemSet.from_objects(teachers, auditoriums), budget=Budget(seconds=float("inf")))
+    unlimited_s = timer.perf_counter() - start
+
+    per_slice = stats.proposals // slices + 1
+    sliced_s = save_s = load_s = 0.0
+    calls, size, checkpoint = 0, 0, None
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "run.checkpoint")
+        while True:
+            start = timer.perf_counter()
+            problem = ProblemSet.from_objects(teachers, auditoriums)  # As a fresh process would
+            teacher_match, checkpoint = match_problem_budgeted(problem, budget=Budget(proposals=per_slice),
+                                                               checkpoint=checkpoint)
+            sliced_s += timer.perf_counter() - start
+            calls += 1
+            if checkpoint is None:
+                break
+            start = timer.perf_counter()
+            checkpoint.save(path)
+            save_s += timer.perf_counter() - start
+            size = max(size, os.path.getsize(path))
+            start = timer.perf_counter()
+            checkpoint = MatchingCheckpoint.load(path)
+            load_s += timer.perf_counter() - start
+    return {"teachers": num_teachers, "full_s": full_s, "unlimited_budget_s": unlimited_s, "calls": calls,
+            "sliced_s": sliced_s, "save_s": save_s, "load_s": load_s, "checkpoint_bytes": size,
+            "same_result": teacher_match == expected}
+
+
+def bench_service(jobs: int = 200, concurrency: int = 16, num_teachers: int = 200, num_auditoriums: int = 500,
+                  inventories: int = 2, workers: Optional[int] = None, batch_window: float = 0.005,
+                  seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Load test of service.py over HTTP: `concurrency` client threads post `jobs` jobs spread over a
+    few shared inventories, once with coalescing and once with every job in its own batch.
+    """
+    import asyncio
+    import http.client
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from service import MatchingService
+
+    shared = [list(synthetic_auditorium_rows(num_auditoriums, seed + i)) for i in range(inventories)]
+    bodies = [json.dumps({"teachers": list(synthetic_teacher_rows(num_teachers, seed + j)),
+                          "auditoriums": shared[j % inventories]}) for j in range(jobs)]
+    rows = []
+    for mode, max_batch in (("coalesced", jobs), ("single", 1)):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        service = MatchingService(workers=workers, batch_window=batch_window, max_batch=max_batch)
+        host, port = asyncio.run_coroutine_threadsafe(service.start(), loop).result()
+        local, connections = threading.local(), []
+
+        def post(body: str) -> float:
+            if not hasattr(local, "connection"):
+                local.connection = http.client.HTTPConnection(host, port)
+                connections.append(local.connection)
+            start = timer.perf_counter()
+            local.connection.request("POST", "/match", body=body)
+            response = local.connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Service answered {response.status}")
+            return timer.perf_counter() - start
+
+        post(bodies[0])  # Start the worker processes
+        service.jobs = service.batches = 0
+        start = timer.perf_counter()
+        with ThreadPoolExecutor(concurrency) as clients:
+            latencies = sorted(clients.map(post, bodies))
+        elapsed = timer.perf_counter() - start
+        for connection in connections:
+            connection.close()
+        asyncio.run_coroutine_threadsafe(service.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        rows.append({"mode": mode, "jobs": jobs, "batches": service.batches, "jobs_per_s": jobs / elapsed,
+                     "p50_ms": latencies[len(latencies) // 2] * 1e3,
+                     "p95_ms": latencies[int(len(latencies) * 0.95)] * 1e3})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the matcher and its helpers.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    conflicts = subparsers.add_parser("conflicts", help="is_schedule_conflict vs a linear scan")
+    conflicts.add_argument("--probes", type=int, default=2000)
+    conflicts.add_argument("--repeat", type=int, default=3)
+    orders = subparsers.add_parser("orders", help="Compare ProposalOrder strategies")
+    orders.add_argument("--teachers", type=int, default=2000)
+    orders.add_argument("--auditoriums", type=int, default=1500)
+    orders.add_argument("--repeat", type=int, default=3)
+    incremental = subparsers.add_parser("incremental", help="IncrementalMatcher updates vs from-scratch runs")
+    incremental.add_argument("--teachers", type=int, default=2000)
+    incremental.add_argument("--auditoriums", type=int, default=1500)
+    scaling = subparsers.add_parser("scaling", help="Scaling curve on synthetic campus instances")
+    scaling.add_argument("--sizes", type=int, nargs="+", default=list(SCALING_SIZES))
+    scaling.add_argument("--auditoriums-per-teacher", type=float, default=1.0)
+    scaling.add_argument("--days", type=int, default=5)
+    scaling.add_argument("--size-mix", type=float, nargs=3, default=[0.4, 0.4, 0.2], metavar=("SMALL", "MEDIUM", "LARGE"))
+    scaling.add_argument("--period-mix", type=float, nargs=3, default=[0.45, 0.3, 0.25],
+                         metavar=("MORNING", "MIDDAY", "AFTERNOON"))
+    scaling.add_argument("--bookings", type=float, default=2.0, help="Average existing bookings per teacher")
+    scaling.add_argument("--max-seconds", type=float, default=60.0)
+    scaling.add_argument("--output", help="Append results as JSON lines to this file")
+    load = subparsers.add_parser("load", help="Stream synthetic CSV exports with loader.py")
+    load.add_argument("--teachers", type=int, default=1_000_000)
+    load.add_argument("--auditoriums", type=int, default=100_000)
+    cache = subparsers.add_parser("cache", help="Ranking with and without the on-disk ScoreCache")
+    cache.add_argument("--teachers", type=int, default=3000)
+    cache.add_argument("--auditoriums", type=int, default=3000)
+    cache.add_argument("--changed", type=float, default=0.05, help="Share of teachers edited before the warm run")
+    stability = subparsers.add_parser("stability", help="Blocking-pair check vs the pairwise check")
+    stability.add_argument("--sizes", type=int, nargs="+", default=[1000, 3000, 10000, 30000])
+    stability.add_argument("--max-pairwise", type=int, default=3000)
+    utilization = subparsers.add_parser("utilization", help="Room utilization post-pass")
+    utilization.add_argument("--teachers", type=int, default=2000)
+    utilization.add_argument("--auditoriums", type=int, default=3000)
+    solvers = subparsers.add_parser("solvers", help="Stable matching vs maximum total score on the same inputs")
+    solvers.add_argument("--sizes", type=int, nargs="+", default=[300, 1000, 3000])
+    solvers.add_argument("--auditoriums-per-teacher", type=float, default=1.2)
+    startup = subparsers.add_parser("startup", help="Cold-start time of fresh interpreters and cli.py")
+    startup.add_argument("--jobs", type=int, default=20)
+    startup.add_argument("--repeat", type=int, default=5)
+    calendar = subparsers.add_parser("calendar", help="Room calendars vs materialized Auditorium lists")
+    calendar.add_argument("--rooms", type=int, default=2000)
+    calendar.add_argument("--teachers", type=int, default=2000)
+    scenarios = subparsers.add_parser("scenarios", help="What-if scenarios: from scratch vs ScenarioRunner")
+    scenarios.add_argument("--teachers", type=int, default=2000)
+    scenarios.add_argument("--auditoriums", type=int, default=2500)
+    scenarios.add_argument("--scenarios", type=int, default=48)
+    scenarios.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    lattice = subparsers.add_parser("lattice", help="Stable-matching lattice: build and enumeration")
+    lattice.add_argument("--sizes", type=int, nargs="+", default=[1000, 3000])
+    lattice.add_argument("--max-matchings", type=int, default=1000)
+    groups = subparsers.add_parser("groups", help="Matching with teachers sharing student groups")
+    groups.add_argument("--teachers", type=int, default=5000)
+    groups.add_argument("--auditoriums", type=int, default=6000)
+    groups.add_argument("--per-group", type=int, nargs="+", default=[1, 3, 10, 30])
+    checkpoint = subparsers.add_parser("checkpoint", help="Budgeted runs resumed from checkpoint files")
+    checkpoint.add_argument("--teachers", type=int, default=10000)
+    checkpoint.add_argument("--auditoriums", type=int, default=12000)
+    checkpoint.add_argument("--slices", type=int, default=10)
+    service = subparsers.add_parser("service", help="Load test the HTTP matching service")
+    service.add_argument("--jobs", type=int, default=200)
+    service.add_argument("--concurrency", type=int, default=16)
+    service.add_argument("--teachers", type=int, default=200, help="Teachers per job")
+    service.add_argument("--auditoriums", type=int, default=500, help="Auditoriums per inventory")
+    service.add_argument("--inventories", type=int, default=2)
+    service.add_argument("--workers", type=int)
+    compare = subparsers.add_parser("compare", help="Compare two JSON lines result files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--metric", default="total_s")
+    args = parser.parse_args()
+
+    if args.benchmark == "conflicts":
+        print(f"{'bookings':>9} {'linear (ms)':>12} {'indexed (ms)':>13} {'speedup':>8}")
+        for row in bench_schedule_conflict(probes=args.probes, repeat=args.repeat):
+            print(f"{row['bookings']:>9} {row['linear_s'] * 1e3:>12.2f} {row['indexed_s'] * 1e3:>13.2f} "
+                  f"{row['speedup']:>7.1f}x")
+    elif args.benchmark == "orders":
+        print(f"{'seed':>4} {'order':>17} {'matched':>8} {'proposals':>10} {'rejections':>11} "
+              f"{'displaced':>10} {'time (ms)':>10}")
+        for row in bench_proposal_orders(args.teachers, args.auditoriums, repeat=args.repeat):
+            print(f"{row['seed']:>4} {row['order']:>17} {row['matched']:>8} {row['proposals']:>10} "
+                  f"{row['rejections']:>11} {row['displacements']:>10} {row['match_s'] * 1e3:>10.1f}")
+    elif args.benchmark == "scaling":
+        rows = bench_scaling(args.sizes, args.auditoriums_per_teacher, args.max_seconds, num_days=args.days,
+                             size_mix=tuple(args.size_mix), period_mix=tuple(args.period_mix),
+                             bookings_per_teacher=args.bookings)
+        print(f"{'teachers':>9} {'rooms':>7} {'build (s)':>10} {'rank (s)':>9} {'match (s)':>10} "
+              f"{'lazy (s)':>9} {'score (us)':>11} {'conflict (us)':>14} {'proposals':>10}")
+        for row in rows:
+            print(f"{row['teachers']:>9} {row['auditoriums']:>7} {row['build_s']:>10.3f} {row['rank_s']:>9.3f} "
+                  f"{row['match_s']:>10.3f} {row['lazy_match_s']:>9.3f} {row['score_us_per_call']:>11.2f} "
+                  f"{row['conflict_us_per_call']:>14.2f} {row['proposals']:>10}")
+        if args.output:
+            write_results(args.output, "scaling", rows)
+    elif args.benchmark == "compare":
+        print(f"{'benchmark':>10} {'teachers':>9} {'rooms':>7} {'baseline':>10} {'candidate':>10} {'ratio':>7}")
+        for row in compare_results(args.baseline, args.candidate, args.metric):
+            print(f"{row['benchmark']:>10} {row['teachers']!s:>9} {row['auditoriums']!s:>7} {row['baseline']:>10.4f} "
+                  f"{row['candidate']:>10.4f} {row['ratio']:>6.2f}x")
+    elif args.benchmark == "load":
+        row = bench_load(args.teachers, args.auditoriums)
+        print(f"{row['rows']} rows in {row['load_s']:.2f}s ({row['rows_per_s']:,.0f} rows/s), "
+              f"{row['time_slots']} distinct time slots, {row['groups']} distinct groups")
+    elif args.benchmark == "cache":
+        row = bench_score_cache(args.teachers, args.auditoriums, args.changed)
+        print(f"uncached {row['uncached_s']:.2f}s, cold cache {row['cold_s']:.2f}s, warm cache {row['warm_s']:.2f}s "
+              f"({row['hits']} rows reused, {row['misses']} recomputed)")
+    elif args.benchmark == "stability":
+        print(f"{'teachers':>9} {'check (s)':>10} {'pairwise (s)':>13} {'blocking':>9}")
+        for row in bench_stability(args.sizes, args.max_pairwise):
+            pairwise = "-" if row["pairwise_s"] is None else f"{row['pairwise_s']:.3f}"
+            print(f"{row['teachers']:>9} {row['check_s']:>10.3f} {pairwise:>13} {row['blocking_pairs']:>9}")
+    elif args.benchmark == "utilization":
+        print(f"{'stable':>7} {'scores':>7} {'time (s)':>9} {'matched':>15} {'held seats':>15} {'utilization':>15}")
+        for row in bench_utilization(args.teachers, args.auditoriums):
+            before, after = row["before"], row["after"]
+            print(f"{row['require_stable']!s:>7} {row['keep_scores']!s:>7} {row['seconds']:>9.2f} "
+                  f"{before['matched']:>7}->{after['matched']:<7} {before['held_seats']:>7}->{after['held_seats']:<7} "
+                  f"{before['utilization']:>7.1%}->{after['utilization']:<7.1%}")
+    elif args.benchmark == "solvers":
+        print(f"{'teachers':>9} {'rooms':>7} {'solver':>13} {'time (s)':>9} {'score':>9} {'matched':>8} {'blocking':>9}")
+        for row in bench_solvers(args.sizes, args.auditoriums_per_teacher):
+            print(f"{row['teachers']:>9} {row['auditoriums']:>7} {row['solver']:>13} {row['seconds']:>9.3f} "
+                  f"{row['total_score']:>9.1f} {row['matched']:>8} {row['blocking_pairs']:>9}")
+    elif args.benchmark == "startup":
+        print(f"{'command':>22} {'jobs':>5} {'time (ms)':>10} {'per job (ms)':>13}")
+        for row in bench_startup(args.jobs, repeat=args.repeat):
+            print(f"{row['command']:>22} {row['jobs']:>5} {row['seconds'] * 1e3:>10.1f} {row['per_job_ms']:>13.1f}")
+    elif args.benchmark == "calendar":
+        print(f"{'mode':>12} {'room slots':>11} {'setup (s)':>10} {'memory (MB)':>12} {'match (s)':>10} {'matched':>8}")
+        for row in bench_calendar(args.rooms, num_teachers=args.teachers):
+            print(f"{row['mode']:>12} {row['room_slots']:>11} {row['setup_s']:>10.3f} {row['memory_mb']:>12.1f} "
+                  f"{row['match_s']:>10.3f} {row['matched']:>8}")
+    elif args.benchmark == "scenarios":
+        print(f"{'mode':>13} {'workers':>8} {'setup (s)':>10} {'run (s)':>8} {'scenarios/s':>12}")
+        for row in bench_scenarios(args.teachers, args.auditoriums, args.scenarios, args.workers):
+            print(f"{row['mode']:>13} {row['workers']:>8} {row['setup_s']:>10.3f} {row['run_s']:>8.3f} "
+                  f"{row['scenarios_per_s']:>12.1f}")
+    elif args.benchmark == "lattice":
+        print(f"{'mode':>10} {'teachers':>9} {'rooms':>6} {'match (s)':>10} {'build (s)':>10} {'rotations':>10} {'matchings':>10} "
+              f"{'per matching (ms)':>18}")
+        for row in bench_lattice(args.sizes, max_matchings=args.max_matchings):
+            print(f"{row['mode']:>10} {row['teachers']:>9} {row['auditoriums']:>6} {row['match_s']:>10.3f} {row['build_s']:>10.3f} "
+                  f"{row['rotations']:>10} {row['matchings']:>10} {row['per_matching_ms']:>18.3f}")
+    elif args.benchmark == "groups":
+        print(f"{'per group':>10} {'teachers':>9} {'match (s)':>10} {'skipped':>8} {'matched':>8} {'check (s)':>10} "
+              f"{'double booked':>14}")
+        for row in bench_groups(args.teachers, args.auditoriums, args.per_group):
+            print(f"{row['teachers_per_group']:>10} {row['teachers']:>9} {row['match_s']:>10.3f} "
+                  f"{row['group_clashes']:>8} {row['matched']:>8} {row['check_s']:>10.3f} {row['double_booked']:>14}")
+    elif args.benchmark == "checkpoint":
+        row = bench_checkpoint(args.teachers, args.auditoriums, args.slices)
+        print(f"{row['teachers']} teachers: {row['full_s']:.2f}s in one run ({row['unlimited_budget_s']:.2f}s with an "
+              f"unlimited budget), {row['sliced_s']:.2f}s in {row['calls']} resumed calls; checkpoints "
+              f"{row['checkpoint_bytes'] / 1024:.0f} KB, saved in {row['save_s'] * 1e3:.0f} ms and loaded in "
+              f"{row['load_s'] * 1e3:.0f} ms in all; same result: {row['same_result']}")
+    elif args.benchmark == "service":
+        print(f"{'mode':>10} {'jobs':>6} {'batches':>8} {'jobs/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        for row in bench_service(args.jobs, args.concurrency, args.teachers, args.auditoriums, args.inventories,
+                                 args.workers):
+            print(f"{row['mode']:>10} {row['jobs']:>6} {row['batches']:>8} {row['jobs_per_s']:>8.1f} "
+                  f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+    elif args.benchmark == "incremental":
+        print(f"{'mode':>6} {'from scratch (ms)':>18} {'per update (ms)':>16} {'speedup':>8}")
+        for row in bench_incremental(args.teachers, args.auditoriums):
+            print(f"{row['mode']:>6} {row['from_scratch_s'] * 1e3:>18.1f} {row['update_s'] * 1e3:>16.1f} "
+                  f"{row['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
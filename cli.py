@@ -0,0 +1,346 @@
+# cli.py
+
+import argparse
+import json
+import os
+import sys
+import time as timer
+from contextlib import nullcontext
+from typing import List, Dict, Tuple, Optional, Any, IO
+
+# Only the standard library is imported up front. The matcher is imported once a command runs,
+# NumPy (solvers.py) only for a solver other than "gale_shapley", python-dotenv only when there
+# is an env file, and logging only with --log-level.
+
+ORDERS = ("insertion", "group_size", "most_constrained", "random")  # ProposalOrder values
+SOLVERS = ("gale_shapley", "max_weight")  # Registered in solvers.py, which imports NumPy
+FORMATS = ("text", "jsonl")
+
+
+def load_env_file(path: Optional[str]) -> bool:
+    """Loads `path` into os.environ with python-dotenv if the file exists; True if it was loaded."""
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        raise SystemExit(f"{path} found but python-dotenv is not installed") from None
+    return load_dotenv(path)
+
+
+def configure_logging(level: Optional[str]) -> None:
+    if level:
+        import logging
+
+        logging.basicConfig(level=level.upper(), format="%(asctime)s %(levelname)s:%(message)s")
+
+
+def solve(problem, solver: str = "gale_shapley", order: str = "insertion", seed: int = 0, stats=None,
+          index=None) -> List[int]:
+    """
+    Runs `solver` on a ProblemSet. The stable matcher runs without importing solvers.py, and can
+    use a CandidateIndex already built for the same auditoriums (index.for_problem). Other solvers
+    can't keep teachers who share a group apart, so a problem where they do raises ValueError
+    before solvers.py is imported.
+    """
+    if solver == "gale_shapley":
+        from gale_shapley_matching import match_problem
+
+        ranked = None if index is None else [index.ranked(t) for t in range(problem.num_teachers)]
+        return match_problem(problem, ranked, order, seed, stats)
+    from gale_shapley_matching import refuse_shared_groups
+
+    refuse_shared_groups(problem, f"--solver {solver}")
+    from solvers import solve_problem
+
+    return solve_problem(problem, solver, stats)
+
+
+def match_lines(loader, teacher_match: List[int], stats=None) -> List[Dict[str, Any]]:
+    """The result as service.py JSON lines: one per teacher, then a "done" summary."""
+    from gale_shapley_matching import NO_MATCH
+
+    problem = loader.problem
+    lines, matched = [], 0
+    for name, a in zip(problem.teacher_names, teacher_match):
+        if a == NO_MATCH:
+            lines.append({"teacher": name, "auditorium": None})
+            continue
+        slot = loader.time_slots[loader.auditorium_slot[a]]
+        lines.append({"teacher": name, "auditorium": loader.auditorium_names[a],
+                      "day": problem.day_names[problem.day[a]],
+                      "start": slot.start_time.isoformat(timespec="minutes"),
+                      "end": slot.end_time.isoformat(timespec="minutes")})
+        matched += 1
+    summary = {"done": True, "matched": matched, "unmatched": len(teacher_match) - matched}
+    if stats is not None:
+        summary["stats"] = stats.as_dict()
+    lines.append(summary)
+    return lines
+
+
+def write_result(output: IO[str], lines: List[Dict[str, Any]], output_format: str = "jsonl") -> None:
+    if output_format == "jsonl":
+        output.writelines(json.dumps(line) + "\n" for line in lines)
+        return
+    matches = sorted((line["teacher"], line) for line in lines[:-1] if line["auditorium"] is not None)
+    unmatched = sorted(line["teacher"] for line in lines[:-1] if line["auditorium"] is None)
+    output.write("\n--- Matching Results ---\nMatches:\n")
+    if matches:
+        for name, line in matches:
+            output.write(f"- {name} -> {line['auditorium']} ({line['day']} {line['start']}-{line['end']})\n")
+    else:
+        output.write("No matches found.\n")
+    if unmatched:
+        output.write("Unmatched Teachers:\n")
+        output.writelines(f"- {name}\n" for name in unmatched)
+    else:
+        output.write("All teachers were matched.\n")
+    output.write("------------------------\n\n")
+
+
+def _error_message(error: Exception) -> str:
+    """An exception as one line for stderr (a KeyError's str() is the repr of its message)."""
+    return str(error.args[0]) if isinstance(error, KeyError) and error.args else str(error)
+
+
+def _open_output(path: Optional[str]):
+    return open(path, "w", encoding="utf-8") if path and path != "-" else nullcontext(sys.stdout)
+
+
+# --- Commands ---
+
+def solve_budgeted(problem, args: argparse.Namespace, stats=None) -> Tuple[List[int], bool]:
+    """
+    The stable matcher under --budget-seconds / --checkpoint: resumes from the checkpoint file if
+    it exists, and saves it again if the budget runs out (removes it once the run finishes).
+    Returns the (possibly tentative) teacher_match and whether the run finished.
+    """
+    from gale_shapley_matching import Budget, MatchingCheckpoint, match_problem_budgeted
+
+    path = args.checkpoint
+    checkpoint = MatchingCheckpoint.load(path) if path and os.path.exists(path) else None
+    budget = None if args.budget_seconds is None else Budget(seconds=args.budget_seconds)
+    teacher_match, checkpoint = match_problem_budgeted(problem, None, args.order, args.seed, stats, budget, checkpoint)
+    if checkpoint is None:
+        if path and os.path.exists(path):
+            os.remove(path)
+        return teacher_match, True
+    if path:
+        checkpoint.save(path)
+    return teacher_match, False
+
+
+def run_match(args: argparse.Namespace) -> int:
+    """Exit status 75 (EX_TEMPFAIL) if the budget ran out: the output is tentative, run again to continue."""
+    from gale_shapley_matching import MatchingStats
+    from loader import load_problem
+
+    budgeted = args.budget_seconds is not None or args.checkpoint is not None
+    if budgeted and args.solver != "gale_shapley":
+        raise SystemExit("--budget-seconds and --checkpoint only apply to the gale_shapley solver")
+    started = timer.perf_counter()
+    try:
+        loader = load_problem(args.teachers, args.auditoriums, args.score_table)
+        loaded = timer.perf_counter()
+        stats = MatchingStats()
+        if budgeted:
+            teacher_match, finished = solve_budgeted(loader.problem, args, stats)
+        else:
+            teacher_match, finished = solve(loader.problem, args.solver, args.order, args.seed, stats), True
+    except (OSError, KeyError, ValueError) as error:
+        raise SystemExit(f"error: {_error_message(error)}") from None
+    solved = timer.perf_counter()
+    lines = match_lines(loader, teacher_match, stats)
+    lines[-1]["done"] = finished
+    with _open_output(args.output) as output:
+        write_result(output, lines, args.format)
+    if args.timing:
+        print(f"load {loaded - started:.3f}s, {args.solver} {solved - loaded:.3f}s", file=sys.stderr)
+    if not finished:
+        saved = f", checkpoint saved to {args.checkpoint}" if args.checkpoint else ""
+        print(f"Budget ran out after {stats.proposals} proposals{saved}", file=sys.stderr)
+        return 75
+    return 0
+
+
+class Inventories:
+    """Auditorium files parsed and indexed once per (path, score table), forked for every job."""
+
+    def __init__(self):
+        self._loaded: Dict[Tuple[str, Optional[str]], Tuple[Any, Any]] = {}
+        self.hits = 0
+
+    def loader(self, path: str, score_table: Optional[str] = None):
+        """A fresh ProblemLoader holding the auditoriums in `path`, and the CandidateIndex bound to it."""
+        from gale_shapley_matching import CandidateIndex
+        from loader import ProblemLoader, read_rows
+
+        key = (os.path.abspath(path), score_table)
+        if key in self._loaded:
+            self.hits += 1
+        else:
+            base = ProblemLoader(score_table)
+            base.add_auditorium_rows(read_rows(path))
+            self._loaded[key] = (base, CandidateIndex(base.problem))
+        base, index = self._loaded[key]
+        fork = base.fork()
+        return fork, index.for_problem(fork.problem)
+
+
+def read_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Manifest jobs: JSON lines of {"teachers", "auditoriums", "output"} with optional "solver",
+    "order", "seed", "score_table" and "format". Relative paths are relative to the manifest.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path, encoding="utf-8") as lines:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            for key in ("teachers", "auditoriums", "output"):
+                if key not in job:
+                    raise ValueError(f"Manifest line {number}: missing {key!r}")
+                if job[key] != "-":
+                    job[key] = os.path.join(directory, job[key])
+            job["line"] = number
+            jobs.append(job)
+    return jobs
+
+
+def run_manifest(args: argparse.Namespace) -> int:
+    """Runs every manifest job in this process; exit status 1 if any job failed."""
+    from gale_shapley_matching import MatchingStats
+    from loader import read_rows
+
+    inventories = Inventories()
+    failed = 0
+    started = timer.perf_counter()
+    try:
+        jobs = read_manifest(args.manifest)
+    except (OSError, ValueError) as error:
+        raise SystemExit(f"error: {args.manifest}: {_error_message(error)}") from None
+    for job in jobs:
+        job_started = timer.perf_counter()
+        try:
+            loader, index = inventories.loader(job["auditoriums"], job.get("score_table"))
+            loader.add_teacher_rows(read_rows(job["teachers"]))
+            stats = MatchingStats()
+            teacher_match = solve(loader.problem, job.get("solver", "gale_shapley"), job.get("order", "insertion"),
+                                  job.get("seed", 0), stats, index)
+            lines = match_lines(loader, teacher_match, stats)
+            with _open_output(job["output"]) as output:
+                write_result(output, lines, job.get("format", "jsonl"))
+        except (OSError, KeyError, ValueError) as error:
+            failed += 1
+            print(f"job {job['line']}: {_error_message(error)}", file=sys.stderr)
+            if args.stop_on_error:
+                break
+            continue
+        if args.timing:
+            summary = lines[-1]
+            print(f"job {job['line']}: {summary['matched']} matched, {summary['unmatched']} unmatched "
+                  f"in {timer.perf_counter() - job_started:.3f}s", file=sys.stderr)
+    if args.timing:
+        elapsed = timer.perf_counter() - started
+        print(f"{len(jobs)} jobs in {elapsed:.3f}s ({len(jobs) / elapsed if elapsed else 0:.1f} jobs/s), "
+              f"{inventories.hits} reused inventories, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def demo_problem():
+    """The sample campus the old main.py matched: six teachers, six auditoriums."""
+    from datetime import time
+    from gale_shapley_matching import TimeSlot, Auditorium, Group, Teacher, TimePeriod
+
+    groups = {
+        "Calculus": Group("Calculus Study Group", 5),  # Small
+        "Radio Eng": Group("Radio Engineering Club", 12),  # Medium
+        "OOP Python": Group("OOP in Python Seminar", 28),  # Large
+        "Algorithms": Group("Algorithms Class", 15),  # Medium
+        "Facultative": Group("Facultative Seminar", 15),  # Medium
+        "Quantum Physics": Group("Quantum Physics Intro", 9),  # Small
+    }
+    auditoriums = [
+        Auditorium("Classroom 101", 8, "Monday", TimeSlot(time(10, 0), time(11, 30))),  # Small, Morning
+        Auditorium("Lecture Hall B", 20, "Monday", TimeSlot(time(13, 0), time(15, 30))),  # Medium, Midday
+        Auditorium("Main Auditorium", 35, "Monday", TimeSlot(time(9, 0), time(10, 30))),  # Large, Morning
+        Auditorium("Classroom 102", 35, "Monday", TimeSlot(time(12, 0), time(13, 30))),  # Large, Midday
+        Auditorium("Classroom 103", 20, "Monday", TimeSlot(time(16, 0), time(17, 30))),  # Medium, Afternoon
+        Auditorium("Small Room 5", 10, "Tuesday", TimeSlot(time(9, 0), time(10, 0))),  # Small, Morning (another day)
+    ]
+    teachers = {
+        "Mahmoudreza Babaei": Teacher("Mahmoudreza", "Babaei", groups["Calculus"], TimePeriod.MORNING),
+        "Ghadeer Marwan": Teacher("Ghadeer", "Marwan", groups["Radio Eng"], TimePeriod.AFTERNOON),
+        "William Morrison": Teacher("William", "Morrison", groups["OOP Python"], TimePeriod.MORNING),
+        "Alexandr Bell": Teacher("Alexandr", "Bell", groups["Algorithms"], TimePeriod.MIDDAY),
+        "Maria Curie": Teacher("Maria", "Curie", groups["Quantum Physics"], TimePeriod.MORNING),
+        "John Doe": Teacher("John", "Doe", groups["Facultative"], TimePeriod.MIDDAY),
+    }
+    return teachers, auditoriums
+
+
+def run_demo(args: argparse.Namespace) -> int:
+    from gale_shapley_matching import gale_shapley_matching
+
+    teachers, auditoriums = demo_problem()
+    matches, unmatched = gale_shapley_matching(teachers, auditoriums)
+    print("\n--- Matching Results ---")
+    print("Matches:")
+    if matches:
+        for teacher_name, auditorium in sorted(matches.items()):
+            print(f"- {teacher_name} -> {auditorium}")
+    else:
+        print("No matches found.")
+    if unmatched:
+        print("Unmatched Teachers:")
+        for teacher_name in sorted(unmatched):
+            print(f"- {teacher_name}")
+    else:
+        print("All teachers were matched.")
+    print("------------------------\n")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Match teachers to auditoriums.")
+    parser.add_argument("--env-file", default=".env", help="Environment file to load if it exists (python-dotenv)")
+    parser.add_argument("--log-level", help="Configure logging at this level (e.g. INFO, DEBUG)")
+    parser.add_argument("--timing", action="store_true", help="Report load and solve times on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    match = commands.add_parser("match", help="Match one teachers file against one auditoriums file")
+    match.add_argument("teachers", help="Teacher rows (CSV or JSON lines, see loader.py)")
+    match.add_argument("auditoriums", help="Auditorium rows")
+    match.add_argument("--solver", default="gale_shapley", choices=SOLVERS,
+                       help="gale_shapley (stable) or max_weight, see solvers.py")
+    match.add_argument("--order", default="insertion", choices=ORDERS)
+    match.add_argument("--seed", type=int, default=0)
+    match.add_argument("--score-table", help="Registered ScoreTable name (default: the default table)")
+    match.add_argument("--format", default="text", choices=FORMATS)
+    match.add_argument("--output", "-o", help="Output file (default: stdout)")
+    match.add_argument("--budget-seconds", type=float, help="Stop after this long with a tentative result (exit 75)")
+    match.add_argument("--checkpoint", help="Resume from this file if it exists; save to it if the budget runs out")
+    match.set_defaults(run=run_match)
+
+    manifest = commands.add_parser("batch", help="Run every job in a JSON lines manifest in one process")
+    manifest.add_argument("manifest")
+    manifest.add_argument("--stop-on-error", action="store_true")
+    manifest.set_defaults(run=run_manifest)
+
+    demo = commands.add_parser("demo", help="Match the built-in sample campus")
+    demo.set_defaults(run=run_demo)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    load_env_file(args.env_file)
+    configure_logging(args.log_level)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,19 @@
 # gale_shapley_matching.py
 
-import uuid
-import logging
-from datetime import time, datetime
+import itertools
+import sys
+import time as timer
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import MutableSequence
+from contextlib import nullcontext
+from heapq import heappush, heappop
+from datetime import time
 from enum import Enum
-from typing import List, Dict, Tuple, Optional, Set, Any
+from functools import partial
+from types import MappingProxyType
+from typing import List, Dict, Tuple, Optional, Set, Any, Iterable, Iterator, Union, Callable, IO, Mapping
 
 
 class SizeCategory(Enum):
@@ -25,7 +34,30 @@ class Preference(Enum):
     LOW = -1
 
 
+class ProposalOrder(Enum):
+    INSERTION = "insertion"  # teachers dict order
+    GROUP_SIZE = "group_size"  # Largest groups first (fewest rooms fit them)
+    MOST_CONSTRAINED = "most_constrained"  # Fewest feasible auditoriums first
+    RANDOM = "random"  # Seeded shuffle
+
+
+def _debug(message: str, *args) -> None:
+    """
+    logger.debug without importing logging at startup (json and random are imported where used too).
+    If nothing has imported logging, no handler can be listening.
+    """
+    logging = sys.modules.get("logging")
+    if logging is not None:
+        logging.getLogger(__name__).debug(message, *args)
+
+
+# Dense integer ids: cheaper to create and hash than uuid4, unique within the process
+_next_id = itertools.count().__next__
+
+
 class TimeSlot:
+    __slots__ = ("start_time", "end_time", "start_time_seconds", "end_time_seconds", "period")
+
     def __init__(self, start_time: time, end_time: time):
         if not isinstance(start_time, time) or not isinstance(end_time, time):
             raise TypeError("start_time and end_time must be datetime.time objects")
@@ -33,6 +65,9 @@ class TimeSlot:
             raise ValueError(f"Start time {start_time} must be before end time {end_time}")
         self.start_time = start_time
         self.end_time = end_time
+        # Seconds since midnight, for comparisons without datetime.time objects
+        self.start_time_seconds = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+        self.end_time_seconds = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
         self.period = self._get_slot_period()  # Calculate period on initialization
 
     def _get_slot_period(self) -> TimePeriod:
@@ -54,10 +89,12 @@ class TimeSlot:
 
 
 class Group:
+    __slots__ = ("id", "name", "num_students", "size_category")
+
     def __init__(self, name: str, num_students: int):
         if num_students <= 0:
             raise ValueError("Number of students must be positive.")
-        self.id = uuid.uuid4()
+        self.id = _next_id()
         self.name = name
         self.num_students = num_students
         self.size_category = self._get_size_category(num_students)
@@ -76,17 +113,24 @@ class Group:
 
 
 class Auditorium:
+    __slots__ = ("id", "name", "capacity", "day", "time_slot", "size_category", "preferences")
+
+    # One read-only preferences mapping per SizeCategory, shared by every auditorium of that category
+    _shared_preferences: Dict[SizeCategory, Mapping[SizeCategory, Preference]] = {}
+    _shared_preference_ids: Dict[int, SizeCategory] = {}  # id() of each mapping, to spot customised rooms cheaply
+
     def __init__(self, name: str, capacity: int, day: str, time_slot: TimeSlot):
         if capacity <= 0:
             raise ValueError("Capacity must be positive.")
-        self.id = uuid.uuid4()
+        self.id = _next_id()
         self.name = name
         self.capacity = capacity
         self.day = day  # Assuming simple day string for now
         self.time_slot = time_slot
         self.size_category = self._get_size_category(capacity)
-        # Preferences based on how well *group sizes* fit this auditorium's category
-        self.preferences = self._calculate_preferences(self.size_category)
+        # Preferences based on how well *group sizes* fit this auditorium's category.
+        # The mapping is shared per category and read-only: assign a new dict to customise one room.
+        self.preferences = self._preferences_for(self.size_category)
 
     @staticmethod
     def _get_size_category(capacity: int) -> SizeCategory:
@@ -126,6 +170,28 @@ class Auditorium:
 
         return prefs
 
+    @classmethod
+    def _preferences_for(cls, aud_size_category: SizeCategory) -> Mapping[SizeCategory, Preference]:
+        prefs = cls._shared_preferences.get(aud_size_category)
+        if prefs is None:
+            prefs = MappingProxyType(cls._calculate_preferences(aud_size_category))
+            cls._shared_preferences[aud_size_category] = prefs
+            cls._shared_preference_ids[id(prefs)] = aud_size_category
+        return prefs
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in Auditorium.__slots__}
+        shared = Auditorium._shared_preference_ids.get(id(self.preferences))
+        if shared is not None:  # A mappingproxy doesn't pickle: refer to the shared one by category
+            state["preferences"] = shared
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        if isinstance(self.preferences, SizeCategory):
+            self.preferences = self._preferences_for(self.preferences)
+
     def __str__(self) -> str:
         return f"{self.name} (Cap: {self.capacity}, {self.size_category.value}, Day: {self.day}, Slot: {self.time_slot})"
 
@@ -140,25 +206,196 @@ class Auditorium:
         return self.id == other.id
 
 
+class IntervalIndex:
+    """
+    Per-day interval index answering "does [start, end) overlap anything booked that day?" in O(log n).
+
+    Each day keeps its intervals sorted by start, plus a running maximum of end times. Intervals
+    with start < end are a prefix of the sorted list, so one bisect and one lookup decide overlap.
+    Adding or removing an interval costs O(n) for that day (list insert plus running-max update).
+    """
+    __slots__ = ("_days",)
+
+    def __init__(self):
+        # day -> (starts, ends, max_end_so_far), all aligned and sorted by start
+        self._days: Dict[Any, Tuple[List[int], List[int], List[int]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts, _, _ in self._days.values())
+
+    def add(self, day: Any, start: int, end: int) -> None:
+        starts, ends, max_ends = self._days.setdefault(day, ([], [], []))
+        pos = bisect_right(starts, start)
+        starts.insert(pos, start)
+        ends.insert(pos, end)
+        max_ends.insert(pos, 0)
+        self._refresh_max_ends(ends, max_ends, pos)
+
+    def remove(self, day: Any, start: int, end: int) -> None:
+        """Removes one interval equal to [start, end); raises ValueError if absent."""
+        intervals = self._days.get(day)
+        if intervals is not None:
+            starts, ends, max_ends = intervals
+            pos = bisect_left(starts, start)
+            while pos < len(starts) and starts[pos] == start:
+                if ends[pos] == end:
+                    del starts[pos], ends[pos], max_ends[pos]
+                    self._refresh_max_ends(ends, max_ends, pos)
+                    return
+                pos += 1
+        raise ValueError(f"Interval {start}-{end} not booked on {day}")
+
+    def has_bookings(self, day: Any) -> bool:
+        return day in self._days
+
+    def intervals(self) -> Iterable[Tuple[Any, int, int]]:
+        """Every booked (day, start, end), grouped by day and sorted by start."""
+        for day, (starts, ends, _) in self._days.items():
+            yield from ((day, start, end) for start, end in zip(starts, ends))
+
+    def overlaps(self, day: Any, start: int, end: int) -> bool:
+        intervals = self._days.get(day)
+        if intervals is None:
+            return False
+        starts, _, max_ends = intervals
+        k = bisect_left(starts, end)  # Intervals [0, k) start before `end`
+        return k > 0 and max_ends[k - 1] > start
+
+    @staticmethod
+    def _refresh_max_ends(ends: List[int], max_ends: List[int], pos: int) -> None:
+        running = max_ends[pos - 1] if pos > 0 else 0
+        for i in range(pos, len(ends)):
+            running = max(running, ends[i])
+            max_ends[i] = running
+
+
+class Schedule(MutableSequence):
+    """
+    A teacher's list of assigned Auditoriums, with an IntervalIndex kept in sync for conflict checks.
+
+    The Schedule wraps the list it is given rather than copying it, so the caller's own list sees
+    every auditorium the matcher books (as it did when Teacher.schedule was that list).
+    append() and remove() update the index in O(log n) search plus the list shift; any other
+    mutation through the Schedule drops the index, which is rebuilt on the next conflict query.
+    Appending to or removing from the wrapped list directly is noticed by its length changing;
+    replace entries in place through the Schedule, not the wrapped list.
+    """
+    __slots__ = ("_items", "_index", "_indexed_length")
+
+    def __init__(self, auditoriums: Optional[List[Auditorium]] = None):
+        self._items: List[Auditorium] = [] if auditoriums is None else auditoriums
+        self._index: Optional[IntervalIndex] = None
+        self._indexed_length = 0
+
+    def __reduce__(self):
+        return self.__class__, (self._items,)
+
+    def has_conflict(self, auditorium: Auditorium) -> bool:
+        """True if the auditorium's slot overlaps a booked slot on the same day."""
+        items = self._items
+        if self._index is None or self._indexed_length != len(items):
+            if not items:
+                return False
+            self._index = IntervalIndex()
+            for booked in items:
+                self._index.add(booked.day, booked.time_slot.start_time_seconds, booked.time_slot.end_time_seconds)
+            self._indexed_length = len(items)
+        slot = auditorium.time_slot
+        return self._index.overlaps(auditorium.day, slot.start_time_seconds, slot.end_time_seconds)
+
+    def append(self, auditorium: Auditorium) -> None:
+        self._items.append(auditorium)
+        if self._index is not None and self._indexed_length == len(self._items) - 1:
+            self._index.add(auditorium.day, auditorium.time_slot.start_time_seconds,
+                            auditorium.time_slot.end_time_seconds)
+            self._indexed_length += 1
+
+    def remove(self, auditorium: Auditorium) -> None:
+        self._items.remove(auditorium)
+        if self._index is not None and self._indexed_length == len(self._items) + 1:
+            self._index.remove(auditorium.day, auditorium.time_slot.start_time_seconds,
+                               auditorium.time_slot.end_time_seconds)
+            self._indexed_length -= 1
+
+    # --- The rest of the list interface, on the wrapped list ---
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __setitem__(self, i, value) -> None:
+        self._index = None
+        self._items[i] = value
+
+    def __delitem__(self, i) -> None:
+        self._index = None
+        del self._items[i]
+
+    def insert(self, i: int, auditorium: Auditorium) -> None:
+        self._index = None
+        self._items.insert(i, auditorium)
+
+    def clear(self) -> None:
+        self._index = None
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Auditorium]:
+        return iter(self._items)
+
+    def __contains__(self, auditorium) -> bool:
+        return auditorium in self._items
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Schedule):
+            other = other._items
+        return self._items == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Schedule({self._items!r})"
+
+
 class Teacher:
+    __slots__ = ("id", "name", "surname", "full_name", "group", "time_preference", "_schedule")
+
     def __init__(self, name: str, surname: str, group: Group, time_preference: TimePeriod,
                  schedule: Optional[List[Auditorium]] = None):
-        self.id = uuid.uuid4()
+        self.id = _next_id()
         self.name = name
         self.surname = surname
         self.full_name = f"{name} {surname}"
         self.group = group
         self.time_preference = time_preference  # Teacher's preferred TimePeriod
         # Schedule stores assigned Auditoriums (which include TimeSlots)
-        self.schedule: List[Auditorium] = schedule or []
+        self.schedule = schedule
+
+    @property
+    def schedule(self) -> Schedule:
+        return self._schedule
+
+    @schedule.setter
+    def schedule(self, auditoriums: Optional[List[Auditorium]]) -> None:
+        # A plain list is wrapped, not copied: it keeps receiving the auditoriums booked for the teacher
+        self._schedule = auditoriums if isinstance(auditoriums, Schedule) else Schedule(auditoriums)
 
     @staticmethod
-    def calculate_time_preferences(pref: TimePeriod) -> Dict[TimePeriod, Preference]:
-        """ How much a teacher prefers teaching in each time period, based on their main preference. """
+    def calculate_time_preferences(pref: TimePeriod, adjacent_periods: bool = False) -> Dict[TimePeriod, Preference]:
+        """
+        How much a teacher prefers teaching in each time period, based on their main preference.
+        With adjacent_periods, the periods next to the preferred one (e.g. MORNING and AFTERNOON
+        for MIDDAY) are MEDIUM instead of LOW.
+        """
         prefs = {p: Preference.LOW for p in TimePeriod}  # Default to low
         prefs[pref] = Preference.HIGH  # Strong preference for their chosen period
-        # preference for adjacent slots if desired # TODO
-        # Example: If pref is MIDDAY, maybe MORNING/AFTERNOON are MEDIUM?
+        if adjacent_periods:
+            periods = list(TimePeriod)
+            position = periods.index(pref)
+            for neighbour in periods[max(position - 1, 0):position + 2]:
+                if neighbour != pref:
+                    prefs[neighbour] = Preference.MEDIUM
         return prefs
 
     def __str__(self) -> str:
@@ -175,50 +412,128 @@ class Teacher:
 
 # --- Matching Logic Helper Functions ---
 
+# Numerical scores used by get_teacher_preference_score (time is weighted above size fit)
+TIME_PREFERENCE_SCORES: Dict[Preference, float] = {Preference.HIGH: 3, Preference.MEDIUM: 1, Preference.LOW: 0}
+SIZE_FIT_SCORES: Dict[Preference, float] = {Preference.HIGH: 1.0, Preference.MEDIUM: 0.5, Preference.LOW: 0}
+
+
+class ScoreTable:
+    """
+    The weights behind get_teacher_preference_score, precomputed into lookup tables.
+
+    A score is time_weights[teacher's preference for the slot period] + size_weights[auditorium's
+    preference for the group size category]. Both only depend on enums, so every combination of
+    (teacher time_preference, slot period, group size category, auditorium size category) is
+    computed once into `scores`, and scoring a pair is a capacity check plus one dict read.
+    Auditoriums with customised preferences dicts fall back to the time and size tables.
+
+    adjacent_periods gives MEDIUM time preference to the periods next to the preferred one
+    (see Teacher.calculate_time_preferences).
+    """
+    __slots__ = ("name", "time_weights", "size_weights", "adjacent_periods", "time_table", "scores")
+
+    def __init__(
+            self,
+            name: str,
+            time_weights: Optional[Dict[Preference, float]] = None,
+            size_weights: Optional[Dict[Preference, float]] = None,
+            adjacent_periods: bool = False
+    ):
+        self.name = name
+        self.time_weights = dict(TIME_PREFERENCE_SCORES if time_weights is None else time_weights)
+        self.size_weights = dict(SIZE_FIT_SCORES if size_weights is None else size_weights)
+        self.adjacent_periods = adjacent_periods
+        # [teacher time_preference index][slot period index] -> time score
+        self.time_table: Tuple[Tuple[float, ...], ...] = tuple(
+            tuple(self.time_weights[Teacher.calculate_time_preferences(preferred, adjacent_periods)
+                                    .get(period, Preference.LOW)] for period in TimePeriod)
+            for preferred in TimePeriod
+        )
+        # (time_preference, period, group size category, auditorium size category) -> score
+        self.scores: Dict[Tuple[TimePeriod, TimePeriod, SizeCategory, SizeCategory], float] = {
+            (preferred, period, group_category, auditorium_category):
+                self.time_table[i][j] + self.size_weights[
+                    Auditorium._preferences_for(auditorium_category).get(group_category, Preference.LOW)]
+            for i, preferred in enumerate(TimePeriod)
+            for j, period in enumerate(TimePeriod)
+            for group_category in SizeCategory
+            for auditorium_category in SizeCategory
+        }
+
+    def score(self, teacher: Teacher, auditorium: Auditorium) -> float:
+        """get_teacher_preference_score with these weights."""
+        group = teacher.group
+        if group.num_students > auditorium.capacity:
+            return -1.0
+        if id(auditorium.preferences) in Auditorium._shared_preference_ids:
+            return self.scores[teacher.time_preference, auditorium.time_slot.period, group.size_category,
+                               auditorium.size_category]
+        time_score = self.time_table[PERIOD_INDEX[teacher.time_preference]][PERIOD_INDEX[auditorium.time_slot.period]]
+        return time_score + self.size_weights[auditorium.preferences.get(group.size_category, Preference.LOW)]
+
+    def key(self) -> Tuple:
+        """Identifies the weights, e.g. for caches: equal keys give equal scores."""
+        return (self.time_table, tuple(sorted((pref.value, weight) for pref, weight in self.size_weights.items())))
+
+    def __reduce__(self):
+        return ScoreTable, (self.name, self.time_weights, self.size_weights, self.adjacent_periods)
+
+
+_score_tables: Dict[str, ScoreTable] = {}
+_default_score_table: Optional[ScoreTable] = None
+
+
+def register_score_table(table: ScoreTable, make_default: bool = False) -> ScoreTable:
+    """Makes `table` available by name (replacing a table of the same name), optionally as the default."""
+    global _default_score_table
+    _score_tables[table.name] = table
+    if make_default or _default_score_table is None or _default_score_table.name == table.name:
+        _default_score_table = table
+    return table
+
+
+def get_score_table(table: Union[str, ScoreTable, None] = None) -> ScoreTable:
+    """A registered table by name, the table itself, or the default table for None."""
+    if table is None:
+        return _default_score_table
+    if isinstance(table, ScoreTable):
+        return table
+    try:
+        return _score_tables[table]
+    except KeyError:
+        raise KeyError(f"Unknown score table {table!r}; registered: {sorted(_score_tables)}") from None
+
+
+def unregister_score_table(name: str) -> ScoreTable:
+    """Removes and returns a registered table; the current default can't be removed."""
+    table = get_score_table(name)
+    if table is _default_score_table:
+        raise ValueError(f"Score table {name!r} is the default; set another default before unregistering it")
+    return _score_tables.pop(name)
+
+
+def set_default_score_table(table: Union[str, ScoreTable]) -> None:
+    """Uses `table` wherever no score_table is passed explicitly."""
+    register_score_table(get_score_table(table), make_default=True)
+
+
 def is_schedule_conflict(teacher: Teacher, auditorium: Auditorium) -> bool:
     """Checks if assigning the auditorium conflicts with the teacher's existing schedule."""
-    for assigned_aud in teacher.schedule:
-        if assigned_aud.day == auditorium.day and assigned_aud.time_slot.overlaps(auditorium.time_slot):
-            return True
-    return False
+    return teacher.schedule.has_conflict(auditorium)
 
 
-def get_teacher_preference_score(teacher: Teacher, auditorium: Auditorium) -> float:
+def get_teacher_preference_score(teacher: Teacher, auditorium: Auditorium,
+                                 score_table: Union[str, ScoreTable, None] = None) -> float:
     """
     Calculates a score representing how much a teacher prefers an auditorium.
     Higher score means higher preference.
     Returns -1.0 if the teacher's group doesn't fit.
+
+    The score is time preference (primary) plus size fit (secondary), looked up in a precomputed
+    ScoreTable (default: the registered default table, see register_score_table).
     """
-    # CRITICAL: Teacher must fit in the auditorium
-    if teacher.group.num_students > auditorium.capacity:
-        return -1.0  # Impossible match, lowest score
-
-    # 1. Time Preference Score (Primary)
-    auditorium_period = auditorium.time_slot.period
-    time_match_preference = Teacher.calculate_time_preferences(teacher.time_preference).get(auditorium_period,
-                                                                                            Preference.LOW)
-
-    # Convert Preference enum to a numerical score (e.g., HIGH=3, MEDIUM=1, LOW=0)
-    time_score = 0
-    if time_match_preference == Preference.HIGH:
-        time_score = 3
-    elif time_match_preference == Preference.MEDIUM:
-        time_score = 1
-    # LOW gives time_score = 0
-
-    # 2. Size Fit Score (Secondary) - How well the group fits the auditorium
-    # Using the auditorium's preference for the teacher's group size category
-    size_match_preference = auditorium.preferences.get(teacher.group.size_category, Preference.LOW)
-    size_score = 0
-    if size_match_preference == Preference.HIGH:
-        size_score = 1.0
-    elif size_match_preference == Preference.MEDIUM:
-        size_score = 0.5
-    # LOW gives size_score = 0
-
-    # Combine scores (prioritizing time)
-    # Adjust weighting as needed
-    return time_score + size_score
+    table = _default_score_table if score_table is None else get_score_table(score_table)
+    return table.score(teacher, auditorium)
 
 
 def is_teacher_better_match(
@@ -261,91 +576,1570 @@ def is_teacher_better_match(
         # return False
 
 
+# --- Compact Problem Representation ---
+
+PERIODS: List[TimePeriod] = list(TimePeriod)
+SIZE_CATEGORIES: List[SizeCategory] = list(SizeCategory)
+PERIOD_INDEX: Dict[TimePeriod, int] = {period: i for i, period in enumerate(PERIODS)}
+SIZE_CATEGORY_INDEX: Dict[SizeCategory, int] = {category: i for i, category in enumerate(SIZE_CATEGORIES)}
+
+NO_MATCH = -1  # Marks a free teacher or auditorium in index-based results
+
+register_score_table(ScoreTable("default"))
+register_score_table(ScoreTable("adjacent_periods", adjacent_periods=True))
+
+
+class ProblemSet:
+    """
+    Struct-of-arrays form of a matching problem.
+
+    Teachers and auditoriums get dense integer ids (their position) and the fields the matcher
+    reads are stored in parallel arrays. Auditoriums point at a shared preference table row instead
+    of each holding a dict, so at most one row exists per distinct preferences dict. The original
+    objects stay available through teacher(i) and auditorium(j).
+
+    Rows can also be added as plain columns (add_teacher_columns / add_auditorium_columns, used by
+    loader.py), in which case the objects are only built, by the factories given to
+    set_view_factories, the first time teacher(i) or auditorium(j) asks for them.
+    """
+    __slots__ = (
+        "teacher_names", "group_size", "group_category", "time_preference", "bookings", "group",
+        "capacity", "size_category", "period", "day", "start", "end", "preference_row",
+        "preference_tables", "size_scores", "day_names", "score_table", "score_key",
+        "_score_rows", "_day_index", "_group_index", "_preference_row_index", "_teachers", "_auditoriums", "_auditorium_index",
+        "_teacher_factory", "_auditorium_factory",
+    )
+
+    def __init__(self, score_table: Union[str, ScoreTable, None] = None):
+        # Teacher columns
+        self.teacher_names: List[str] = []
+        self.group_size = array("i")
+        self.group_category = array("b")  # Index into SIZE_CATEGORIES
+        self.time_preference = array("b")  # Index into PERIODS
+        self.bookings: List[Optional[IntervalIndex]] = []  # Existing schedule by day index, None if empty
+        self.group = array("i")  # Student group code: teachers of the same Group share it (see group_code)
+        # Auditorium columns
+        self.capacity = array("i")
+        self.size_category = array("b")
+        self.period = array("b")
+        self.day = array("i")  # Index into day_names
+        self.start = array("i")  # Seconds since midnight
+        self.end = array("i")
+        self.preference_row = array("i")  # Index into preference_tables / size_scores
+        self.score_key = array("i")  # preference_row * len(PERIODS) + period: position in a score_row
+        # Shared tables
+        self.preference_tables: List[Tuple[int, ...]] = []  # Preference.value per group size category
+        self.size_scores: List[Tuple[float, ...]] = []  # Size weight per group size category
+        self.score_table = get_score_table(score_table)
+        self._score_rows: Dict[int, List[float]] = {}  # See score_row
+        self.day_names: List[str] = []
+        self._day_index: Dict[str, int] = {}
+        self._group_index: Dict[Any, int] = {}
+        self._preference_row_index: Dict[Tuple[Preference, ...], int] = {}
+        self._teachers: List[Optional[Teacher]] = []  # None until a column-only row's view is built
+        self._auditoriums: List[Optional[Auditorium]] = []
+        self._auditorium_index: Dict[Auditorium, int] = {}
+        self._teacher_factory: Optional[Callable[[int], Teacher]] = None
+        self._auditorium_factory: Optional[Callable[[int], Auditorium]] = None
+
+    def __getstate__(self):
+        # Pickle the arrays only: object views stay in the parent process (see auditorium()/teacher())
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["_teachers"], state["_auditoriums"], state["_auditorium_index"] = [], [], {}
+        state["_teacher_factory"] = state["_auditorium_factory"] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_objects(cls, teachers: Dict[str, Teacher], auditoriums: List[Auditorium],
+                     score_table: Union[str, ScoreTable, None] = None) -> 'ProblemSet':
+        """Builds the arrays from the usual teachers dict and auditorium list (duplicates are kept once)."""
+        problem = cls(score_table)
+        for aud in auditoriums:
+            problem.add_auditorium(aud)
+        for name, teacher in teachers.items():
+            problem.add_teacher(name, teacher)
+        return problem
+
+    def auditoriums_only(self) -> 'ProblemSet':
+        """
+        A new ProblemSet with this one's auditoriums and no teachers. The columns and tables are
+        copied, so several teacher sets can be added to copies of one auditorium inventory without
+        re-adding the auditoriums; auditorium views already built are shared.
+        """
+        copy = ProblemSet(self.score_table)
+        for name in ("capacity", "size_category", "period", "day", "start", "end", "preference_row", "score_key"):
+            setattr(copy, name, getattr(self, name)[:])
+        copy.preference_tables, copy.size_scores = list(self.preference_tables), list(self.size_scores)
+        copy._preference_row_index, copy._score_rows = dict(self._preference_row_index), dict(self._score_rows)
+        copy.day_names, copy._day_index = list(self.day_names), dict(self._day_index)
+        copy._auditoriums, copy._auditorium_index = list(self._auditoriums), dict(self._auditorium_index)
+        copy._auditorium_factory = self._auditorium_factory
+        return copy
+
+    def teacher_variant(self) -> 'ProblemSet':
+        """
+        A ProblemSet sharing this one's auditorium columns, tables and object views, with its own
+        copy of the teacher columns: teachers can be edited with set_teacher_columns (e.g. for a
+        what-if run) without touching this one. Don't add auditoriums to either afterwards.
+        """
+        variant = ProblemSet.__new__(ProblemSet)
+        for name in self.__slots__:
+            setattr(variant, name, getattr(self, name))
+        variant.group_size, variant.group_category = self.group_size[:], self.group_category[:]
+        variant.time_preference, variant.bookings = self.time_preference[:], list(self.bookings)
+        return variant
+
+    def set_teacher_columns(self, t: int, group_size: Optional[int] = None,
+                            time_preference: Optional[TimePeriod] = None) -> None:
+        """Changes teacher t's group size and/or time preference in the columns only (no Teacher view)."""
+        if group_size is not None:
+            if group_size <= 0:
+                raise ValueError("Number of students must be positive.")
+            self.group_size[t] = group_size
+            self.group_category[t] = SIZE_CATEGORY_INDEX[Group._get_size_category(group_size)]
+        if time_preference is not None:
+            self.time_preference[t] = PERIOD_INDEX[time_preference]
+
+    @property
+    def num_teachers(self) -> int:
+        return len(self.teacher_names)
+
+    @property
+    def num_auditoriums(self) -> int:
+        return len(self.capacity)
+
+    def day_code(self, day: str) -> int:
+        code = self._day_index.get(day)
+        if code is None:
+            code = self._day_index[day] = len(self.day_names)
+            self.day_names.append(day)
+        return code
+
+    def group_code(self, key: Any) -> int:
+        """The code of the student group identified by `key`, assigned on first use like day_code."""
+        code = self._group_index.get(key)
+        if code is None:
+            code = self._group_index[key] = len(self._group_index)
+        return code
+
+    def add_teacher(self, name: str, teacher: Teacher) -> int:
+        self.teacher_names.append(name)
+        self.group_size.append(0)
+        self.group_category.append(0)
+        self.time_preference.append(0)
+        self.bookings.append(None)
+        self.group.append(0)
+        self._teachers.append(teacher)
+        t = len(self.teacher_names) - 1
+        self.set_teacher(t, teacher)
+        return t
+
+    def set_teacher(self, t: int, teacher: Teacher) -> None:
+        """(Re)writes teacher t's columns, e.g. after their group, time preference or schedule changed."""
+        self.group_size[t] = teacher.group.num_students
+        self.group_category[t] = SIZE_CATEGORY_INDEX[teacher.group.size_category]
+        self.group[t] = self.group_code(("Group", teacher.group.id))
+        self.time_preference[t] = PERIOD_INDEX[teacher.time_preference]
+        bookings = None
+        if teacher.schedule:
+            bookings = IntervalIndex()
+            for booked in teacher.schedule:
+                bookings.add(self.day_code(booked.day), booked.time_slot.start_time_seconds,
+                             booked.time_slot.end_time_seconds)
+        self.bookings[t] = bookings
+        self._teachers[t] = teacher
+
+    def add_auditorium(self, auditorium: Auditorium) -> int:
+        index = self._auditorium_index.get(auditorium)
+        if index is not None:
+            return index
+        self.capacity.append(0)
+        self.size_category.append(0)
+        self.period.append(0)
+        self.day.append(0)
+        self.start.append(0)
+        self.end.append(0)
+        self.preference_row.append(0)
+        self.score_key.append(0)
+        self._auditoriums.append(auditorium)
+        index = len(self.capacity) - 1
+        self.set_auditorium(index, auditorium)
+        return index
+
+    def set_auditorium(self, a: int, auditorium: Auditorium) -> None:
+        """(Re)writes auditorium a's columns, e.g. after its capacity or time slot changed."""
+        self.capacity[a] = auditorium.capacity
+        self.size_category[a] = SIZE_CATEGORY_INDEX[auditorium.size_category]
+        self.period[a] = PERIOD_INDEX[auditorium.time_slot.period]
+        self.day[a] = self.day_code(auditorium.day)
+        self.start[a] = auditorium.time_slot.start_time_seconds
+        self.end[a] = auditorium.time_slot.end_time_seconds
+        self.preference_row[a] = self._preference_row(auditorium.preferences)
+        self.score_key[a] = self.preference_row[a] * len(PERIODS) + self.period[a]
+        previous = self._auditoriums[a]
+        if previous is not None and self._auditorium_index.get(previous) == a:
+            del self._auditorium_index[previous]
+        self._auditoriums[a] = auditorium
+        self._auditorium_index[auditorium] = a
+
+    def _preference_row(self, preferences: Mapping[SizeCategory, Preference]) -> int:
+        prefs = tuple(preferences.get(cat, Preference.LOW) for cat in SIZE_CATEGORIES)
+        row = self._preference_row_index.get(prefs)
+        if row is None:
+            row = self._preference_row_index[prefs] = len(self.preference_tables)
+            self.preference_tables.append(tuple(pref.value for pref in prefs))
+            self.size_scores.append(tuple(self.score_table.size_weights[pref] for pref in prefs))
+            self._score_rows.clear()
+        return row
+
+    # --- Column-only rows ---
+
+    def add_teacher_columns(self, name: str, group_size: int, time_preference: TimePeriod,
+                            bookings: Optional[IntervalIndex] = None, group: Any = None) -> int:
+        """
+        Adds a teacher without a Teacher object. bookings is keyed by day_code(day) and is only
+        read, so rows with the same existing schedule may share one IntervalIndex. Rows with the
+        same (hashable) group key teach the same student group; by default the group is the
+        teacher's own.
+        """
+        if group_size <= 0:
+            raise ValueError("Number of students must be positive.")
+        self.group.append(self.group_code(("Teacher", len(self.teacher_names)) if group is None else group))
+        self.teacher_names.append(name)
+        self.group_size.append(group_size)
+        self.group_category.append(SIZE_CATEGORY_INDEX[Group._get_size_category(group_size)])
+        self.time_preference.append(PERIOD_INDEX[time_preference])
+        self.bookings.append(bookings)
+        self._teachers.append(None)
+        return len(self.teacher_names) - 1
+
+    def add_auditorium_columns(self, capacity: int, day: str, time_slot: TimeSlot) -> int:
+        """Adds an auditorium without an Auditorium object; it gets the default preferences for its size."""
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive.")
+        category = Auditorium._get_size_category(capacity)
+        self.capacity.append(capacity)
+        self.size_category.append(SIZE_CATEGORY_INDEX[category])
+        self.period.append(PERIOD_INDEX[time_slot.period])
+        self.day.append(self.day_code(day))
+        self.start.append(time_slot.start_time_seconds)
+        self.end.append(time_slot.end_time_seconds)
+        self.preference_row.append(self._preference_row(Auditorium._preferences_for(category)))
+        self.score_key.append(self.preference_row[-1] * len(PERIODS) + self.period[-1])
+        self._auditoriums.append(None)
+        return len(self.capacity) - 1
+
+    def add_auditorium_slots(self, capacity: int, slots: Iterable[Tuple[str, TimeSlot]]) -> range:
+        """
+        add_auditorium_columns for one room bookable in several (day, TimeSlot)s: the columns that
+        only depend on the room are computed once. Returns the range of the new auditorium indices.
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive.")
+        category = Auditorium._get_size_category(capacity)
+        size_category = SIZE_CATEGORY_INDEX[category]
+        preference_row = self._preference_row(Auditorium._preferences_for(category))
+        first = len(self.capacity)
+        day_code = self.day_code
+        for day, time_slot in slots:
+            period = PERIOD_INDEX[time_slot.period]
+            self.capacity.append(capacity)
+            self.size_category.append(size_category)
+            self.period.append(period)
+            self.day.append(day_code(day))
+            self.start.append(time_slot.start_time_seconds)
+            self.end.append(time_slot.end_time_seconds)
+            self.preference_row.append(preference_row)
+            self.score_key.append(preference_row * len(PERIODS) + period)
+            self._auditoriums.append(None)
+        return range(first, len(self.capacity))
+
+    def set_view_factories(self, teacher_factory: Optional[Callable[[int], Teacher]] = None,
+                           auditorium_factory: Optional[Callable[[int], Auditorium]] = None) -> None:
+        """Callables building the object for a column-only row index on first access."""
+        self._teacher_factory = teacher_factory
+        self._auditorium_factory = auditorium_factory
+
+    # --- Object views ---
+
+    def teacher(self, t: int) -> Teacher:
+        teacher = self._teachers[t]
+        if teacher is None:
+            if self._teacher_factory is None:
+                raise LookupError(f"Teacher {t} was added as columns only and has no view factory")
+            teacher = self._teachers[t] = self._teacher_factory(t)
+        return teacher
+
+    def auditorium(self, a: int) -> Auditorium:
+        auditorium = self._auditoriums[a]
+        if auditorium is None:
+            if self._auditorium_factory is None:
+                raise LookupError(f"Auditorium {a} was added as columns only and has no view factory")
+            auditorium = self._auditoriums[a] = self._auditorium_factory(a)
+            self._auditorium_index[auditorium] = a
+        return auditorium
+
+    def auditorium_index(self, auditorium: Auditorium) -> int:
+        return self._auditorium_index[auditorium]
+
+    # --- Index-based equivalents of the helper functions ---
+
+    def conflicts(self, t: int, a: int) -> bool:
+        """is_schedule_conflict against the teacher's schedule as it was when added."""
+        bookings = self.bookings[t]
+        return bookings is not None and bookings.overlaps(self.day[a], self.start[a], self.end[a])
+
+    def score(self, t: int, a: int) -> float:
+        """get_teacher_preference_score on indices."""
+        if self.group_size[t] > self.capacity[a]:
+            return -1.0
+        return self.score_row(t)[self.score_key[a]]
+
+    def score_row(self, t: int) -> List[float]:
+        """
+        Teacher t's score against each score_key (capacity not checked). Teachers with the same
+        time preference and group size category share a row, so scoring a pair is one indexed read.
+        """
+        key = self.time_preference[t] * len(SIZE_CATEGORIES) + self.group_category[t]
+        row = self._score_rows.get(key)
+        if row is None:
+            time_scores, category = self.score_table.time_table[self.time_preference[t]], self.group_category[t]
+            row = self._score_rows[key] = [size_scores[category] + time_score
+                                           for size_scores in self.size_scores for time_score in time_scores]
+        return row
+
+    def prefers(self, a: int, new_t: int, current_t: int) -> bool:
+        """is_teacher_better_match on indices: does auditorium a prefer new_t over current_t?"""
+        capacity = self.capacity[a]
+        if self.group_size[new_t] > capacity:
+            return False
+        fits = self.preference_tables[self.preference_row[a]]
+        new_fit, current_fit = fits[self.group_category[new_t]], fits[self.group_category[current_t]]
+        if new_fit != current_fit:
+            return new_fit > current_fit
+        if self.group_size[current_t] > capacity:
+            return True
+        return self.group_size[new_t] > self.group_size[current_t]  # Closer to capacity wins
+
+    def rank_auditoriums(self, t: int) -> List[int]:
+        """Index form of build_teacher_preference_lists for one teacher."""
+        return self.sort_candidates(t, self.candidate_auditoriums(t))
+
+    def candidate_auditoriums(self, t: int) -> List[int]:
+        """Auditoriums teacher t could propose to: the group fits and there is no schedule conflict."""
+        size, capacity, bookings = self.group_size[t], self.capacity, self.bookings[t]
+        if bookings is None:
+            return [a for a in range(len(capacity)) if size <= capacity[a]]
+        day, start, end = self.day, self.start, self.end
+        return [a for a in range(len(capacity)) if size <= capacity[a] and not bookings.overlaps(day[a], start[a], end[a])]
+
+    def sort_candidates(self, t: int, candidates: List[int]) -> List[int]:
+        """Orders candidates by teacher t's score (highest first); equal scores keep their order."""
+        scores, score_key = self.score_row(t), self.score_key
+        scored = [(scores[score_key[a]], a) for a in candidates]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [a for _, a in scored]
+
+
+class LazyRanking:
+    """
+    A ranked list that is filled from an iterator of chunks only as far as it is read.
+
+    Indexing past the materialized part pulls more chunks; IndexError means the ranking is
+    exhausted. Iteration materializes everything, and so does len() unless `count` is given: a
+    callable returning the full length without producing the entries.
+    """
+    __slots__ = ("_items", "_chunks", "_count")
+
+    def __init__(self, chunks: Iterator[List[int]], count: Optional[Callable[[], int]] = None):
+        self._items: List[int] = []
+        self._chunks: Optional[Iterator[List[int]]] = chunks
+        self._count: Union[Callable[[], int], int, None] = count
+
+    def __getitem__(self, position: int) -> int:
+        items = self._items
+        while position >= len(items) and self._chunks is not None:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._chunks = None
+            else:
+                items.extend(chunk)
+        return items[position]
+
+    def __len__(self) -> int:
+        if self._chunks is None:
+            return len(self._items)
+        if self._count is None:
+            self._materialize()
+            return len(self._items)
+        if callable(self._count):
+            self._count = self._count()  # The length never changes, so count once
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        if self._chunks is not None:
+            self._materialize()
+        return iter(self._items)
+
+    def _materialize(self) -> None:
+        for chunk in self._chunks:
+            self._items.extend(chunk)
+        self._chunks = None
+
+    @property
+    def materialized(self) -> int:
+        """How many entries have been produced so far."""
+        return len(self._items)
+
+
+class CandidateIndex:
+    """
+    Auditoriums of a ProblemSet bucketed by (period, preference row, day), each bucket sorted by capacity.
+
+    A teacher's score for an auditorium only depends on its period and preference row, so whole
+    buckets share a score. candidates(t) walks the buckets from the highest score down; in each
+    bucket the rooms the group fits in are a suffix found by bisecting the capacities, and
+    schedule conflicts are only checked in buckets on a day the teacher has bookings. Each score
+    level is sorted by auditorium index, so the order is exactly problem.rank_auditoriums(t), but
+    it is produced lazily: a teacher who is accepted by their first choice never ranks the rest.
+
+    The index is a snapshot: build a new one after adding or changing auditoriums.
+    """
+    __slots__ = ("problem", "_buckets", "_levels")
+
+    def __init__(self, problem: ProblemSet):
+        self.problem = problem
+        grouped: Dict[Tuple[int, int, int], List[Tuple[int, int]]] = {}
+        for a in range(problem.num_auditoriums):
+            key = (problem.period[a], problem.preference_row[a], problem.day[a])
+            grouped.setdefault(key, []).append((problem.capacity[a], a))
+        # (score key, day, capacities ascending, auditorium indices aligned with capacities)
+        self._buckets: List[Tuple[int, int, List[int], List[int]]] = []
+        for (period, row, day), rooms in grouped.items():
+            rooms.sort()
+            self._buckets.append((row * len(PERIODS) + period, day, [c for c, _ in rooms], [a for _, a in rooms]))
+        self._levels: Dict[int, List[List[int]]] = {}  # Cached bucket levels per score_row
+
+    def for_problem(self, problem: ProblemSet) -> 'CandidateIndex':
+        """
+        This index bound to another ProblemSet with the same auditoriums (e.g. from
+        auditoriums_only()): the buckets and cached score levels are shared, not rebuilt.
+        """
+        index = CandidateIndex.__new__(CandidateIndex)
+        index.problem, index._buckets, index._levels = problem, self._buckets, self._levels
+        return index
+
+    def _score_levels(self, t: int) -> List[List[int]]:
+        """Bucket numbers grouped by teacher t's score for them, highest score first."""
+        problem = self.problem
+        key = problem.time_preference[t] * len(SIZE_CATEGORIES) + problem.group_category[t]
+        levels = self._levels.get(key)
+        if levels is None:
+            scores = problem.score_row(t)
+            by_score: Dict[float, List[int]] = {}
+            for b, (score_key, _, _, _) in enumerate(self._buckets):
+                by_score.setdefault(scores[score_key], []).append(b)
+            levels = self._levels[key] = [by_score[score] for score in sorted(by_score, reverse=True)]
+        return levels
+
+    def candidate_levels(self, t: int) -> Iterator[List[int]]:
+        """Teacher t's feasible auditoriums, one list per score level, highest score first."""
+        problem = self.problem
+        size, bookings = problem.group_size[t], problem.bookings[t]
+        start, end = problem.start, problem.end
+        for level in self._score_levels(t):
+            found: List[int] = []
+            for b in level:
+                _, day, capacities, rooms = self._buckets[b]
+                fitting = rooms[bisect_left(capacities, size):]
+                if bookings is not None and bookings.has_bookings(day):
+                    fitting = [a for a in fitting if not bookings.overlaps(day, start[a], end[a])]
+                found.extend(fitting)
+            if found:
+                found.sort()  # Ties keep index order, like rank_auditoriums
+                yield found
+
+    def candidates(self, t: int) -> Iterator[int]:
+        """Teacher t's feasible auditoriums in descending score order, generated lazily."""
+        for level in self.candidate_levels(t):
+            yield from level
+
+    def count(self, t: int) -> int:
+        """
+        How many auditoriums candidates(t) yields, without ranking them: a bisect per bucket, plus
+        an overlap check per fitting room on the days the teacher has bookings.
+        """
+        problem = self.problem
+        size, bookings = problem.group_size[t], problem.bookings[t]
+        start, end = problem.start, problem.end
+        total = 0
+        for _, day, capacities, rooms in self._buckets:
+            first = bisect_left(capacities, size)
+            if bookings is not None and bookings.has_bookings(day):
+                total += sum(1 for a in rooms[first:] if not bookings.overlaps(day, start[a], end[a]))
+            else:
+                total += len(rooms) - first
+        return total
+
+    def ranked(self, t: int) -> LazyRanking:
+        """
+        A lazily filled ranked list for teacher t, usable wherever rank_auditoriums(t) is. Its len()
+        is count(t), so sorting teachers by list length doesn't rank them.
+        """
+        return LazyRanking(self.candidate_levels(t), partial(self.count, t))
+
+
+def build_teacher_preference_lists(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        score_table: Union[str, ScoreTable, None] = None
+) -> Dict[str, List[Auditorium]]:
+    """
+    Ranks, once per teacher, every auditorium the teacher could propose to.
+
+    An auditorium is listed if the teacher's group fits and it does not conflict with the
+    teacher's existing schedule. Lists are ordered by get_teacher_preference_score (highest first);
+    equal scores keep the order of the auditoriums list. Duplicate auditoriums are listed once.
+    """
+    table = get_score_table(score_table)
+    preference_lists: Dict[str, List[Auditorium]] = {}
+    for teacher_name, teacher in teachers.items():
+        seen: Set[Auditorium] = set()
+        possible_auditoriums = []
+        for aud in auditoriums:
+            if aud in seen:
+                continue
+            seen.add(aud)
+            if teacher.group.num_students <= aud.capacity and not is_schedule_conflict(teacher, aud):
+                score = table.score(teacher, aud)
+                if score >= 0:  # Only consider valid matches (score >= 0)
+                    possible_auditoriums.append((score, aud))
+        # Stable sort: ties keep the auditoriums list order
+        possible_auditoriums.sort(key=lambda x: x[0], reverse=True)
+        preference_lists[teacher_name] = [aud for _, aud in possible_auditoriums]
+    return preference_lists
+
+
 # --- Gale-Shapley Algorithm Implementation ---
 
+class MatchingStats:
+    """Counters accumulated by matching runs."""
+    __slots__ = ("proposals", "rejections", "displacements", "group_clashes")
+
+    def __init__(self):
+        self.proposals = 0  # Every proposal made, accepted or not
+        self.rejections = 0  # Proposals the auditorium turned down
+        self.displacements = 0  # Accepted proposals that freed another teacher
+        self.group_clashes = 0  # Auditoriums skipped because the student group was booked then (see GroupBookings)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in MatchingStats.__slots__}
+
+    def __str__(self) -> str:
+        return ", ".join(f"{name}={value}" for name, value in MatchingStats.as_dict(self).items())
+
+
+class MatchingMetrics(MatchingStats):
+    """
+    MatchingStats plus per-phase timers, ranked list lengths and an optional proposal trace.
+
+    Pass it wherever a `stats=` argument is accepted. Phases are timed with time.perf_counter and
+    accumulate over runs: "build" (ProblemSet), "index" (CandidateIndex), "proposals" (including
+    the lazy ranking done while proposing) and "apply" (writing schedules). With
+    profile_ranking=True ranked lists are built eagerly instead, and "index" is replaced by
+    "conflicts" (capacity and schedule conflict filtering) and "scoring" (scoring and sorting the
+    candidates). Ranked list lengths count the entries actually produced. With trace=True every
+    proposal of a one-auditorium-per-teacher run is recorded as a dict with the step, teacher,
+    auditorium index and outcome ("accepted", "rejected", "displaced" for the teacher who lost
+    the auditorium, or "group_clash" for an auditorium skipped because the teacher's group was
+    booked at that time); on_event, if given, is called with each record as it happens.
+
+    Plain MatchingStats (or no stats) skip all of this, and an untraced run uses the plain proposal
+    loop, so timers cost a few perf_counter calls per run and nothing per proposal.
+    """
+    __slots__ = ("timings", "runs", "ranked_lists", "ranked_entries", "ranked_min", "ranked_max", "trace",
+                 "on_event", "profile_ranking")
+
+    def __init__(self, trace: bool = False, on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 profile_ranking: bool = False):
+        super().__init__()
+        self.profile_ranking = profile_ranking
+        self.timings: Dict[str, float] = {}
+        self.runs = 0
+        self.ranked_lists = 0  # Ranked lists seen, with their total, shortest and longest length
+        self.ranked_entries = 0
+        self.ranked_min: Optional[int] = None
+        self.ranked_max: Optional[int] = None
+        self.trace: Optional[List[Dict[str, Any]]] = [] if trace else None
+        self.on_event = on_event
+
+    def timer(self, phase: str) -> "_PhaseTimer":
+        """Context manager adding the elapsed time of its block to timings[phase]."""
+        return _PhaseTimer(self.timings, phase)
+
+    def record_ranked(self, ranked: List[List[int]]) -> None:
+        """Adds the lengths of `ranked` (for a LazyRanking: the part produced so far)."""
+        if not ranked:
+            return
+        lengths = [r.materialized if isinstance(r, LazyRanking) else len(r) for r in ranked]
+        self.ranked_lists += len(lengths)
+        self.ranked_entries += sum(lengths)
+        shortest, longest = min(lengths), max(lengths)
+        self.ranked_min = shortest if self.ranked_min is None else min(self.ranked_min, shortest)
+        self.ranked_max = longest if self.ranked_max is None else max(self.ranked_max, longest)
+
+    def recorder(self, problem: ProblemSet) -> Optional[Callable[[int, int, str], None]]:
+        """The per-proposal hook for a run on `problem`, or None when nothing is recorded."""
+        if self.trace is None and self.on_event is None:
+            return None
+        trace, on_event, names = self.trace, self.on_event, problem.teacher_names
+
+        def record(t: int, a: int, outcome: str) -> None:
+            event = {"step": self.proposals, "teacher": names[t], "auditorium": a, "outcome": outcome}
+            if trace is not None:
+                trace.append(event)
+            if on_event is not None:
+                on_event(event)
+
+        return record
+
+    def teacher_trace(self, name: str) -> List[Dict[str, Any]]:
+        """The recorded proposals made by (or taken from) one teacher, in order."""
+        return [event for event in self.trace or () if event["teacher"] == name]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **super().as_dict(),
+            "runs": self.runs,
+            "timings": dict(self.timings),
+            "ranked_lists": self.ranked_lists,
+            "ranked_entries": self.ranked_entries,
+            "ranked_min": self.ranked_min,
+            "ranked_max": self.ranked_max,
+            "ranked_mean": self.ranked_entries / self.ranked_lists if self.ranked_lists else 0.0,
+        }
+
+    def __str__(self) -> str:
+        counts = super().__str__()
+        timings = ", ".join(f"{phase}={seconds:.3f}s" for phase, seconds in self.timings.items())
+        return f"{counts}; {timings}" if timings else counts
+
+    def write_json_lines(self, output: IO[str]) -> None:
+        """Writes a "summary" line, then one "proposal" line per trace record."""
+        import json
+
+        output.write(json.dumps({"type": "summary", **self.as_dict()}) + "\n")
+        for event in self.trace or ():
+            output.write(json.dumps({"type": "proposal", **event}) + "\n")
+
+
+class _PhaseTimer:
+    __slots__ = ("timings", "phase", "start")
+
+    def __init__(self, timings: Dict[str, float], phase: str):
+        self.timings, self.phase = timings, phase
+
+    def __enter__(self):
+        self.start = timer.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timings[self.phase] = self.timings.get(self.phase, 0.0) + timer.perf_counter() - self.start
+
+
+def _phase(stats: Optional[MatchingStats], phase: str):
+    """Times `phase` into stats when it is a MatchingMetrics, otherwise does nothing."""
+    return stats.timer(phase) if isinstance(stats, MatchingMetrics) else nullcontext()
+
+
+def rank_all(problem: ProblemSet, stats: Optional[MatchingStats] = None) -> List[List[int]]:
+    """
+    Ranked auditoriums for every teacher, as LazyRankings over a CandidateIndex: each list is only
+    built as far as the teacher proposes. A MatchingMetrics with profile_ranking=True gets eager
+    rank_auditoriums lists instead, with capacity/conflict filtering and scoring timed separately.
+    """
+    if not isinstance(stats, MatchingMetrics) or not stats.profile_ranking:
+        with _phase(stats, "index"):
+            index = CandidateIndex(problem)
+            return [index.ranked(t) for t in range(problem.num_teachers)]
+    with stats.timer("conflicts"):
+        candidates = [problem.candidate_auditoriums(t) for t in range(problem.num_teachers)]
+    with stats.timer("scoring"):
+        return [problem.sort_candidates(t, c) for t, c in enumerate(candidates)]
+
+
+def initial_proposal_order(
+        problem: ProblemSet,
+        ranked: List[List[int]],
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        teachers: Optional[Iterable[int]] = None
+) -> List[int]:
+    """
+    The order in which teacher indices (default: all of them) enter the free queue. Sorts are
+    stable, so ties keep insertion order, and RANDOM is a shuffle seeded with `seed`: every
+    order is reproducible.
+    """
+    order = ProposalOrder(order)
+    teachers = list(range(problem.num_teachers) if teachers is None else teachers)
+    if order == ProposalOrder.GROUP_SIZE:
+        teachers.sort(key=lambda t: problem.group_size[t], reverse=True)
+    elif order == ProposalOrder.MOST_CONSTRAINED:
+        teachers.sort(key=lambda t: len(ranked[t]))  # CandidateIndex rankings count without ranking
+    elif order == ProposalOrder.RANDOM:
+        import random
+
+        random.Random(seed).shuffle(teachers)
+    return teachers
+
+
+class GroupBookings:
+    """
+    When each shared student group is busy during a run, so that two teachers of one Group never
+    hold overlapping auditoriums.
+
+    Only groups taught by several of the run's teachers are tracked. Each gets an IntervalIndex by
+    day holding the existing schedules of all its teachers plus the auditoriums they currently
+    hold: book() adds an accepted auditorium, release() removes it again when its teacher is
+    displaced. A teacher skips an auditorium that clashes with their group (clashes()) and keeps
+    its position in `deferred`; deferred auditoriums rank above the teacher's current position, so
+    they are retried first the next time the teacher proposes. A teacher left unmatched with
+    deferred auditoriums waits until a booking of their group is released, and then proposes again.
+
+    Auditoriums sharing a time slot clash alike, so each group caches the answer per slot until
+    its bookings next change: the teachers of a popular, nearly full group skip most of their
+    ranked lists with a dict lookup per auditorium. Once every slot clashes (full()), the group's
+    teachers stop walking their lists and wait where they are instead.
+    """
+    __slots__ = ("problem", "deferred", "_index", "_busy", "_clashing", "_slot", "num_slots", "_waiting")
+
+    def __init__(self, problem: ProblemSet, teachers: Optional[Iterable[int]] = None):
+        self.problem = problem
+        teachers = list(range(problem.num_teachers) if teachers is None else teachers)
+        group, seen = problem.group, set()
+        shared = {group[t] for t in teachers if group[t] in seen or seen.add(group[t])}
+        self._index: Dict[int, IntervalIndex] = {g: IntervalIndex() for g in shared}
+        for t in teachers:
+            index, bookings = self._index.get(group[t]), problem.bookings[t]
+            if index is not None and bookings is not None:
+                for day, start, end in bookings.intervals():
+                    index.add(day, start, end)
+        self._busy: Dict[int, Dict[int, bool]] = {g: {} for g in shared}  # Group code -> {slot: clashes?}
+        self._clashing = dict.fromkeys(shared, 0)  # Group code -> clashing slots in _busy
+        self._slot = array("i")  # a -> code of its (day, start, end)
+        slots: Dict[Tuple[int, int, int], int] = {}
+        if shared:
+            self._slot.extend(slots.setdefault(key, len(slots)) for key in zip(problem.day, problem.start, problem.end))
+        self.num_slots = len(slots)
+        self.deferred: Dict[int, List[int]] = {}  # t -> skipped positions in ranked[t], ascending
+        self._waiting: Dict[int, List[int]] = {}  # Group code -> unmatched teachers with deferred auditoriums
+
+    @classmethod
+    def for_problem(cls, problem: ProblemSet, teachers: Optional[Iterable[int]] = None) -> Optional['GroupBookings']:
+        """GroupBookings for a run of `teachers` (default: all), or None if no group is shared."""
+        bookings = cls(problem, teachers)
+        return bookings if bookings._index else None
+
+    def clashes(self, t: int, a: int) -> bool:
+        """Would teacher t taking auditorium a double-book their group?"""
+        problem = self.problem
+        g = problem.group[t]
+        busy = self._busy.get(g)
+        if busy is None:
+            return False
+        slot = self._slot[a]
+        clash = busy.get(slot)
+        if clash is None:
+            clash = busy[slot] = self._index[g].overlaps(problem.day[a], problem.start[a], problem.end[a])
+            self._clashing[g] += clash
+        return clash
+
+    def full(self, t: int) -> bool:
+        """Does every auditorium clash with teacher t's group, as far as clashes() has looked?"""
+        return self._clashing.get(self.problem.group[t]) == self.num_slots
+
+    def book(self, t: int, a: int) -> None:
+        problem = self.problem
+        g = problem.group[t]
+        index = self._index.get(g)
+        if index is not None:
+            index.add(problem.day[a], problem.start[a], problem.end[a])
+            self._busy[g].clear()
+            self._clashing[g] = 0
+
+    def release(self, t: int, a: int) -> List[int]:
+        """Frees t's group at auditorium a's time; returns the waiting teachers of the group to requeue."""
+        problem = self.problem
+        g = problem.group[t]
+        index = self._index.get(g)
+        if index is None:
+            return []
+        index.remove(problem.day[a], problem.start[a], problem.end[a])
+        self._busy[g].clear()
+        self._clashing[g] = 0
+        return self._waiting.pop(g, [])
+
+    def wait(self, t: int) -> None:
+        self._waiting.setdefault(self.problem.group[t], []).append(t)
+
+
+def refuse_shared_groups(problem: ProblemSet, solver: str) -> None:
+    """Raises ValueError for a solver that cannot keep teachers sharing a Group apart."""
+    if GroupBookings.for_problem(problem) is not None:
+        raise ValueError(f"{solver} cannot keep shared student groups from being double-booked; "
+                         "teachers share a Group, use the gale_shapley solver instead")
+
+
+class Budget:
+    """
+    A limit on one run_proposals call: wall-clock `seconds`, a number of `proposals`, or both.
+
+    The budget is checked after each teacher's turn, so every call makes progress and a run that
+    runs out stops between turns (a turn may overshoot a proposal budget by the rest of that
+    teacher's walk). The state it leaves behind is then exactly a state the uninterrupted run
+    passes through, and continuing it gives the same matching.
+    """
+    __slots__ = ("seconds", "proposals", "_deadline")
+
+    def __init__(self, seconds: Optional[float] = None, proposals: Optional[int] = None):
+        self.seconds = seconds
+        self.proposals = proposals
+        self._deadline: Optional[float] = None
+
+    def start(self) -> None:
+        """Starts the clock; called by run_proposals."""
+        self._deadline = None if self.seconds is None else timer.perf_counter() + self.seconds
+
+    def exhausted(self, proposals: int) -> bool:
+        """Has the run used up the budget after `proposals` proposals?"""
+        return ((self.proposals is not None and proposals >= self.proposals)
+                or (self._deadline is not None and timer.perf_counter() >= self._deadline))
+
+
+class MatchingState:
+    """
+    Where a teacher-proposing run stands: the free queue, each teacher's position in their ranked
+    list, and the current tentative pairs (plus, when teachers share groups, their GroupBookings).
+    run_proposals continues from any such state, which is what lets a run be resumed or
+    warm-started after a small change to the problem.
+    """
+    __slots__ = ("free_teachers", "next_proposal", "teacher_match", "auditorium_match", "groups")
+
+    def __init__(self, num_teachers: int, num_auditoriums: int, free_teachers: Iterable[int] = (),
+                 groups: Optional[GroupBookings] = None):
+        self.free_teachers = deque(free_teachers)  # FIFO of unmatched teachers still to propose
+        self.next_proposal = [0] * num_teachers  # Index of next auditorium to try in ranked[t]
+        self.teacher_match = [NO_MATCH] * num_teachers  # t -> a
+        self.auditorium_match = [NO_MATCH] * num_auditoriums  # a -> t
+        self.groups = groups
+
+    @property
+    def finished(self) -> bool:
+        """No teacher is left to propose (a run stopped by its Budget is not finished)."""
+        return not self.free_teachers
+
+
+def run_proposals(
+        problem: ProblemSet,
+        ranked: List[List[int]],
+        state: MatchingState,
+        stats: Optional[MatchingStats] = None,
+        budget: Optional[Budget] = None
+) -> MatchingState:
+    """
+    Runs teacher proposals from `state` until the free queue is empty, updating it in place.
+
+    A teacher is only ever unmatched while proposing, so their set of conflict-free auditoriums
+    never changes during the run: ranked lists are built once and walked with a pointer.
+    Counts are added to `stats` if given (see MatchingMetrics for timers and tracing).
+    With a `budget`, the run may also stop early; state.finished tells which happened.
+    """
+    free_teachers, next_proposal = state.free_teachers, state.next_proposal
+    teacher_match, auditorium_match = state.teacher_match, state.auditorium_match
+    prefers = problem.prefers
+    proposals = rejections = displacements = 0
+    record = stats.recorder(problem) if isinstance(stats, MatchingMetrics) else None
+    if budget is not None:
+        budget.start()
+    if state.groups is not None:
+        return _run_proposals_grouped(problem, ranked, state, stats, record, budget)
+    if record is not None:
+        return _run_proposals_traced(problem, ranked, state, stats, record, budget)
+
+    while free_teachers:
+        t = free_teachers.popleft()  # Process one teacher at a time
+        ranked_auditoriums = ranked[t]
+        position = next_proposal[t]
+
+        # --- Teacher proposes down their ranked list ---
+        while True:
+            try:
+                a = ranked_auditoriums[position]
+            except IndexError:
+                break  # List exhausted (a LazyRanking is only extended as far as it is read)
+            position += 1
+            proposals += 1
+
+            current = auditorium_match[a]
+            if current == NO_MATCH or prefers(a, t, current):
+                # Auditorium is free or prefers the new teacher: (re)assign it
+                teacher_match[t] = a
+                auditorium_match[a] = t
+                if current != NO_MATCH:
+                    teacher_match[current] = NO_MATCH
+                    free_teachers.append(current)  # Old teacher becomes unmatched again
+                    displacements += 1
+                break
+            # Else: Auditorium prefers current teacher, proposing teacher tries next auditorium
+            rejections += 1
+
+        next_proposal[t] = position
+        # A teacher who exhausts their list stays unmatched.
+        if budget is not None and budget.exhausted(proposals):
+            break  # Between turns, after at least one: each call makes progress
+
+    _debug("Proposals finished: %d proposals, %d rejections, %d displacements", proposals, rejections,
+           displacements)
+    if stats is not None:
+        stats.proposals += proposals
+        stats.rejections += rejections
+        stats.displacements += displacements
+    return state
+
+
+def _run_proposals_traced(
+        problem: ProblemSet,
+        ranked: List[List[int]],
+        state: MatchingState,
+        stats: MatchingMetrics,
+        record: Callable[[int, int, str], None],
+        budget: Optional[Budget] = None
+) -> MatchingState:
+    """run_proposals with a record() call per outcome; kept separate so untraced runs pay nothing."""
+    free_teachers, next_proposal = state.free_teachers, state.next_proposal
+    teacher_match, auditorium_match = state.teacher_match, state.auditorium_match
+    prefers = problem.prefers
+    first_proposal = stats.proposals
+
+    while free_teachers:
+        t = free_teachers.popleft()
+        ranked_auditoriums = ranked[t]
+        position = next_proposal[t]
+
+        while True:
+            try:
+                a = ranked_auditoriums[position]
+            except IndexError:
+                break
+            position += 1
+            stats.proposals += 1
+
+            current = auditorium_match[a]
+            if current == NO_MATCH or prefers(a, t, current):
+                teacher_match[t] = a
+                auditorium_match[a] = t
+                record(t, a, "accepted")
+                if current != NO_MATCH:
+                    teacher_match[current] = NO_MATCH
+                    free_teachers.append(current)
+                    stats.displacements += 1
+                    record(current, a, "displaced")
+                break
+            stats.rejections += 1
+            record(t, a, "rejected")
+
+        next_proposal[t] = position
+        if budget is not None and budget.exhausted(stats.proposals - first_proposal):
+            break
+    return state
+
+
+def _run_proposals_grouped(
+        problem: ProblemSet,
+        ranked: List[List[int]],
+        state: MatchingState,
+        stats: Optional[MatchingStats],
+        record: Optional[Callable[[int, int, str], None]],
+        budget: Optional[Budget] = None
+) -> MatchingState:
+    """run_proposals for teachers sharing groups: every proposal also goes through state.groups."""
+    free_teachers, next_proposal = state.free_teachers, state.next_proposal
+    teacher_match, auditorium_match = state.teacher_match, state.auditorium_match
+    groups, prefers = state.groups, problem.prefers
+    deferred, slot_busy, slots, group = groups.deferred, groups._busy, groups._slot, problem.group
+    counts = MatchingStats() if stats is None else stats  # Updated as we go: trace steps read it
+    first_proposal = counts.proposals
+
+    def propose(t: int, a: int) -> bool:
+        counts.proposals += 1
+        current = auditorium_match[a]
+        if current != NO_MATCH and not prefers(a, t, current):
+            counts.rejections += 1
+            if record is not None:
+                record(t, a, "rejected")
+            return False
+        teacher_match[t], auditorium_match[a] = a, t
+        groups.book(t, a)
+        if record is not None:
+            record(t, a, "accepted")
+        if current != NO_MATCH:
+            teacher_match[current] = NO_MATCH
+            free_teachers.append(current)
+            free_teachers.extend(groups.release(current, a))
+            counts.displacements += 1
+            if record is not None:
+                record(current, a, "displaced")
+        return True
+
+    while free_teachers:
+        t = free_teachers.popleft()
+        ranked_auditoriums = ranked[t]
+        matched = False
+        busy = slot_busy.get(group[t])  # groups.clashes, inlined: the cache is cleared in place
+        skipped = deferred.pop(t, None)
+        if skipped:
+            kept = []
+            for i, p in enumerate(skipped):
+                a = ranked_auditoriums[p]
+                clash = busy.get(slots[a])
+                if clash is None:
+                    clash = groups.clashes(t, a)
+                if clash:
+                    kept.append(p)
+                # Auditorium holders only get better, so a rejected deferred room is dropped for good
+                elif propose(t, a):
+                    kept.extend(skipped[i + 1:])  # Ranked below the auditorium just taken
+                    matched = True
+                    break
+            if kept:
+                deferred[t] = kept
+        position, waiting = next_proposal[t], False
+        while not matched:
+            try:
+                a = ranked_auditoriums[position]
+            except IndexError:
+                break
+            position += 1
+            clash = busy is not None and busy.get(slots[a])
+            if clash is None:
+                clash = groups.clashes(t, a)
+            if clash:
+                if groups.full(t):
+                    position -= 1  # Everything left clashes too: wait here for a release
+                    waiting = True
+                    break
+                deferred.setdefault(t, []).append(position - 1)
+                counts.group_clashes += 1
+                if record is not None:
+                    record(t, a, "group_clash")
+                continue
+            matched = propose(t, a)
+        next_proposal[t] = position
+        if not matched and (waiting or t in deferred):
+            groups.wait(t)
+        if budget is not None and budget.exhausted(counts.proposals - first_proposal):
+            break
+    return state
+
+
+CHECKPOINT_FORMAT = "schedule-helper/checkpoint"
+CHECKPOINT_VERSION = 1
+
+
+def problem_fingerprint(problem: ProblemSet, ranked: Optional[List[List[int]]] = None) -> str:
+    """
+    Digest of everything proposals depend on: the teacher and auditorium columns, the shared tables,
+    existing bookings and, for ranked lists given as plain lists, their contents (LazyRankings are
+    derived from the problem itself). Problems built from the same inputs in the same order agree.
+    """
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=16)
+    for column in (problem.group_size, problem.group_category, problem.time_preference, problem.group,
+                   problem.capacity, problem.size_category, problem.period, problem.day, problem.start,
+                   problem.end, problem.preference_row):
+        digest.update(len(column).to_bytes(8, "little") + column.tobytes())
+    digest.update("\n".join(problem.teacher_names).encode())
+    score_table = problem.score_table
+    digest.update(repr((problem.day_names, problem.preference_tables, problem.size_scores, score_table.time_table,
+                        sorted((level.value, weight) for level, weight in score_table.size_weights.items()))).encode())
+    for bookings in problem.bookings:
+        digest.update(b"-" if bookings is None else repr(sorted(bookings.intervals())).encode())
+    for ranking in ranked or ():
+        if not isinstance(ranking, LazyRanking):
+            digest.update(array("i", ranking).tobytes() + b"|")
+    return digest.hexdigest()
+
+
+class MatchingCheckpoint:
+    """
+    A MatchingState in compact form, to continue a run that ran out of Budget in a later call or
+    another process (see match_problem_budgeted).
+
+    Only what can't be rebuilt from the problem is kept, as int32 arrays: the free queue, each
+    teacher's next_proposal and teacher_match and, when teachers share groups, the GroupBookings
+    bookkeeping (deferred positions, waiting teachers and cached slot answers). to_bytes() writes
+    a JSON header line with the format version, the problem_fingerprint and each array's length,
+    followed by the arrays little-endian, so a run costs about 8 bytes per teacher plus its queue.
+    state() checks the fingerprint against the problem it is resumed on.
+    """
+    __slots__ = ("fingerprint", "num_teachers", "num_auditoriums", "arrays")
+    ARRAYS = ("free_teachers", "next_proposal", "teacher_match", "deferred", "waiting", "busy")
+
+    def __init__(self, fingerprint: str, num_teachers: int, num_auditoriums: int, arrays: Dict[str, array]):
+        self.fingerprint = fingerprint
+        self.num_teachers = num_teachers
+        self.num_auditoriums = num_auditoriums
+        self.arrays = arrays
+
+    @classmethod
+    def from_state(cls, state: MatchingState, fingerprint: str) -> 'MatchingCheckpoint':
+        arrays = {"free_teachers": array("i", state.free_teachers), "next_proposal": array("i", state.next_proposal),
+                  "teacher_match": array("i", state.teacher_match)}
+        groups = state.groups
+        if groups is not None:
+            # t, count, positions... / group, count, teachers... / group, slot, clashes?
+            arrays["deferred"] = array("i", (n for t, positions in groups.deferred.items()
+                                             for n in (t, len(positions), *positions)))
+            arrays["waiting"] = array("i", (n for g, teachers in groups._waiting.items()
+                                            for n in (g, len(teachers), *teachers)))
+            arrays["busy"] = array("i", (n for g, answers in groups._busy.items()
+                                         for slot, clash in answers.items() for n in (g, slot, clash)))
+        return cls(fingerprint, len(state.next_proposal), len(state.auditorium_match), arrays)
+
+    def state(self, problem: ProblemSet, ranked: Optional[List[List[int]]] = None) -> MatchingState:
+        """The MatchingState to continue from, rebuilt on `problem` (ValueError if it isn't the same problem)."""
+        if (problem.num_teachers, problem.num_auditoriums) != (self.num_teachers, self.num_auditoriums) or \
+                problem_fingerprint(problem, ranked) != self.fingerprint:
+            raise ValueError("Checkpoint was taken on a different problem")
+        arrays = self.arrays
+        groups = GroupBookings(problem) if "deferred" in arrays else None
+        state = MatchingState(problem.num_teachers, problem.num_auditoriums, arrays["free_teachers"], groups)
+        state.next_proposal = arrays["next_proposal"].tolist()
+        state.teacher_match = arrays["teacher_match"].tolist()
+        for t, a in enumerate(state.teacher_match):
+            if a != NO_MATCH:
+                state.auditorium_match[a] = t
+                if groups is not None:
+                    groups.book(t, a)
+        if groups is not None:
+            for key, values in _read_runs(arrays["deferred"]):
+                groups.deferred[key] = values
+            for key, values in _read_runs(arrays["waiting"]):
+                groups._waiting[key] = values
+            busy = arrays["busy"]
+            for i in range(0, len(busy), 3):
+                g, slot, clash = busy[i:i + 3]
+                groups._busy[g][slot] = bool(clash)
+                groups._clashing[g] += clash
+        return state
+
+    def to_bytes(self) -> bytes:
+        import json
+
+        header = {"format": CHECKPOINT_FORMAT, "version": CHECKPOINT_VERSION, "fingerprint": self.fingerprint,
+                  "teachers": self.num_teachers, "auditoriums": self.num_auditoriums,
+                  "arrays": {name: len(values) for name, values in self.arrays.items()}}
+        parts = [json.dumps(header).encode() + b"\n"]
+        for values in self.arrays.values():
+            if sys.byteorder != "little":
+                values = array("i", values)
+                values.byteswap()
+            parts.append(values.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'MatchingCheckpoint':
+        import json
+
+        end = data.find(b"\n")
+        try:
+            header = json.loads(data[:end])
+        except ValueError:
+            header = None
+        if end < 0 or not isinstance(header, dict) or header.get("format") != CHECKPOINT_FORMAT:
+            raise ValueError("Not a matching checkpoint")
+        if header["version"] != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {header['version']}")
+        arrays, position = {}, end + 1
+        for name, length in header["arrays"].items():
+            values = array("i")
+            values.frombytes(data[position:position + length * values.itemsize])
+            if len(values) != length:
+                raise ValueError(f"Checkpoint truncated in {name!r}")
+            if sys.byteorder != "little":
+                values.byteswap()
+            arrays[name] = values
+            position += length * values.itemsize
+        return cls(header["fingerprint"], header["teachers"], header["auditoriums"], arrays)
+
+    def save(self, path: str) -> None:
+        """Writes the checkpoint to `path` through a temporary file, so a killed job never leaves half of one."""
+        import os
+
+        with open(path + ".tmp", "wb") as checkpoint_file:
+            checkpoint_file.write(self.to_bytes())
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> 'MatchingCheckpoint':
+        with open(path, "rb") as checkpoint_file:
+            return cls.from_bytes(checkpoint_file.read())
+
+
+def _read_runs(values: array) -> Iterator[Tuple[int, List[int]]]:
+    """(key, items) pairs back from a flat key, count, items... array."""
+    i = 0
+    while i < len(values):
+        key, count = values[i], values[i + 1]
+        yield key, values[i + 2:i + 2 + count].tolist()
+        i += 2 + count
+
+
+def match_problem(
+        problem: ProblemSet,
+        ranked: Optional[List[List[int]]] = None,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None
+) -> List[int]:
+    """
+    Teacher-proposing Gale-Shapley on a ProblemSet.
+
+    Proposal order is deterministic: free teachers wait in a FIFO queue that starts in the order
+    given by initial_proposal_order (by default the teachers dict order), and a displaced teacher
+    joins the back of the queue. Each teacher proposes down their ranked list from where they
+    last stopped. Because auditoriums keep their current teacher on ties, the order can change
+    which stable matching is found, not only how many proposals it takes.
+
+    Teachers who share a Group are never given overlapping auditoriums: their proposals go
+    through GroupBookings, which skips (and later retries) rooms that would double-book the group.
+
+    Args:
+        problem: The problem in array form.
+        ranked: Optional ranked auditorium indices per teacher (default: rank_all, i.e. built lazily).
+        order: Initial order of the free queue (a ProposalOrder or its value).
+        seed: Seed for ProposalOrder.RANDOM.
+        stats: Optional MatchingStats (or MatchingMetrics) to add proposal/rejection/displacement counts to.
+
+    Returns:
+        teacher_match: For each teacher index, the matched auditorium index or NO_MATCH.
+    """
+    return match_problem_budgeted(problem, ranked, order, seed, stats)[0]
+
+
+def match_problem_budgeted(
+        problem: ProblemSet,
+        ranked: Optional[List[List[int]]] = None,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None,
+        budget: Optional[Budget] = None,
+        checkpoint: Optional[MatchingCheckpoint] = None
+) -> Tuple[List[int], Optional[MatchingCheckpoint]]:
+    """
+    match_problem that stops when `budget` runs out and can continue from where it stopped.
+
+    Starts from `checkpoint` if given (the order and seed it started with are already in its free
+    queue), otherwise from scratch. Returns the teacher_match reached, which is tentative if the
+    budget ran out, and a MatchingCheckpoint to pass back in to continue, or None once the run has
+    finished. However often it is stopped and resumed, the run ends with the matching an
+    uninterrupted match_problem finds.
+    """
+    if ranked is None:
+        ranked = rank_all(problem, stats)
+    if checkpoint is None:
+        state = MatchingState(problem.num_teachers, problem.num_auditoriums,
+                              initial_proposal_order(problem, ranked, order, seed), GroupBookings.for_problem(problem))
+    else:
+        state = checkpoint.state(problem, ranked)
+    with _phase(stats, "proposals"):
+        run_proposals(problem, ranked, state, stats, budget)
+    if isinstance(stats, MatchingMetrics):
+        stats.runs += 1
+        stats.record_ranked(ranked)
+    if state.finished:
+        return state.teacher_match, None
+    return state.teacher_match, MatchingCheckpoint.from_state(state, problem_fingerprint(problem, ranked))
+
+
 def gale_shapley_matching(
         teachers: Dict[str, Teacher],  # Use teacher full_name as key
-        auditoriums: List[Auditorium]
+        auditoriums: List[Auditorium],
+        preference_lists: Optional[Dict[str, List[Auditorium]]] = None,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None,
+        score_table: Union[str, ScoreTable, None] = None
 ) -> Tuple[Dict[str, Auditorium], Set[str]]:
     """
     Performs Gale-Shapley matching where teachers propose to auditoriums.
 
+    Each teacher's ranked list (the order of build_teacher_preference_lists) is built once and the
+    teacher keeps a pointer to the next auditorium to propose to, so the whole run costs
+    O(T*A) proposals instead of re-ranking every auditorium each time a teacher is displaced.
+    Lists come from a CandidateIndex and are only extended as far as the teacher gets.
+    The loop itself runs on a ProblemSet (match_problem), i.e. on integer indices rather than
+    objects; see match_problem for the (deterministic) proposal order.
+
+    Displacements only touch index arrays; each matched teacher's schedule gets their final
+    auditorium appended once at the end, which leaves it exactly as the old append/remove did.
+
     Args:
         teachers: Dictionary of teachers (key: full_name, value: Teacher object).
         auditoriums: List of available Auditorium objects.
+        preference_lists: Optional precomputed ranked lists, in the format returned by
+            build_teacher_preference_lists (e.g. from score_matrix.preference_lists_from_scores).
+        order: Which teachers propose first (ProposalOrder: insertion, group_size, most_constrained, random).
+        seed: Seed for ProposalOrder.RANDOM; the same seed always gives the same result.
+        stats: Optional MatchingStats to add the run's proposal, rejection and displacement counts to;
+            a MatchingMetrics also gets per-phase timings, ranked list lengths and, optionally, a trace.
+        score_table: ScoreTable (or registered name) to rank with; default: the default table.
 
     Returns:
         A tuple containing:
         - teacher_matches: Dictionary mapping teacher full_name to their assigned Auditorium object.
         - unmatched_teachers: Set of full_names of teachers who couldn't be matched.
     """
-    unmatched_teacher_names: List[str] = list(teachers.keys())
-
+    problem, ranked = _problem_from_objects(teachers, auditoriums, preference_lists, stats, score_table)
+    teacher_match = match_problem(problem, ranked, order=order, seed=seed, stats=stats)
+    with _phase(stats, "apply"):
+        return apply_teacher_match(problem, teacher_match)
+
+
+def gale_shapley_matching_budgeted(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        budget: Optional[Budget] = None,
+        checkpoint: Optional[MatchingCheckpoint] = None,
+        preference_lists: Optional[Dict[str, List[Auditorium]]] = None,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None,
+        score_table: Union[str, ScoreTable, None] = None
+) -> Tuple[Dict[str, Auditorium], Set[str], Optional[MatchingCheckpoint]]:
+    """
+    gale_shapley_matching that stops when `budget` (seconds and/or proposals) runs out, and
+    continues from `checkpoint`, a MatchingCheckpoint of an earlier call on the same inputs
+    (see match_problem_budgeted).
+
+    Returns (teacher_matches, unmatched_teachers, checkpoint): checkpoint is None if the run
+    finished, or the MatchingCheckpoint to continue from (MatchingCheckpoint.save / load keep it
+    on disk) if the budget ran out. Matches are then tentative and schedules are left untouched
+    until the run finishes, so the resumed call sees the same inputs.
+    """
+    problem, ranked = _problem_from_objects(teachers, auditoriums, preference_lists, stats, score_table)
+    teacher_match, checkpoint = match_problem_budgeted(problem, ranked, order, seed, stats, budget, checkpoint)
+    with _phase(stats, "apply"):
+        return (*apply_teacher_match(problem, teacher_match, update_schedules=checkpoint is None), checkpoint)
+
+
+def _problem_from_objects(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        preference_lists: Optional[Dict[str, List[Auditorium]]],
+        stats: Optional[MatchingStats],
+        score_table: Union[str, ScoreTable, None]
+) -> Tuple[ProblemSet, Optional[List[List[int]]]]:
+    """The ProblemSet of the objects, and preference_lists as index lists if given."""
+    with _phase(stats, "build"):
+        problem = ProblemSet.from_objects(teachers, auditoriums, score_table)
+        ranked = None
+        if preference_lists is not None:
+            ranked = [[problem.auditorium_index(aud) for aud in preference_lists[name]]
+                      for name in problem.teacher_names]
+    return problem, ranked
+
+
+def apply_teacher_match(problem: ProblemSet, teacher_match: List[int],
+                        update_schedules: bool = True) -> Tuple[Dict[str, Auditorium], Set[str]]:
+    """
+    Turns an index result into gale_shapley_matching's (teacher_matches, unmatched_teachers),
+    appending each matched auditorium to the teacher's schedule unless update_schedules is False.
+    """
     teacher_matches: Dict[str, Auditorium] = {}
-    auditorium_matches: Dict[Auditorium, str] = {aud: None for aud in
-                                                 auditoriums}  # Stores current assignment A -> T_name
-
-    proposal_attempts: Dict[str, Set[Auditorium]] = {name: set() for name in
-                                                     teachers}  # Track proposals to avoid loops/redundancy
-
-    while unmatched_teacher_names:
-        teacher_name = unmatched_teacher_names.pop(0)  # Process one teacher at a time
-        teacher = teachers[teacher_name]
-
-        # --- Teacher ranks suitable auditoriums ---
-        possible_auditoriums = []
-        for aud in auditoriums:
-            # Must fit, no schedule conflict, and teacher hasn't proposed here yet
-            if (teacher.group.num_students <= aud.capacity and
-                    not is_schedule_conflict(teacher, aud) and
-                    aud not in proposal_attempts[teacher_name]):
-                score = get_teacher_preference_score(teacher, aud)
-                if score >= 0:  # Only consider valid matches (score >= 0)
-                    possible_auditoriums.append((score, aud))
+    final_unmatched_teachers: Set[str] = set()
+    for t, a in enumerate(teacher_match):
+        if a == NO_MATCH:
+            final_unmatched_teachers.add(problem.teacher_names[t])
+        else:
+            auditorium = problem.auditorium(a)
+            if update_schedules:
+                problem.teacher(t).schedule.append(auditorium)  # Add to teacher's internal schedule
+            teacher_matches[problem.teacher_names[t]] = auditorium
+    return teacher_matches, final_unmatched_teachers
 
-        # Sort potential auditoriums by teacher's preference (highest score first)
-        possible_auditoriums.sort(key=lambda x: x[0], reverse=True)
 
-        # --- Teacher proposes down their ranked list ---
-        made_match = False
-        for score, preferred_auditorium in possible_auditoriums:
-            proposal_attempts[teacher_name].add(preferred_auditorium)  # Mark proposal attempt
+# --- Timetable (many sessions per teacher) ---
 
-            current_match_name = auditorium_matches.get(preferred_auditorium)
+def match_problem_with_quotas(
+        problem: ProblemSet,
+        quotas: List[int],
+        ranked: Optional[List[List[int]]] = None,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None
+) -> List[List[int]]:
+    """
+    Deferred acceptance where teacher t may hold up to quotas[t] auditoriums (sessions) at once.
 
-            if current_match_name is None:
-                # Auditorium is free: Assign teacher
-                teacher_matches[teacher_name] = preferred_auditorium
-                auditorium_matches[preferred_auditorium] = teacher_name
-                teacher.schedule.append(preferred_auditorium)  # Add to teacher's internal schedule
-                made_match = True
-                break  # Teacher is matched, move to next unmatched teacher
+    Auditoriums still hold one teacher each and judge proposals with problem.prefers. A teacher
+    with free quota proposes down their ranked list, skipping auditoriums that overlap a session
+    they already hold. Skipped positions are remembered; when the teacher loses a session they are
+    retried (in rank order, before the rest of the list), since the overlap may be gone. Teachers
+    sharing a Group also skip auditoriums that would double-book the group (GroupBookings); one
+    left short of their quota waits, and retries when a session of their group is lost. With all
+    quotas 1 this is exactly match_problem.
 
+    Returns:
+        For each teacher index, the auditorium indices of their sessions in the order they were won.
+    """
+    if ranked is None:
+        ranked = rank_all(problem, stats)
+    with _phase(stats, "proposals"):
+        sessions = _propose_with_quotas(problem, quotas, ranked, order, seed, stats)
+    if isinstance(stats, MatchingMetrics):
+        stats.runs += 1
+        stats.record_ranked(ranked)
+    return sessions
+
+
+def _propose_with_quotas(
+        problem: ProblemSet,
+        quotas: List[int],
+        ranked: List[List[int]],
+        order: ProposalOrder,
+        seed: int,
+        stats: Optional[MatchingStats]
+) -> List[List[int]]:
+    num_teachers = problem.num_teachers
+    free_teachers = deque(t for t in initial_proposal_order(problem, ranked, order, seed) if quotas[t] > 0)
+    queued = bytearray(num_teachers)
+    for t in free_teachers:
+        queued[t] = 1
+    sessions: List[List[int]] = [[] for _ in range(num_teachers)]
+    session_index: List[Optional[IntervalIndex]] = [None] * num_teachers  # Built on a teacher's first session
+    auditorium_match = [NO_MATCH] * problem.num_auditoriums
+    next_proposal = [0] * num_teachers
+    skipped: List[List[int]] = [[] for _ in range(num_teachers)]  # Positions passed over because of an overlap
+    retry: List[List[int]] = [[] for _ in range(num_teachers)]  # Heap of skipped positions to try again
+    day, start, end = problem.day, problem.start, problem.end
+    prefers = problem.prefers
+    groups = GroupBookings.for_problem(problem)
+    proposals = rejections = group_clashes = displacements = 0
+
+    def requeue(teacher: int) -> None:
+        for skipped_position in skipped[teacher]:
+            heappush(retry[teacher], skipped_position)
+        skipped[teacher].clear()
+        if not queued[teacher]:
+            queued[teacher] = 1
+            free_teachers.append(teacher)
+
+    while free_teachers:
+        t = free_teachers.popleft()
+        queued[t] = 0
+        ranked_auditoriums, held, pending = ranked[t], sessions[t], retry[t]
+
+        while len(held) < quotas[t]:
+            if pending:
+                position = heappop(pending)
+                a = ranked_auditoriums[position]
             else:
-                # Auditorium is occupied: Check if auditorium prefers this new teacher
-                current_matched_teacher = teachers[current_match_name]
-                if is_teacher_better_match(teacher, preferred_auditorium, current_matched_teacher):
-                    # New teacher is better: Replace old teacher
-                    # Assign new teacher
-                    teacher_matches[teacher_name] = preferred_auditorium
-                    auditorium_matches[preferred_auditorium] = teacher_name
-                    teacher.schedule.append(preferred_auditorium)
-
-                    # Unassign old teacher
-                    del teacher_matches[current_match_name]
-                    current_matched_teacher.schedule.remove(preferred_auditorium)  # Remove from old teacher's schedule
-                    unmatched_teacher_names.append(current_match_name)  # Old teacher becomes unmatched again
-
-                    made_match = True
-                    break  # Teacher is matched, move to next unmatched teacher
-                # Else: Auditorium prefers current teacher, proposing teacher remains unmatched (for now) and tries next auditorium
-
-        if not made_match and teacher_name not in teacher_matches:
-            # If teacher went through all suitable options and wasn't matched, they remain technically unmatched
-            # but already popped from list. We'll collect final unmatched set at the end.
-            pass
-
-    # Determine final set of unmatched teachers
-    final_unmatched_teachers = {name for name in teachers if name not in teacher_matches}
+                position = next_proposal[t]
+                try:
+                    a = ranked_auditoriums[position]
+                except IndexError:
+                    break  # Nothing left to propose to, until a session is lost
+                next_proposal[t] += 1
+            index = session_index[t]
+            if index is not None and index.overlaps(day[a], start[a], end[a]):
+                skipped[t].append(position)
+                continue
+            if groups is not None and groups.clashes(t, a):
+                skipped[t].append(position)
+                group_clashes += 1
+                continue
+            proposals += 1
+
+            current = auditorium_match[a]
+            if current != NO_MATCH and not prefers(a, t, current):
+                rejections += 1
+                continue
+            auditorium_match[a] = t
+            held.append(a)
+            if index is None:
+                index = session_index[t] = IntervalIndex()
+            index.add(day[a], start[a], end[a])
+            if groups is not None:
+                groups.book(t, a)
+            if current != NO_MATCH:
+                displacements += 1
+                sessions[current].remove(a)
+                session_index[current].remove(day[a], start[a], end[a])
+                requeue(current)
+                if groups is not None:
+                    for waiting in groups.release(current, a):
+                        requeue(waiting)
+        if groups is not None and len(held) < quotas[t] and skipped[t]:
+            groups.wait(t)  # Until a session of their group is lost
+
+    _debug("Timetable proposals finished: %d proposals, %d rejections, %d displacements", proposals,
+           rejections, displacements)
+    if stats is not None:
+        stats.proposals += proposals
+        stats.rejections += rejections
+        stats.group_clashes += group_clashes
+        stats.displacements += displacements
+    return sessions
+
+
+def gale_shapley_timetable(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        quotas: Union[int, Dict[str, int]] = 1,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None,
+        score_table: Union[str, ScoreTable, None] = None
+) -> Tuple[Dict[str, List[Auditorium]], Set[str]]:
+    """
+    Fills a whole timetable in one run: each teacher is matched to up to `quota` auditorium slots.
 
-    return teacher_matches, final_unmatched_teachers
+    Args:
+        teachers: Dictionary of teachers (key: full_name, value: Teacher object).
+        auditoriums: List of available Auditorium objects (room-slots across the week).
+        quotas: Sessions per teacher, either one number for everybody or a dict by teacher name
+            (teachers missing from the dict get 1).
+        order, seed, stats, score_table: As for gale_shapley_matching.
+
+    Returns:
+        A tuple containing:
+        - teacher_sessions: Dictionary mapping teacher full_name to their assigned Auditoriums
+          (teachers with no session are left out). They are also appended to each teacher's schedule.
+        - underfilled_teachers: Set of full_names of teachers who got fewer sessions than their quota.
+    """
+    with _phase(stats, "build"):
+        problem = ProblemSet.from_objects(teachers, auditoriums, score_table)
+    if isinstance(quotas, int):
+        quota_list = [quotas] * problem.num_teachers
+    else:
+        quota_list = [quotas.get(name, 1) for name in problem.teacher_names]
+
+    sessions = match_problem_with_quotas(problem, quota_list, order=order, seed=seed, stats=stats)
+
+    teacher_sessions: Dict[str, List[Auditorium]] = {}
+    underfilled_teachers: Set[str] = set()
+    with _phase(stats, "apply"):
+        for t, held in enumerate(sessions):
+            name = problem.teacher_names[t]
+            if len(held) < quota_list[t]:
+                underfilled_teachers.add(name)
+            if held:
+                booked = [problem.auditorium(a) for a in held]
+                problem.teacher(t).schedule.extend(booked)
+                teacher_sessions[name] = booked
+    return teacher_sessions, underfilled_teachers
@@ -0,0 +1,272 @@
+# incremental_matching.py
+
+from typing import List, Dict, Tuple, Optional, Set, Iterable
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, ProblemSet, ProposalOrder, MatchingState, MatchingStats, GroupBookings, NO_MATCH,
+    initial_proposal_order, run_proposals,
+)
+
+
+def _rank_position(ranked: List[int], key, target) -> int:
+    """Leftmost position in `ranked` (sorted by `key`) where `target` could be inserted."""
+    lo, hi = 0, len(ranked)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(ranked[mid]) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class IncrementalMatcher:
+    """
+    Keeps a matching session alive so that small edits don't rerun gale_shapley_matching from scratch.
+
+    The ProblemSet, every teacher's ranked list and the proposal state are cached. An update only
+    re-ranks edited teachers and splices added, removed or edited auditoriums in or out of the
+    existing lists (a binary search per teacher), instead of re-scoring and re-sorting T x A pairs.
+
+    The proposals are then either
+      * replayed over the cached lists (exact=True, the default): the result is identical to
+        gale_shapley_matching(self.current_teachers(), self.current_auditoriums()), or
+      * warm-started (exact=False) for removed auditoriums and added, removed or modified
+        teachers: only the teachers freed by the edit, the new ones and the modified ones (from
+        the top of their new lists) propose again, continuing from where they stopped.
+        Removing auditoriums and adding teachers only make teachers worse off, so every earlier
+        rejection stays valid and the result is the same matching as a from-scratch run, unless
+        auditoriums are indifferent between competing teachers (same size fit and group size),
+        where the tie goes to whoever proposed first. An auditorium vacated by a removed or
+        modified teacher is first passed down a vacancy chain: it goes to the teacher it prefers
+        among those it turned down, whose own auditorium is passed on in turn. The result is
+        stable, but a from-scratch run may give some teachers better auditoriums.
+        Added or modified auditoriums, and every edit while teachers share a Group (see
+        GroupBookings), always replay.
+
+    Teachers are identified by their key in the teachers dict, auditoriums by object. Teacher
+    schedules are read when a teacher is added or modified, and are never written to.
+    """
+
+    def __init__(
+            self,
+            teachers: Dict[str, Teacher],
+            auditoriums: List[Auditorium],
+            order: ProposalOrder = ProposalOrder.INSERTION,
+            seed: int = 0
+    ):
+        self.order = order
+        self.seed = seed
+        self.stats = MatchingStats()  # Accumulated over the initial run and every update
+        self.problem = ProblemSet.from_objects(teachers, auditoriums)
+        self._teacher_index: Dict[str, int] = {name: t for t, name in enumerate(self.problem.teacher_names)}
+        self._active_teachers = bytearray(b"\x01") * self.problem.num_teachers
+        self._available = bytearray(b"\x01") * self.problem.num_auditoriums
+        self.ranked = [self.problem.rank_auditoriums(t) for t in range(self.problem.num_teachers)]
+        self.state = self._replay()
+
+    # --- Inputs and result ---
+
+    def current_teachers(self) -> Dict[str, Teacher]:
+        """The teachers dict a from-scratch run would use now (original order, additions at the end)."""
+        return {name: self.problem.teacher(t) for t, name in enumerate(self.problem.teacher_names)
+                if self._active_teachers[t]}
+
+    def current_auditoriums(self) -> List[Auditorium]:
+        return [self.problem.auditorium(a) for a in range(self.problem.num_auditoriums) if self._available[a]]
+
+    def result(self) -> Tuple[Dict[str, Auditorium], Set[str]]:
+        """(teacher_matches, unmatched_teachers), as returned by gale_shapley_matching."""
+        teacher_matches: Dict[str, Auditorium] = {}
+        unmatched: Set[str] = set()
+        for t, a in enumerate(self.state.teacher_match):
+            if not self._active_teachers[t]:
+                continue
+            name = self.problem.teacher_names[t]
+            if a == NO_MATCH:
+                unmatched.add(name)
+            else:
+                teacher_matches[name] = self.problem.auditorium(a)
+        return teacher_matches, unmatched
+
+    # --- Updates ---
+
+    def update(
+            self,
+            added_teachers: Optional[Dict[str, Teacher]] = None,
+            removed_teachers: Iterable[str] = (),
+            modified_teachers: Optional[Dict[str, Teacher]] = None,
+            added_auditoriums: Iterable[Auditorium] = (),
+            removed_auditoriums: Iterable[Auditorium] = (),
+            modified_auditoriums: Iterable[Auditorium] = (),
+            exact: bool = True
+    ) -> Tuple[Dict[str, Auditorium], Set[str]]:
+        """
+        Applies a delta and returns the new (teacher_matches, unmatched_teachers).
+
+        modified_teachers maps an existing name to its new Teacher (or the same, mutated, object);
+        modified_auditoriums are existing Auditorium objects whose fields were changed in place.
+        """
+        added_teachers = added_teachers or {}
+        modified_teachers = modified_teachers or {}
+        removed_teachers, added_auditoriums = list(removed_teachers), list(added_auditoriums)
+        modified_auditoriums = list(modified_auditoriums)
+        freed: List[int] = []
+        vacated: List[int] = []
+
+        for aud in removed_auditoriums:
+            a = self.problem.auditorium_index(aud)
+            if not self._available[a]:
+                continue
+            self._available[a] = 0
+            self._remove_ranked(a)
+            holder = self.state.auditorium_match[a]
+            if holder != NO_MATCH:
+                self.state.auditorium_match[a] = NO_MATCH
+                self.state.teacher_match[holder] = NO_MATCH
+                freed.append(holder)
+
+        for name in removed_teachers:
+            t = self._teacher_index.pop(name)
+            self._active_teachers[t] = 0
+            self.ranked[t] = []
+            vacated.append(self._release(t))
+
+        for name, teacher in modified_teachers.items():
+            t = self._teacher_index[name]
+            self.problem.set_teacher(t, teacher)
+            self.ranked[t] = self._rank(t)
+            vacated.append(self._release(t))
+            self.state.next_proposal[t] = 0  # Proposes again from the top of the new list
+            freed.append(t)
+
+        for aud in modified_auditoriums:
+            self._move_auditorium(self.problem.auditorium_index(aud), aud)
+
+        for aud in added_auditoriums:
+            self._add_auditorium(aud)
+
+        for name, teacher in added_teachers.items():
+            if name in self._teacher_index:
+                raise ValueError(f"Teacher {name!r} is already being matched; use modified_teachers")
+            t = self.problem.add_teacher(name, teacher)
+            self._teacher_index[name] = t
+            self._active_teachers.append(1)
+            self.ranked.append(self._rank(t))
+            self.state.next_proposal.append(0)
+            self.state.teacher_match.append(NO_MATCH)
+            freed.append(t)
+
+        if exact or added_auditoriums or modified_auditoriums or self.state.groups is not None:
+            self.state = self._replay()
+        else:
+            self._fill_vacancies([a for a in vacated if a != NO_MATCH])
+            teacher_match = self.state.teacher_match
+            self.state.free_teachers.extend(t for t in dict.fromkeys(freed)
+                                            if self._active_teachers[t] and teacher_match[t] == NO_MATCH)
+            run_proposals(self.problem, self.ranked, self.state, self.stats)
+        return self.result()
+
+    def _release(self, t: int) -> int:
+        """Unmatches teacher t; returns the auditorium they held (NO_MATCH if none)."""
+        state = self.state
+        a = state.teacher_match[t]
+        if a != NO_MATCH:
+            state.teacher_match[t] = state.auditorium_match[a] = NO_MATCH
+        return a
+
+    def _fill_vacancies(self, vacancies: List[int]) -> None:
+        """
+        Vacancy chains: each vacated auditorium goes to the teacher it prefers among those who
+        proposed to it before (it sits above their pointer, and above their match if any), which
+        vacates that teacher's auditorium in turn. Nobody else wants a vacancy more than their
+        match, so the matching stays stable, and every auditorium above a teacher's pointer
+        still holds a teacher it likes at least as much: proposals can carry on from here.
+        """
+        problem, state = self.problem, self.state
+        teacher_match, auditorium_match, next_proposal = state.teacher_match, state.auditorium_match, state.next_proposal
+        while vacancies:
+            a = vacancies.pop()
+            if not self._available[a] or auditorium_match[a] != NO_MATCH:
+                continue
+            best, capacity = NO_MATCH, problem.capacity[a]
+            for t in range(problem.num_teachers):
+                if not self._active_teachers[t] or problem.group_size[t] > capacity:
+                    continue
+                ranked, turned_down = self.ranked[t], next_proposal[t] - (teacher_match[t] != NO_MATCH)
+                if turned_down <= 0:
+                    continue
+                if turned_down < len(ranked):  # Is a ranked above the first auditorium not yet turned down?
+                    frontier = ranked[turned_down]
+                    score, frontier_score = problem.score(t, a), problem.score(t, frontier)
+                    if score < frontier_score or (score == frontier_score and a >= frontier):
+                        continue
+                if not problem.conflicts(t, a) and (best == NO_MATCH or problem.prefers(a, t, best)):
+                    best = t
+            if best == NO_MATCH:
+                continue  # Nobody it turned down prefers it: it stays empty
+            previous = teacher_match[best]
+            teacher_match[best], auditorium_match[a] = a, best
+            key = self._rank_key(best)
+            next_proposal[best] = _rank_position(self.ranked[best], key, key(a)) + 1
+            self.stats.proposals += 1
+            if previous != NO_MATCH:
+                auditorium_match[previous] = NO_MATCH
+                vacancies.append(previous)
+
+    def _replay(self) -> MatchingState:
+        """Runs the proposals from scratch over the cached ranked lists."""
+        problem = self.problem
+        active = [t for t in range(problem.num_teachers) if self._active_teachers[t]]
+        order = initial_proposal_order(problem, self.ranked, self.order, self.seed, teachers=active)
+        state = MatchingState(problem.num_teachers, problem.num_auditoriums, order,
+                              GroupBookings.for_problem(problem, active))
+        return run_proposals(problem, self.ranked, state, self.stats)
+
+    def _rank(self, t: int) -> List[int]:
+        return [a for a in self.problem.rank_auditoriums(t) if self._available[a]]
+
+    def _rank_key(self, t: int):
+        # Ranked lists are sorted by score (highest first), ties by auditorium index
+        score = self.problem.score
+        return lambda a: (-score(t, a), a)
+
+    def _is_candidate(self, t: int, a: int) -> bool:
+        return self.problem.group_size[t] <= self.problem.capacity[a] and not self.problem.conflicts(t, a)
+
+    def _remove_ranked(self, a: int) -> None:
+        for t in range(self.problem.num_teachers):
+            if self._active_teachers[t] and self._is_candidate(t, a):
+                key = self._rank_key(t)
+                ranked = self.ranked[t]
+                position = _rank_position(ranked, key, key(a))
+                del ranked[position]
+                if position < self.state.next_proposal[t]:
+                    self.state.next_proposal[t] -= 1  # Keep pointing at the same next auditorium
+
+    def _insert_ranked(self, a: int) -> None:
+        for t in range(self.problem.num_teachers):
+            if self._active_teachers[t] and self._is_candidate(t, a):
+                key = self._rank_key(t)
+                ranked = self.ranked[t]
+                ranked.insert(_rank_position(ranked, key, key(a)), a)
+
+    def _add_auditorium(self, aud: Auditorium) -> None:
+        known = self.problem.num_auditoriums
+        a = self.problem.add_auditorium(aud)
+        if a < known:
+            if self._available[a]:
+                return  # Already part of the problem
+            self._available[a] = 1  # Re-adding a withdrawn auditorium: it keeps its original place
+        else:
+            self._available.append(1)
+            self.state.auditorium_match.append(NO_MATCH)
+        self._insert_ranked(a)
+
+    def _move_auditorium(self, a: int, aud: Auditorium) -> None:
+        """Takes auditorium a out of every ranked list, rewrites its columns and splices it back in."""
+        if self._available[a]:
+            self._remove_ranked(a)
+        self.problem.set_auditorium(a, aud)
+        if self._available[a]:
+            self._insert_ranked(a)
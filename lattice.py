@@ -0,0 +1,345 @@
+# lattice.py
+
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import List, Dict, Tuple, Optional, Set, Iterator, Callable, Union
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, ProblemSet, CandidateIndex, ScoreTable, NO_MATCH, apply_teacher_match,
+    refuse_shared_groups,
+)
+from utilization import utilization_summary
+
+# Preferences with ties broken, so that the stable matchings form a lattice:
+# - a teacher ranks auditoriums by get_teacher_preference_score, equal scores by auditorium index
+#   (the order of rank_auditoriums / CandidateIndex.ranked);
+# - an auditorium ranks teachers the way is_teacher_better_match compares them (fit level of the
+#   group's size category, then the larger group), equal teachers by teacher index.
+# Only pairs where the group fits and the teacher has no clash are acceptable, on both sides.
+# A matching stable for these strict preferences is stable for the original ones too.
+# Shared student groups are not modelled: every entry point raises ValueError if teachers share
+# a Group, instead of returning matchings that may double-book it.
+
+
+class AuditoriumRanking:
+    """
+    Every auditorium's strict ranking of the teachers, without a list per auditorium.
+
+    An auditorium's order only depends on its preference table row, so the teachers are sorted
+    once per row (fit level, then size, descending; then index) and position(a) gives each
+    teacher's rank there. Within a fit level the groups that fit a capacity are a suffix found by
+    bisecting, so candidates(a) walks the row's order skipping only clashing teachers.
+    """
+    __slots__ = ("problem", "_order", "_neg_sizes", "_blocks", "_position")
+
+    def __init__(self, problem: ProblemSet):
+        self.problem = problem
+        self._order: List[List[int]] = []
+        self._neg_sizes: List[List[int]] = []
+        self._blocks: List[List[Tuple[int, int]]] = []  # [start, end) of each fit level in _order
+        self._position: List[List[int]] = []
+        sizes, categories = problem.group_size, problem.group_category
+        for fits in problem.preference_tables:
+            order = sorted(range(problem.num_teachers), key=lambda t: (-fits[categories[t]], -sizes[t], t))
+            position = [0] * problem.num_teachers
+            for rank, t in enumerate(order):
+                position[t] = rank
+            blocks, start = [], 0
+            for end in range(1, len(order) + 1):
+                if end == len(order) or fits[categories[order[end]]] != fits[categories[order[start]]]:
+                    blocks.append((start, end))
+                    start = end
+            self._order.append(order)
+            self._neg_sizes.append([-sizes[t] for t in order])
+            self._blocks.append(blocks)
+            self._position.append(position)
+
+    def position(self, a: int) -> List[int]:
+        """Rank of each teacher for auditorium a (lower is preferred), acceptable or not."""
+        return self._position[self.problem.preference_row[a]]
+
+    def candidates(self, a: int) -> Iterator[int]:
+        """The teachers acceptable to auditorium a, best first, generated lazily."""
+        problem = self.problem
+        row, capacity = problem.preference_row[a], problem.capacity[a]
+        order, neg_sizes, bookings = self._order[row], self._neg_sizes[row], problem.bookings
+        day, start, end = problem.day[a], problem.start[a], problem.end[a]
+        for lo, hi in self._blocks[row]:
+            for i in range(bisect_left(neg_sizes, -capacity, lo, hi), hi):
+                t = order[i]
+                if bookings[t] is None or not bookings[t].overlaps(day, start, end):
+                    yield t
+
+
+def teacher_prefers(problem: ProblemSet, t: int, a: int, b: int) -> bool:
+    """Does teacher t strictly prefer auditorium a over b (b may be NO_MATCH)? Ties go to the lower index."""
+    if b == NO_MATCH:
+        return True
+    score_a, score_b = problem.score(t, a), problem.score(t, b)
+    return score_a > score_b or (score_a == score_b and a < b)
+
+
+def teacher_optimal_matching(problem: ProblemSet, ranked: Optional[List[List[int]]] = None,
+                             ranking: Optional[AuditoriumRanking] = None) -> Tuple[List[int], List[int]]:
+    """
+    Teacher-proposing deferred acceptance with the strict preferences above. Returns the
+    teacher_match and, per teacher, the position of their match in ranked[t] (-1 if unmatched).
+    Raises ValueError if teachers share a Group.
+    """
+    refuse_shared_groups(problem, "teacher_optimal_matching")
+    if ranked is None:
+        index = CandidateIndex(problem)
+        ranked = [index.ranked(t) for t in range(problem.num_teachers)]
+    ranking = ranking or AuditoriumRanking(problem)
+    position = [ranking.position(a) for a in range(problem.num_auditoriums)]
+    teacher_match = [NO_MATCH] * problem.num_teachers
+    holder = [NO_MATCH] * problem.num_auditoriums
+    next_proposal = [0] * problem.num_teachers
+    free = deque(range(problem.num_teachers))
+    while free:
+        t = free.popleft()
+        ranked_auditoriums, p = ranked[t], next_proposal[t]
+        while True:
+            try:
+                a = ranked_auditoriums[p]
+            except IndexError:
+                break
+            p += 1
+            current = holder[a]
+            if current == NO_MATCH or position[a][t] < position[a][current]:
+                teacher_match[t], holder[a] = a, t
+                if current != NO_MATCH:
+                    teacher_match[current] = NO_MATCH
+                    free.append(current)
+                break
+        next_proposal[t] = p
+    return teacher_match, [p - 1 if a != NO_MATCH else -1 for a, p in zip(teacher_match, next_proposal)]
+
+
+def auditorium_optimal_matching(problem: ProblemSet, ranking: Optional[AuditoriumRanking] = None) -> List[int]:
+    """
+    Auditorium-proposing deferred acceptance: every free auditorium proposes to the next teacher
+    on its (lazy) ranking, and a teacher keeps the better offer by teacher_prefers. Returns the
+    room-optimal stable matching as a teacher_match (auditorium per teacher, NO_MATCH if none).
+    Raises ValueError if teachers share a Group.
+    """
+    refuse_shared_groups(problem, "auditorium_optimal_matching")
+    ranking = ranking or AuditoriumRanking(problem)
+    teacher_match = [NO_MATCH] * problem.num_teachers
+    held_score = [0.0] * problem.num_teachers
+    scores = [problem.score_row(t) for t in range(problem.num_teachers)]  # Offers always fit: no capacity check
+    score_key = problem.score_key
+    offers = [ranking.candidates(a) for a in range(problem.num_auditoriums)]
+    free = deque(range(problem.num_auditoriums))
+    while free:
+        a = free.popleft()
+        for t in offers[a]:
+            # teacher_prefers(problem, t, a, current), inlined
+            current, score = teacher_match[t], scores[t][score_key[a]]
+            if current == NO_MATCH or score > held_score[t] or (score == held_score[t] and a < current):
+                teacher_match[t], held_score[t] = a, score
+                if current != NO_MATCH:
+                    free.append(current)
+                break
+        # An auditorium whose ranking runs out stays empty
+    return teacher_match
+
+
+def auditorium_proposing_matching(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        score_table: Union[str, ScoreTable, None] = None
+) -> Tuple[Dict[str, Auditorium], Set[str]]:
+    """
+    gale_shapley_matching with the auditoriums proposing: the room-optimal stable matching, as
+    (teacher_matches, unmatched_teachers), with matched auditoriums appended to the schedules.
+    """
+    problem = ProblemSet.from_objects(teachers, auditoriums, score_table)
+    return apply_teacher_match(problem, auditorium_optimal_matching(problem))
+
+
+class Rotation:
+    """
+    A rotation: eliminating it moves teachers[i] from auditoriums[i] to auditoriums[i + 1]
+    (cyclically), the next-best room that prefers them to its holder. It can only be eliminated
+    once the rotations in `predecessors` (indices into StableLattice.rotations) have been.
+    """
+    __slots__ = ("teachers", "auditoriums", "predecessors")
+
+    def __init__(self, teachers: List[int], auditoriums: List[int]):
+        self.teachers, self.auditoriums = teachers, auditoriums
+        self.predecessors: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.teachers)
+
+    def __repr__(self) -> str:
+        return f"Rotation({list(zip(self.teachers, self.auditoriums))})"
+
+
+class StableLattice:
+    """
+    The stable matchings of a ProblemSet, between the teacher-optimal and the room-optimal one.
+
+    The rotations are found once, on one walk from the teacher-optimal matching down to the
+    room-optimal one: each teacher's pointer into their ranked list only moves forward, so this
+    costs about the total length of the lists read. The same walk records which rotations must
+    come before which (the one that last moved a teacher, and the one that first gave a room
+    the teacher skips a holder it prefers). Every stable matching is the teacher-optimal one
+    with a closed set of rotations eliminated, and matchings() generates them lazily, each one
+    from the previous by eliminating or restoring single rotations in place.
+
+    Teachers sharing a Group are not kept apart here, so a problem where they do raises ValueError.
+    """
+
+    def __init__(self, problem: ProblemSet):
+        refuse_shared_groups(problem, "StableLattice")
+        self.problem = problem
+        index = CandidateIndex(problem)
+        self.ranked = [index.ranked(t) for t in range(problem.num_teachers)]
+        self.ranking = AuditoriumRanking(problem)
+        self.teacher_optimal, positions = teacher_optimal_matching(problem, self.ranked, self.ranking)
+        self.auditorium_optimal = auditorium_optimal_matching(problem, self.ranking)
+        self.rotations: List[Rotation] = self._find_rotations(positions)
+
+    def _find_rotations(self, positions: List[int]) -> List[Rotation]:
+        """Walks teacher-optimal -> room-optimal, eliminating exposed rotations in the order found."""
+        ranked, final = self.ranked, self.auditorium_optimal
+        rank = [self.ranking.position(a) for a in range(self.problem.num_auditoriums)]
+        match, positions = list(self.teacher_optimal), list(positions)
+        holder = [NO_MATCH] * self.problem.num_auditoriums
+        for t, a in enumerate(match):
+            if a != NO_MATCH:
+                holder[a] = t
+        first_holder = list(holder)
+        scan = [p + 1 for p in positions]  # Next position to look at for each teacher's next room
+        moved_by = [-1] * len(match)  # Rotation that gave each teacher their current room
+        # Per room, the holders' ranks as they improve (negated, ascending) and the rotation behind each
+        history: Dict[int, Tuple[List[int], List[int]]] = {}
+        rotations: List[Rotation] = []
+
+        def next_room(t: int) -> int:
+            # The first room after t's match that prefers t to its holder; rooms that don't only
+            # get better holders later on, so they are skipped for good
+            ranked_auditoriums, p = ranked[t], scan[t]
+            while True:
+                a = ranked_auditoriums[p]  # Stable matchings guarantee one before the list ends
+                if rank[a][t] < rank[a][holder[a]]:
+                    scan[t] = p
+                    return a
+                p += 1
+
+        def room_history(a: int) -> Tuple[List[int], List[int]]:
+            if a not in history:  # Starts with the teacher-optimal holder, before any rotation (-1)
+                history[a] = ([-rank[a][first_holder[a]]], [-1])
+            return history[a]
+
+        def eliminate(members: List[int]) -> None:
+            rotation = Rotation(members, [match[m] for m in members])
+            r, rooms = len(rotations), rotation.auditoriums
+            for i, m in enumerate(members):
+                if moved_by[m] >= 0:
+                    rotation.predecessors.add(moved_by[m])
+                for p in range(positions[m] + 1, scan[m]):  # Rooms m skips: they must prefer their holders first
+                    a = ranked[m][p]
+                    ranks, by = room_history(a)
+                    first = by[bisect_left(ranks, 1 - rank[a][m])]  # First holder a ranks above m
+                    if first >= 0:  # Else a already held someone it prefers to m before any rotation
+                        rotation.predecessors.add(first)
+                new = rooms[(i + 1) % len(members)]
+                match[m], holder[new], moved_by[m] = new, m, r
+                positions[m] = scan[m]
+                scan[m] += 1
+                ranks, by = room_history(new)
+                ranks.append(-rank[new][m])
+                by.append(r)
+            rotations.append(rotation)
+
+        stack: List[int] = []
+        on_stack: Dict[int, int] = {}
+        for start in range(self.problem.num_teachers):
+            while stack or match[start] != final[start]:
+                if not stack:
+                    on_stack[start] = 0
+                    stack.append(start)
+                t = holder[next_room(stack[-1])]
+                if t not in on_stack:
+                    on_stack[t] = len(stack)
+                    stack.append(t)
+                    continue
+                # A cycle: the stack from t up is an exposed rotation
+                members = stack[on_stack[t]:]
+                del stack[on_stack[t]:]
+                for m in members:
+                    del on_stack[m]
+                eliminate(members)
+        return rotations
+
+    def matchings(self) -> Iterator[List[int]]:
+        """
+        Every stable matching (as a fresh teacher_match list) exactly once, starting with the
+        teacher-optimal one. The rotations were found in an order compatible with their
+        precedence, so a closed set is reached once by eliminating its rotations in that order:
+        the walk only eliminates an exposed rotation (all predecessors eliminated) that comes
+        after the last one it eliminated, and backtracks by restoring it.
+        """
+        rotations = self.rotations
+        successors: List[List[int]] = [[] for _ in rotations]
+        waiting = [len(rotation.predecessors) for rotation in rotations]  # Predecessors not eliminated yet
+        for r, rotation in enumerate(rotations):
+            for p in rotation.predecessors:
+                successors[p].append(r)
+        exposed = [r for r, count in enumerate(waiting) if count == 0]  # Sorted
+        match = list(self.teacher_optimal)
+        yield list(match)
+        path: List[int] = []
+        after = -1  # Only rotations after this one may be eliminated next
+        while True:
+            i = bisect_right(exposed, after)
+            if i < len(exposed):
+                r = exposed.pop(i)
+                rooms = rotations[r].auditoriums
+                for k, t in enumerate(rotations[r].teachers):
+                    match[t] = rooms[(k + 1) % len(rooms)]
+                for s in successors[r]:
+                    waiting[s] -= 1
+                    if not waiting[s]:
+                        insort(exposed, s)
+                path.append(r)
+                after = r
+                yield list(match)
+                continue
+            if not path:
+                return
+            r = path.pop()
+            for s in successors[r]:
+                if not waiting[s]:
+                    del exposed[bisect_left(exposed, s)]
+                waiting[s] += 1
+            insort(exposed, r)
+            for t, a in zip(rotations[r].teachers, rotations[r].auditoriums):
+                match[t] = a
+            after = r
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return self.matchings()
+
+
+def best_stable_matching(problem: ProblemSet, key: Optional[Callable[[List[int]], float]] = None,
+                         limit: Optional[int] = None) -> List[int]:
+    """
+    The stable matching with the highest key(teacher_match), by default the utilization (seated
+    students / seats held: every stable matching seats the same teachers, so this favours the
+    tighter rooms), among the first `limit` of the lattice's matchings (all of them by default;
+    there can be exponentially many).
+    """
+    if key is None:
+        key = lambda teacher_match: utilization_summary(problem, teacher_match)["utilization"]
+    best, best_key = None, None
+    for count, teacher_match in enumerate(StableLattice(problem).matchings()):
+        if limit is not None and count >= limit:
+            break
+        value = key(teacher_match)
+        if best_key is None or value > best_key:
+            best, best_key = teacher_match, value
+    return best
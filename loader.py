@@ -0,0 +1,221 @@
+# loader.py
+
+import csv
+import json
+import os
+from array import array
+from datetime import time
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Any, Union
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod, ProblemSet, IntervalIndex, ScoreTable, PERIODS,
+)
+
+Row = Dict[str, Any]
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+def read_rows(path: str) -> Iterator[Row]:
+    """
+    Streams rows from a CSV file (with a header line) or a JSON-lines file, one dict per row.
+
+    The format is picked from the extension (.jsonl / .ndjson, anything else is read as CSV).
+    Only the current row is held in memory.
+    """
+    with open(path, newline="", encoding="utf-8") as rows:
+        if os.path.splitext(path)[1].lower() in JSON_LINES_EXTENSIONS:
+            for line in rows:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(rows)
+
+
+def parse_time_period(value: Union[str, TimePeriod]) -> TimePeriod:
+    """Accepts a TimePeriod, its name in any case ("morning") or its value ("Morning (<12:00)")."""
+    if isinstance(value, TimePeriod):
+        return value
+    try:
+        return TimePeriod[value.strip().upper()]
+    except KeyError:
+        return TimePeriod(value.strip())
+
+
+_TIME_PERIODS: Dict[str, TimePeriod] = {}  # Spellings seen so far
+
+
+def _time_period(value: Union[str, TimePeriod]) -> TimePeriod:
+    period = _TIME_PERIODS.get(value)
+    if period is None:
+        period = parse_time_period(value)
+        if isinstance(value, str):
+            _TIME_PERIODS[value] = period
+    return period
+
+
+class ProblemLoader:
+    """
+    Builds a ProblemSet from auditorium and teacher rows without creating model objects.
+
+    Auditorium rows need name, capacity, day, start and end (HH:MM or HH:MM:SS). Teacher rows need
+    name, surname, group, students and time_preference, plus optional bookings: existing schedule
+    entries as "Day HH:MM-HH:MM", separated by ";" in CSV or as a list in JSON lines.
+
+    Rows go straight into the ProblemSet columns. Time slots are parsed once per distinct
+    (start, end), groups are stored once per distinct (group, students) and teachers with the same
+    bookings share one IntervalIndex, so a large export only keeps the columns, the names and one
+    entry per distinct slot, group and schedule. Teacher, Group and
+    Auditorium objects are built on first access through problem.teacher(i) / problem.auditorium(j),
+    with interned TimeSlots and Groups shared between them. A teacher built that way gets their
+    bookings back as Auditoriums named "Existing booking". Rows with the same (group, students)
+    teach the same group, which the matcher never double-books (see GroupBookings).
+    """
+
+    def __init__(self, score_table: Union[str, ScoreTable, None] = None):
+        self.problem = ProblemSet(score_table)
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._slots_by_seconds: Dict[Tuple[int, int], TimeSlot] = {}
+        self.time_slots: List[TimeSlot] = []
+        self._groups: Dict[Tuple[str, int], int] = {}
+        self.group_names: List[str] = []
+        self.group_sizes: List[int] = []
+        self._group_objects: Dict[int, Group] = {}
+        self._bookings_index: Dict[Union[str, Tuple[str, ...]], IntervalIndex] = {}
+        # Per-row columns only needed to build the object views
+        self.auditorium_names: List[str] = []
+        self.auditorium_slot = array("i")
+        self.teacher_first_names: List[str] = []
+        self.teacher_group = array("i")
+        self.problem.set_view_factories(self._build_teacher, self._build_auditorium)
+
+    def fork(self) -> 'ProblemLoader':
+        """
+        A loader holding a copy of this one's auditoriums and no teachers (see
+        ProblemSet.auditoriums_only), so one parsed inventory can take several sets of teacher rows.
+        """
+        fork = ProblemLoader.__new__(ProblemLoader)
+        fork.problem = self.problem.auditoriums_only()
+        fork._slots, fork._slots_by_seconds = dict(self._slots), dict(self._slots_by_seconds)
+        fork.time_slots = list(self.time_slots)
+        fork._groups, fork.group_names, fork.group_sizes, fork._group_objects = {}, [], [], {}
+        fork._bookings_index = {}
+        fork.auditorium_names, fork.auditorium_slot = list(self.auditorium_names), self.auditorium_slot[:]
+        fork.teacher_first_names, fork.teacher_group = [], array("i")
+        fork.problem.set_view_factories(fork._build_teacher, fork._build_auditorium)
+        return fork
+
+    # --- Interning ---
+
+    def time_slot(self, start: str, end: str) -> int:
+        """Index of the interned TimeSlot for start-end (strings as found in the file)."""
+        key = (start, end)
+        index = self._slots.get(key)
+        if index is None:
+            index = self._slots[key] = len(self.time_slots)
+            slot = TimeSlot(time.fromisoformat(start.strip()), time.fromisoformat(end.strip()))
+            self.time_slots.append(slot)
+            self._slots_by_seconds.setdefault((slot.start_time_seconds, slot.end_time_seconds), slot)
+        return index
+
+    def group(self, name: str, students: int) -> int:
+        key = (name, students)
+        index = self._groups.get(key)
+        if index is None:
+            if students <= 0:
+                raise ValueError("Number of students must be positive.")
+            index = self._groups[key] = len(self.group_names)
+            self.group_names.append(name)
+            self.group_sizes.append(students)
+        return index
+
+    # --- Rows ---
+
+    def add_auditorium_rows(self, rows: Iterable[Row]) -> int:
+        """Appends auditorium rows; returns how many were added."""
+        problem, time_slot = self.problem, self.time_slot
+        names, slot_column, slots = self.auditorium_names, self.auditorium_slot, self.time_slots
+        count = 0
+        for line, row in enumerate(rows, start=1):
+            try:
+                name = row["name"]
+                slot = time_slot(row["start"], row["end"])
+                problem.add_auditorium_columns(int(row["capacity"]), row["day"], slots[slot])
+            except (KeyError, TypeError, ValueError) as error:
+                raise ValueError(f"Invalid auditorium row {line}: {error}") from error
+            names.append(name)
+            slot_column.append(slot)
+            count += 1
+        return count
+
+    def add_teacher_rows(self, rows: Iterable[Row]) -> int:
+        """Appends teacher rows; returns how many were added."""
+        problem, group = self.problem, self.group
+        first_names, group_column = self.teacher_first_names, self.teacher_group
+        count = 0
+        for line, row in enumerate(rows, start=1):
+            try:
+                name = row["name"]
+                g = group(row["group"], int(row["students"]))
+                bookings = self._bookings(row.get("bookings"))
+                problem.add_teacher_columns(f"{name} {row['surname']}", self.group_sizes[g],
+                                            _time_period(row["time_preference"]), bookings, group=g)
+            except (KeyError, TypeError, ValueError) as error:
+                raise ValueError(f"Invalid teacher row {line}: {error}") from error
+            first_names.append(name)
+            group_column.append(g)
+            count += 1
+        return count
+
+    def _bookings(self, value: Union[None, str, List[str]]) -> Optional[IntervalIndex]:
+        if not value:
+            return None
+        key = value if isinstance(value, str) else tuple(value)
+        bookings = self._bookings_index.get(key)
+        if bookings is None:
+            bookings = self._bookings_index[key] = IntervalIndex()
+            for entry in (value.split(";") if isinstance(value, str) else value):
+                day, _, times = entry.strip().rpartition(" ")
+                start, _, end = times.partition("-")
+                slot = self.time_slots[self.time_slot(start, end)]
+                bookings.add(self.problem.day_code(day.strip()), slot.start_time_seconds, slot.end_time_seconds)
+        return bookings
+
+    # --- Object views ---
+
+    def _build_auditorium(self, a: int) -> Auditorium:
+        problem = self.problem
+        return Auditorium(self.auditorium_names[a], problem.capacity[a], problem.day_names[problem.day[a]],
+                          self.time_slots[self.auditorium_slot[a]])
+
+    def _build_group(self, g: int) -> Group:
+        group = self._group_objects.get(g)
+        if group is None:
+            group = self._group_objects[g] = Group(self.group_names[g], self.group_sizes[g])
+        return group
+
+    def _build_teacher(self, t: int) -> Teacher:
+        problem = self.problem
+        name = self.teacher_first_names[t]
+        surname = problem.teacher_names[t][len(name) + 1:]
+        group = self._build_group(self.teacher_group[t])
+        schedule = []
+        if problem.bookings[t] is not None:
+            for day, start, end in problem.bookings[t].intervals():
+                schedule.append(Auditorium("Existing booking", group.num_students, problem.day_names[day],
+                                           self._slots_by_seconds[start, end]))
+        return Teacher(name, surname, group, PERIODS[problem.time_preference[t]], schedule)
+
+
+def load_problem(teachers_path: str, auditoriums_path: str,
+                 score_table: Union[str, ScoreTable, None] = None) -> ProblemLoader:
+    """
+    Streams both files into a ProblemLoader (see read_rows for the formats).
+
+    The matcher runs on loader.problem directly, e.g. match_problem(loader.problem); the result
+    indices map back through problem.teacher_names and problem.auditorium(j).
+    """
+    loader = ProblemLoader(score_table)
+    loader.add_auditorium_rows(read_rows(auditoriums_path))
+    loader.add_teacher_rows(read_rows(teachers_path))
+    return loader
@@ -0,0 +1,98 @@
+# parallel_matching.py
+
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional, Set, Iterable
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, ProblemSet, ProposalOrder, NO_MATCH, match_problem,
+)
+
+
+def _match_shard(problem: ProblemSet, order: ProposalOrder, seed: int) -> array:
+    """Worker entry point: the shard arrives as a pickled ProblemSet (arrays only, no objects)."""
+    return array("i", match_problem(problem, order=order, seed=seed))
+
+
+def _day_shards(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        days_by_teacher: Optional[Dict[str, Iterable[str]]]
+) -> Dict[str, ProblemSet]:
+    """One ProblemSet per day, holding that day's auditoriums and the teachers who need a room that day."""
+    auditoriums_by_day: Dict[str, List[Auditorium]] = {}
+    for aud in auditoriums:
+        auditoriums_by_day.setdefault(aud.day, []).append(aud)
+
+    shards = {}
+    for day, day_auditoriums in auditoriums_by_day.items():
+        if days_by_teacher is None:
+            day_teachers = teachers
+        else:
+            day_teachers = {name: teacher for name, teacher in teachers.items() if day in days_by_teacher.get(name, ())}
+        shards[day] = ProblemSet.from_objects(day_teachers, day_auditoriums)
+    return shards
+
+
+def match_per_day(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        days_by_teacher: Optional[Dict[str, Iterable[str]]] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0
+) -> Dict[str, Tuple[Dict[str, Auditorium], Set[str]]]:
+    """
+    Per-day assignment mode: each teacher gets (at most) one auditorium on every day they teach.
+
+    Auditoriums belong to a single day, so the instance splits into independent per-day
+    subproblems. Each day is matched as its own gale_shapley_matching run in a process pool; only
+    the ProblemSet arrays are pickled to the workers, and the results are mapped back to objects here.
+
+    Args:
+        teachers: Dictionary of teachers (key: full_name, value: Teacher object).
+        auditoriums: List of available Auditorium objects, across all days.
+        days_by_teacher: Optional days each teacher needs a room (default: every day with auditoriums).
+        max_workers: Pool size when no executor is given; 1 runs the shards serially in-process.
+        executor: Optional executor to reuse across calls.
+        order, seed: Proposal order for every shard (see gale_shapley_matching).
+
+    Returns:
+        A dict keyed by day, in order of first appearance in auditoriums, whose values have the
+        gale_shapley_matching shape: (teacher_matches, unmatched_teachers) for that day.
+
+    The days are not merged into a single (teacher_matches, unmatched_teachers): a teacher
+    teaching on several days holds one auditorium per day, which a name -> Auditorium dict cannot
+    hold, and "unmatched" only means something per day (matched on Monday, unmatched on Tuesday).
+    Every auditorium is still appended to its teacher's schedule, so the week's timetable is
+    there. Shards only split the problem when teachers need a room per day; for one auditorium
+    per teacher across the week the days compete for the same teachers, and that is a single
+    gale_shapley_matching run.
+    """
+    shards = _day_shards(teachers, auditoriums, days_by_teacher)
+
+    if executor is None and (max_workers == 1 or len(shards) <= 1):
+        results = {day: match_problem(problem, order=order, seed=seed) for day, problem in shards.items()}
+    elif executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {day: pool.submit(_match_shard, problem, order, seed) for day, problem in shards.items()}
+            results = {day: future.result() for day, future in futures.items()}
+    else:
+        futures = {day: executor.submit(_match_shard, problem, order, seed) for day, problem in shards.items()}
+        results = {day: future.result() for day, future in futures.items()}
+
+    per_day = {}
+    for day, problem in shards.items():
+        teacher_matches: Dict[str, Auditorium] = {}
+        unmatched: Set[str] = set()
+        for t, a in enumerate(results[day]):
+            name = problem.teacher_names[t]
+            if a == NO_MATCH:
+                unmatched.add(name)
+            else:
+                auditorium = problem.auditorium(a)
+                problem.teacher(t).schedule.append(auditorium)
+                teacher_matches[name] = auditorium
+        per_day[day] = (teacher_matches, unmatched)
+    return per_day
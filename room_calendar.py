@@ -0,0 +1,148 @@
+# room_calendar.py
+
+from array import array
+from bisect import bisect_right
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Sequence, Set, Union
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Teacher, ProblemSet, ProposalOrder, MatchingStats, ScoreTable,
+    match_problem, apply_teacher_match,
+)
+
+WeeklyTemplate = Dict[str, Sequence[TimeSlot]]  # Day -> slots the room is open in, every week
+SlotKey = Tuple[str, int, int]  # (day, start seconds, end seconds)
+
+
+def weekly_template(days: Iterable[str], slots: Sequence[TimeSlot]) -> WeeklyTemplate:
+    """The same slots on every day; the slot tuple is shared between the days (and the rooms using it)."""
+    slots = tuple(slots)
+    return {day: slots for day in days}
+
+
+def _slot_key(day: str, slot: TimeSlot) -> SlotKey:
+    return day, slot.start_time_seconds, slot.end_time_seconds
+
+
+class RoomCalendar:
+    """
+    A room and when it can be booked: a weekly template with exceptions.
+
+    closed holds days ("Friday") and (day, TimeSlot) pairs taken out of the template, extra holds
+    (day, TimeSlot) pairs added to it. Nothing is expanded up front: slots() yields the bookable
+    (day, TimeSlot) pairs on demand, and the template is shared, not copied, so rooms with the
+    same opening hours cost one dict between them.
+    """
+    __slots__ = ("name", "capacity", "template", "closed_days", "closed_slots", "extra")
+
+    def __init__(self, name: str, capacity: int, template: WeeklyTemplate,
+                 closed: Iterable[Union[str, Tuple[str, TimeSlot]]] = (),
+                 extra: Iterable[Tuple[str, TimeSlot]] = ()):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive.")
+        self.name = name
+        self.capacity = capacity
+        self.template = template
+        self.closed_days: Set[str] = set()
+        self.closed_slots: Set[SlotKey] = set()
+        for exception in closed:
+            if isinstance(exception, str):
+                self.closed_days.add(exception)
+            else:
+                self.closed_slots.add(_slot_key(*exception))
+        self.extra: List[Tuple[str, TimeSlot]] = list(extra)
+
+    def close(self, day: str, slot: Optional[TimeSlot] = None) -> None:
+        """Takes a whole day, or one slot on it, out of the calendar."""
+        if slot is None:
+            self.closed_days.add(day)
+        else:
+            self.closed_slots.add(_slot_key(day, slot))
+
+    def is_open(self, day: str, slot: TimeSlot) -> bool:
+        key = _slot_key(day, slot)
+        if day in self.closed_days or key in self.closed_slots:
+            return False
+        return (any(_slot_key(day, s) == key for s in self.template.get(day, ()))
+                or any(_slot_key(d, s) == key for d, s in self.extra))
+
+    def slots(self) -> Iterator[Tuple[str, TimeSlot]]:
+        """Bookable (day, TimeSlot) pairs: the template days in order, then the extra slots."""
+        closed_days, closed_slots = self.closed_days, self.closed_slots
+        for day, day_slots in self.template.items():
+            if day in closed_days:
+                continue
+            for slot in day_slots:
+                if not closed_slots or _slot_key(day, slot) not in closed_slots:
+                    yield day, slot
+        for day, slot in self.extra:
+            if day not in closed_days and _slot_key(day, slot) not in closed_slots:
+                yield day, slot
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.slots())
+
+
+class RoomInventory:
+    """
+    Room calendars, expanded into auditorium columns of a ProblemSet without building Auditoriums.
+
+    problem() streams each room's open slots straight into the columns, room by room, and only
+    remembers where each room's auditoriums start. An Auditorium is built when
+    problem.auditorium(a) first asks for it (e.g. for a matched room), from the room's calendar and
+    its own TimeSlot object.
+    """
+
+    def __init__(self, calendars: Iterable[RoomCalendar] = ()):
+        self.calendars: List[RoomCalendar] = list(calendars)
+
+    def add(self, calendar: RoomCalendar) -> int:
+        self.calendars.append(calendar)
+        return len(self.calendars) - 1
+
+    def room_slots(self) -> Iterator[Tuple[RoomCalendar, str, TimeSlot]]:
+        """Every bookable (room, day, slot), generated room by room."""
+        for calendar in self.calendars:
+            for day, slot in calendar.slots():
+                yield calendar, day, slot
+
+    def __len__(self) -> int:
+        return sum(len(calendar) for calendar in self.calendars)
+
+    def problem(self, score_table: Union[str, ScoreTable, None] = None) -> ProblemSet:
+        """A ProblemSet holding every open room-slot as an auditorium (in room_slots order) and no teachers."""
+        problem = ProblemSet(score_table)
+        room_first = array("i")  # First auditorium index of each room
+        for calendar in self.calendars:
+            room_first.append(problem.num_auditoriums)
+            problem.add_auditorium_slots(calendar.capacity, calendar.slots())
+        calendars = self.calendars[:]
+
+        def auditorium(a: int) -> Auditorium:
+            calendar = calendars[bisect_right(room_first, a) - 1]
+            key = (problem.day_names[problem.day[a]], problem.start[a], problem.end[a])
+            for day, slot in calendar.slots():
+                if _slot_key(day, slot) == key:
+                    return Auditorium(calendar.name, calendar.capacity, day, slot)
+            raise LookupError(f"{calendar.name} no longer has the slot of auditorium {a}")
+
+        problem.set_view_factories(auditorium_factory=auditorium)
+        return problem
+
+
+def calendar_matching(
+        teachers: Dict[str, Teacher],
+        inventory: RoomInventory,
+        order: ProposalOrder = ProposalOrder.INSERTION,
+        seed: int = 0,
+        stats: Optional[MatchingStats] = None,
+        score_table: Union[str, ScoreTable, None] = None
+) -> Tuple[Dict[str, Auditorium], Set[str]]:
+    """
+    gale_shapley_matching against a RoomInventory instead of a list of Auditoriums. Returns the
+    same (teacher_matches, unmatched_teachers); only the matched room-slots become Auditoriums.
+    """
+    problem = inventory.problem(score_table)
+    for name, teacher in teachers.items():
+        problem.add_teacher(name, teacher)
+    teacher_match = match_problem(problem, order=order, seed=seed, stats=stats)
+    return apply_teacher_match(problem, teacher_match)
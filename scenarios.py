@@ -0,0 +1,203 @@
+# scenarios.py
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional, Set, Iterable, Iterator, Union
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, TimePeriod, ProblemSet, CandidateIndex, LazyRanking, ProposalOrder, ScoreTable,
+    NO_MATCH, match_problem,
+)
+
+# A scenario in index form, as sent to the workers: closed auditoriums, removed teachers,
+# {teacher: group size}, {teacher: TimePeriod}
+Variant = Tuple[Set[int], Set[int], Dict[int, int], Dict[int, TimePeriod]]
+# A scenario result as returned by the workers: (teacher, baseline auditorium, scenario auditorium)
+# for every changed teacher, flattened into one array, then matched count and total score
+Outcome = Tuple[array, int, float]
+_CHUNK = 16  # Entries read at a time from a shared ranked list when filtering out closed rooms
+
+
+class Scenario:
+    """
+    A what-if change to the base problem, by name: auditoriums closed (Auditorium objects or
+    indices), teachers removed, and new group sizes or time preferences for some teachers.
+    """
+    __slots__ = ("name", "closed", "removed", "group_sizes", "time_preferences")
+
+    def __init__(self, name: str, closed: Iterable[Union[Auditorium, int]] = (), removed: Iterable[str] = (),
+                 group_sizes: Optional[Dict[str, int]] = None,
+                 time_preferences: Optional[Dict[str, TimePeriod]] = None):
+        self.name = name
+        self.closed = list(closed)
+        self.removed = list(removed)
+        self.group_sizes = dict(group_sizes or {})
+        self.time_preferences = dict(time_preferences or {})
+
+
+class ScenarioResult:
+    """
+    One scenario's matching and its diff against the baseline: `changes` lists (teacher,
+    baseline auditorium, scenario auditorium) indices (NO_MATCH for none) for the teachers whose
+    room changed, so the full matching is the baseline with those entries replaced.
+    """
+    __slots__ = ("name", "problem", "baseline", "changes", "matched", "total_score")
+
+    def __init__(self, name: str, problem: ProblemSet, baseline: List[int], outcome: Outcome):
+        flat, self.matched, self.total_score = outcome
+        self.name = name
+        self.problem = problem
+        self.baseline = baseline
+        self.changes: List[Tuple[int, int, int]] = [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+
+    @property
+    def teacher_match(self) -> List[int]:
+        teacher_match = list(self.baseline)
+        for t, _, after in self.changes:
+            teacher_match[t] = after
+        return teacher_match
+
+    def named_changes(self) -> List[Tuple[str, Optional[Auditorium], Optional[Auditorium]]]:
+        """(teacher, baseline auditorium, scenario auditorium), None for unmatched."""
+        view = lambda a: None if a == NO_MATCH else self.problem.auditorium(a)
+        return [(self.problem.teacher_names[t], view(before), view(after)) for t, before, after in self.changes]
+
+    def matches(self) -> Tuple[Dict[str, Auditorium], Set[str]]:
+        """
+        The scenario's (teacher_matches, unmatched_teachers), as gale_shapley_matching returns them
+        but without touching any schedule. Removed teachers count as unmatched.
+        """
+        teacher_matches, unmatched = {}, set()
+        for t, a in enumerate(self.teacher_match):
+            name = self.problem.teacher_names[t]
+            if a == NO_MATCH:
+                unmatched.add(name)
+            else:
+                teacher_matches[name] = self.problem.auditorium(a)
+        return teacher_matches, unmatched
+
+    def __str__(self) -> str:
+        return f"{self.name}: {len(self.changes)} teachers changed, {self.matched} matched, score {self.total_score:g}"
+
+
+def _without(ranking: List[int], closed: Set[int]) -> Iterator[List[int]]:
+    """Chunks of a (lazy) ranked list with the closed auditoriums left out, read as far as needed."""
+    position = 0
+    while True:
+        chunk = ranking[position:position + _CHUNK] if isinstance(ranking, list) else _read(ranking, position)
+        if not chunk:
+            return
+        position += len(chunk)
+        yield [a for a in chunk if a not in closed]
+
+
+def _read(ranking: LazyRanking, position: int) -> List[int]:
+    chunk = []
+    try:
+        for i in range(position, position + _CHUNK):
+            chunk.append(ranking[i])
+    except IndexError:
+        pass
+    return chunk
+
+
+def run_variant(index: CandidateIndex, ranked: List[List[int]], baseline: List[int], variant: Variant,
+                order: ProposalOrder = ProposalOrder.INSERTION, seed: int = 0) -> Outcome:
+    """
+    Matches one variant of index.problem. `ranked` holds the base problem's ranked lists, lazily
+    built and shared by every variant: a teacher the variant doesn't edit reads their list (with
+    closed rooms filtered out) instead of ranking again, and only edited teachers are ranked from
+    the index, whose capacity buckets and per-score levels are shared too. Returns the Outcome
+    (the diff against baseline).
+    """
+    closed, removed, group_sizes, time_preferences = variant
+    problem, edited = index.problem, set(group_sizes) | set(time_preferences)
+    if edited:
+        problem = problem.teacher_variant()
+        for t in edited:
+            problem.set_teacher_columns(t, group_sizes.get(t), time_preferences.get(t))
+    bound = index.for_problem(problem)
+    variant_ranked = []
+    for t in range(problem.num_teachers):
+        if t in removed:
+            variant_ranked.append([])
+        elif t in edited:
+            variant_ranked.append(LazyRanking(([a for a in level if a not in closed] for level in
+                                               bound.candidate_levels(t)) if closed else bound.candidate_levels(t)))
+        elif closed:
+            variant_ranked.append(LazyRanking(_without(ranked[t], closed)))
+        else:
+            variant_ranked.append(ranked[t])
+    teacher_match = match_problem(problem, variant_ranked, order, seed)
+    changes = array("i")
+    matched, total_score = 0, 0.0
+    for t, (before, after) in enumerate(zip(baseline, teacher_match)):
+        if after != before:
+            changes.extend((t, before, after))
+        if after != NO_MATCH:
+            matched += 1
+            total_score += problem.score(t, after)
+    return changes, matched, total_score
+
+
+# Worker state, set once per process by _init_worker so that each task only carries its variants
+_shared: Optional[Tuple[CandidateIndex, List[LazyRanking], List[int], ProposalOrder, int]] = None
+
+
+def _init_worker(problem: ProblemSet, baseline: List[int], order: ProposalOrder, seed: int) -> None:
+    global _shared
+    index = CandidateIndex(problem)
+    _shared = (index, [index.ranked(t) for t in range(problem.num_teachers)], baseline, order, seed)
+
+
+def _run_variants(variants: List[Variant]) -> List[Outcome]:
+    index, ranked, baseline, order, seed = _shared
+    return [run_variant(index, ranked, baseline, variant, order, seed) for variant in variants]
+
+
+class ScenarioRunner:
+    """
+    Runs many what-if variants of one base problem.
+
+    The base ProblemSet, its CandidateIndex, the ranked lists and the baseline matching are built
+    once. Each scenario only edits what it names (see run_variant), and results come back as
+    diffs against the baseline. With max_workers > 1 the scenarios are split into chunks over a
+    process pool whose workers receive the base problem once, at start-up, and keep their own
+    shared ranked lists; a chunk only carries the index form of its scenarios and returns diffs.
+    """
+
+    def __init__(self, teachers: Dict[str, Teacher], auditoriums: List[Auditorium],
+                 order: ProposalOrder = ProposalOrder.INSERTION, seed: int = 0,
+                 score_table: Union[str, ScoreTable, None] = None):
+        self.problem = ProblemSet.from_objects(teachers, auditoriums, score_table)
+        self.order, self.seed = order, seed
+        self.index = CandidateIndex(self.problem)
+        self.ranked = [self.index.ranked(t) for t in range(self.problem.num_teachers)]
+        self.baseline = match_problem(self.problem, self.ranked, order, seed)
+        self._teacher_index = {name: t for t, name in enumerate(self.problem.teacher_names)}
+
+    def variant(self, scenario: Scenario) -> Variant:
+        """The scenario in index form; KeyError for an unknown teacher or auditorium."""
+        problem, teacher = self.problem, self._teacher_index
+        closed = {a if isinstance(a, int) else problem.auditorium_index(a) for a in scenario.closed}
+        return (closed, {teacher[name] for name in scenario.removed},
+                {teacher[name]: size for name, size in scenario.group_sizes.items()},
+                {teacher[name]: TimePeriod(period) for name, period in scenario.time_preferences.items()})
+
+    def run(self, scenarios: List[Scenario], max_workers: Optional[int] = 1,
+            chunks_per_worker: int = 4) -> List[ScenarioResult]:
+        """One ScenarioResult per scenario, in order. max_workers=None uses one worker per CPU."""
+        variants = [self.variant(scenario) for scenario in scenarios]
+        if max_workers == 1 or len(variants) <= 1:
+            outcomes = [run_variant(self.index, self.ranked, self.baseline, variant, self.order, self.seed)
+                        for variant in variants]
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            size = max(1, len(variants) // (workers * chunks_per_worker))
+            chunks = [variants[i:i + size] for i in range(0, len(variants), size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.problem, self.baseline, self.order, self.seed)) as pool:
+                outcomes = [outcome for chunk in pool.map(_run_variants, chunks) for outcome in chunk]
+        return [ScenarioResult(scenario.name, self.problem, self.baseline, outcome)
+                for scenario, outcome in zip(scenarios, outcomes)]
@@ -0,0 +1,286 @@
+# score_cache.py
+
+import hashlib
+import json
+import os
+from typing import List, Dict, Optional, Set
+
+import numpy as np
+
+from gale_shapley_matching import Auditorium, Teacher, ProblemSet
+
+CACHE_VERSION = 1
+INDEX_FILE = "index.json"
+SCORES_FILE = "scores.f32"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+UNKNOWN = np.float32(np.nan)  # Entry not computed yet (e.g. the column was added after the row)
+INFEASIBLE = np.float32(-1)  # Group doesn't fit or the slot conflicts with the teacher's schedule
+
+
+def _digest(*parts) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def teacher_fingerprint(problem: ProblemSet, t: int) -> str:
+    """Everything a teacher's score row depends on: group size, time preference, bookings and time weights."""
+    bookings = problem.bookings[t]
+    booked = () if bookings is None else tuple(sorted(
+        (problem.day_names[day], start, end) for day, start, end in bookings.intervals()))
+    return _digest(problem.group_size[t], problem.score_table.time_table[problem.time_preference[t]], booked)
+
+
+def auditorium_fingerprint(problem: ProblemSet, a: int) -> str:
+    """Everything an auditorium's score column depends on: capacity, preferences, day and time slot."""
+    row = problem.preference_row[a]
+    return _digest(problem.capacity[a], problem.preference_tables[row], problem.size_scores[row],
+                   problem.period[a], problem.day_names[problem.day[a]], problem.start[a], problem.end[a])
+
+
+def _scoring_fingerprint() -> str:
+    # Score tables are part of the fingerprints themselves, so only the file format invalidates the cache
+    return _digest(CACHE_VERSION)
+
+
+class ScoreCache:
+    """
+    On-disk cache of teacher x auditorium scores, shared between runs on similar inputs.
+
+    Scores live in a float32 matrix memory-mapped from `directory/scores.f32`: one row per distinct
+    teacher fingerprint and one column per auditorium fingerprint (teacher_fingerprint /
+    auditorium_fingerprint), with -1 where the teacher can't use the auditorium (capacity or schedule
+    conflict) and NaN where the pair hasn't been computed. `directory/index.json` maps fingerprints
+    to rows and columns. A run only computes rows for new or changed teachers and the NaN entries of
+    known rows (columns for new or changed auditoriums), and sorts the rest straight from the map.
+
+    Rows are evicted least recently used so the file stays under max_bytes; columns whose
+    auditorium hasn't been seen in `column_ttl` runs are dropped the next time the matrix is resized.
+    Weights are part of the fingerprints (time weights in the teacher's, size weights in the
+    auditorium's), so runs with different ScoreTables share the directory without mixing up scores.
+    One process at a time may use a directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, column_ttl: int = 10):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.column_ttl = column_ttl
+        self.hits = self.misses = self.partial_hits = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    # --- Persistence ---
+
+    @property
+    def _scores_path(self) -> str:
+        return os.path.join(self.directory, SCORES_FILE)
+
+    def _load_index(self) -> None:
+        index = None
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            pass
+        if index is None or index.get("scoring") != _scoring_fingerprint() or not os.path.exists(self._scores_path):
+            index = {"scoring": _scoring_fingerprint(), "run": 0, "row_capacity": 0, "columns": [],
+                     "column_used": [], "rows": {}}
+        self.run: int = index["run"]
+        self.row_capacity: int = index["row_capacity"]
+        self.columns: List[str] = index["columns"]
+        self.column_used: List[int] = index["column_used"]
+        self.rows: Dict[str, List[int]] = index["rows"]  # fingerprint -> [row, last run used]
+        self._column_of = {fingerprint: c for c, fingerprint in enumerate(self.columns)}
+        self._scores = self._open(self.row_capacity, len(self.columns), "r+") if self.row_capacity else None
+
+    def flush(self) -> None:
+        """Writes the matrix and the index to disk."""
+        if self._scores is not None:
+            self._scores.flush()
+        index = {"scoring": _scoring_fingerprint(), "run": self.run, "row_capacity": self.row_capacity,
+                 "columns": self.columns, "column_used": self.column_used, "rows": self.rows}
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+        os.replace(path + ".tmp", path)
+
+    def close(self) -> None:
+        self.flush()
+        self._scores = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open(self, rows: int, columns: int, mode: str, path: Optional[str] = None) -> np.memmap:
+        return np.memmap(path or self._scores_path, dtype=np.float32, mode=mode, shape=(rows, max(columns, 1)))
+
+    def _resize(self, rows: int, columns: List[str]) -> None:
+        """Rewrites the matrix with `rows` rows and the given columns (kept values are copied over)."""
+        keep = [(new, self._column_of[fingerprint]) for new, fingerprint in enumerate(columns)
+                if fingerprint in self._column_of]
+        path = self._scores_path + ".tmp"
+        resized = self._open(rows, len(columns), "w+", path)
+        resized[:] = UNKNOWN
+        if self._scores is not None and keep:
+            new_columns, old_columns = (list(c) for c in zip(*keep))
+            copied = min(rows, self.row_capacity)
+            resized[:copied, new_columns] = self._scores[:copied, old_columns]
+        resized.flush()
+        del resized
+        self._scores = None
+        os.replace(path, self._scores_path)
+        self.row_capacity = rows
+        self._scores = self._open(rows, len(columns), "r+")
+
+    # --- Lookup ---
+
+    def _columns_for(self, problem: ProblemSet) -> np.ndarray:
+        """Cache column of every auditorium of the problem, adding (and resizing for) new ones."""
+        fingerprints = [auditorium_fingerprint(problem, a) for a in range(problem.num_auditoriums)]
+        new = [fingerprint for fingerprint in dict.fromkeys(fingerprints) if fingerprint not in self._column_of]
+        for fingerprint in fingerprints:
+            if fingerprint in self._column_of:
+                self.column_used[self._column_of[fingerprint]] = self.run
+        if new:
+            current = set(fingerprints)
+            kept = [(fingerprint, used) for fingerprint, used in zip(self.columns, self.column_used)
+                    if fingerprint in current or self.run - used < self.column_ttl]
+            columns = [fingerprint for fingerprint, _ in kept] + new
+            rows = min(self._row_limit(len(columns)), max(self.row_capacity, 64))
+            self._evict_rows(rows)
+            self._resize(rows, columns)
+            self.columns, self.column_used = columns, [used for _, used in kept] + [self.run] * len(new)
+            self._column_of = {fingerprint: c for c, fingerprint in enumerate(columns)}
+        return np.fromiter((self._column_of[fingerprint] for fingerprint in fingerprints), np.intp, len(fingerprints))
+
+    def _row_limit(self, columns: int) -> int:
+        return max(1, self.max_bytes // (4 * max(columns, 1)))
+
+    def _evict_rows(self, limit: int) -> None:
+        """Drops least recently used rows until every row index is below `limit`."""
+        if all(row < limit for row, _ in self.rows.values()):
+            return
+        by_use = sorted(self.rows.items(), key=lambda item: item[1][1], reverse=True)
+        survivors = by_use[:limit]
+        self.evictions += len(self.rows) - len(survivors)
+        # Move surviving rows that sit past the limit into the freed slots
+        free = sorted(set(range(limit)) - {row for _, (row, _) in survivors if row < limit})
+        for fingerprint, entry in survivors:
+            if entry[0] >= limit:
+                target = free.pop(0)
+                self._scores[target] = self._scores[entry[0]]
+                entry[0] = target
+        self.rows = dict(survivors)
+
+    def _allocate_rows(self, count: int, in_use: Set[str]) -> List[int]:
+        """
+        Up to `count` row slots for new fingerprints: free slots first, then by growing the matrix
+        up to max_bytes, then by evicting least recently used rows that this run doesn't need.
+        """
+        limit = self._row_limit(len(self.columns))
+        used = {row for row, _ in self.rows.values()}
+        if self.row_capacity - len(used) < count and self.row_capacity < limit:
+            self._resize(min(limit, max(2 * self.row_capacity, len(used) + count, 64)), self.columns)
+        free = [row for row in range(self.row_capacity) if row not in used][:count]
+        if len(free) < count:
+            victims = sorted((last, fingerprint) for fingerprint, (row, last) in self.rows.items()
+                             if fingerprint not in in_use)
+            for _, fingerprint in victims[:count - len(free)]:
+                free.append(self.rows.pop(fingerprint)[0])
+                self.evictions += 1
+        return free
+
+    def score_rows(self, problem: ProblemSet) -> np.ndarray:
+        """
+        The T x A score matrix of the problem (teachers' rows, auditoriums' columns, -1 where
+        infeasible), taken from the cache where possible and stored back for the next run.
+        """
+        self.run += 1
+        scores = np.empty((problem.num_teachers, problem.num_auditoriums), dtype=np.float32)
+        if problem.num_auditoriums == 0:
+            return scores
+        columns = self._columns_for(problem)
+        auditorium_columns = _AuditoriumColumns(problem)
+        fingerprints = [teacher_fingerprint(problem, t) for t in range(problem.num_teachers)]
+        first: Dict[str, int] = {}  # Teachers with the same fingerprint share a row
+        for t, fingerprint in enumerate(fingerprints):
+            first.setdefault(fingerprint, t)
+        new = [fingerprint for fingerprint in first if fingerprint not in self.rows]
+        slots = dict(zip(new, self._allocate_rows(len(new), set(first))))
+
+        for t, fingerprint in enumerate(fingerprints):
+            if first[fingerprint] != t:
+                scores[t] = scores[first[fingerprint]]
+                continue
+            entry = self.rows.get(fingerprint)
+            if entry is not None:
+                row = self._scores[entry[0], columns]
+                unknown = np.isnan(row)
+                if unknown.any():
+                    self.partial_hits += 1
+                    row[unknown] = auditorium_columns.scores(problem, t, np.flatnonzero(unknown))
+                    self._scores[entry[0], columns[unknown]] = row[unknown]
+                else:
+                    self.hits += 1
+                entry[1] = self.run
+                scores[t] = row
+                continue
+            self.misses += 1
+            row = auditorium_columns.scores(problem, t)
+            scores[t] = row
+            slot = slots.get(fingerprint)
+            if slot is not None:  # Otherwise the cache is full of rows this run needs
+                self._scores[slot] = UNKNOWN
+                self._scores[slot, columns] = row
+                self.rows[fingerprint] = [slot, self.run]
+        return scores
+
+    def ranked_lists(self, problem: ProblemSet) -> List[List[int]]:
+        """The same lists as problem.rank_auditoriums for every teacher, from cached scores."""
+        ranked = []
+        scores = self.score_rows(problem)
+        # With the default tables scores are small multiples of 0.5: the negated doubled score then
+        # fits int8, which numpy sorts with a radix sort. Sorts are stable, so ties keep index order
+        # like rank_auditoriums.
+        doubled = scores * -2
+        small = scores.size == 0 or (np.array_equal(doubled, np.round(doubled)) and np.abs(doubled).max() <= 127)
+        keys = doubled.astype(np.int8) if small else doubled
+        for row, row_keys in zip(scores, keys):
+            candidates = np.flatnonzero(row >= 0)
+            ranked.append(candidates[np.argsort(row_keys[candidates], kind="stable")].tolist())
+        return ranked
+
+    def preference_lists(self, teachers: Dict[str, Teacher],
+                         auditoriums: List[Auditorium]) -> Dict[str, List[Auditorium]]:
+        """Ranked lists in build_teacher_preference_lists form, for gale_shapley_matching(preference_lists=...)."""
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        return {name: [problem.auditorium(a) for a in ranked]
+                for name, ranked in zip(problem.teacher_names, self.ranked_lists(problem))}
+
+
+class _AuditoriumColumns:
+    """The auditorium columns of a problem as numpy arrays, for computing score rows."""
+
+    def __init__(self, problem: ProblemSet):
+        self.capacity = np.array(problem.capacity, dtype=np.int32)
+        self.day = np.array(problem.day, dtype=np.int32)
+        self.start = np.array(problem.start, dtype=np.int32)
+        self.end = np.array(problem.end, dtype=np.int32)
+        time_table = np.array(problem.score_table.time_table, dtype=np.float32)
+        self.time_scores = time_table[:, np.array(problem.period, dtype=np.intp)]  # [time preference, a]
+        size_scores = np.array(problem.size_scores, dtype=np.float32).reshape(-1, 3)
+        self.size_scores = size_scores[np.array(problem.preference_row, dtype=np.intp)].T  # [group category, a]
+
+    def scores(self, problem: ProblemSet, t: int, subset: Optional[np.ndarray] = None) -> np.ndarray:
+        """ProblemSet.score of teacher t against every auditorium (or `subset`), -1 where infeasible."""
+        select = slice(None) if subset is None else subset
+        row = self.time_scores[problem.time_preference[t], select] + self.size_scores[problem.group_category[t], select]
+        infeasible = problem.group_size[t] > self.capacity[select]
+        bookings = problem.bookings[t]
+        if bookings is not None:
+            day, start, end = self.day[select], self.start[select], self.end[select]
+            for booked_day, booked_start, booked_end in bookings.intervals():
+                infeasible |= (day == booked_day) & (start < booked_end) & (booked_start < end)
+        row[infeasible] = INFEASIBLE
+        return row
@@ -0,0 +1,110 @@
+# score_matrix.py
+
+from typing import List, Dict, Union
+
+import numpy as np
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, Preference, ScoreTable, get_score_table, PERIOD_INDEX, SIZE_CATEGORIES,
+    SIZE_CATEGORY_INDEX,
+)
+
+# Row blocks bound the temporaries to block_rows x A instead of a second T x A array
+DEFAULT_BLOCK_ROWS = 256
+
+
+def teacher_auditorium_score_matrix(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        dtype=np.float32,
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        score_table: Union[str, ScoreTable, None] = None
+) -> np.ndarray:
+    """
+    Computes get_teacher_preference_score for every teacher/auditorium pair at once.
+
+    Rows follow teachers' iteration order, columns follow the auditoriums list. Pairs where the
+    group doesn't fit are -1, like the per-pair function. With the default weights all scores are
+    multiples of 0.5, so float32 is exact and halves the memory of the T x A result.
+    """
+    table = get_score_table(score_table)
+    teacher_list = list(teachers.values())
+    num_teachers, num_auditoriums = len(teacher_list), len(auditoriums)
+
+    time_pref = np.fromiter((PERIOD_INDEX[t.time_preference] for t in teacher_list), np.intp, num_teachers)
+    group_cat = np.fromiter((SIZE_CATEGORY_INDEX[t.group.size_category] for t in teacher_list), np.intp, num_teachers)
+    group_size = np.fromiter((t.group.num_students for t in teacher_list), np.int64, num_teachers)
+    aud_period = np.fromiter((PERIOD_INDEX[a.time_slot.period] for a in auditoriums), np.intp, num_auditoriums)
+    capacity = np.fromiter((a.capacity for a in auditoriums), np.int64, num_auditoriums)
+
+    # [group size category, auditorium] -> size score, read from each auditorium's own preferences
+    size_scores = np.array(
+        [[table.size_weights[a.preferences.get(cat, Preference.LOW)] for a in auditoriums] for cat in SIZE_CATEGORIES],
+        dtype=dtype,
+    ).reshape(len(SIZE_CATEGORIES), num_auditoriums)
+    # [teacher time preference, auditorium] -> time score
+    time_scores = np.array(table.time_table, dtype=dtype)[:, aud_period]
+
+    scores = np.empty((num_teachers, num_auditoriums), dtype=dtype)
+    for start in range(0, num_teachers, block_rows):
+        rows = slice(start, start + block_rows)
+        block = scores[rows]
+        np.take(time_scores, time_pref[rows], axis=0, out=block)
+        block += size_scores[group_cat[rows]]
+        block[group_size[rows, None] > capacity[None, :]] = -1
+    return scores
+
+
+def _conflict_mask(teacher: Teacher, aud_day: np.ndarray, aud_start: np.ndarray, aud_end: np.ndarray,
+                   day_codes: Dict[str, int]) -> np.ndarray:
+    """Vectorized is_schedule_conflict of one teacher against every auditorium."""
+    mask = np.zeros(len(aud_day), dtype=bool)
+    for booked in teacher.schedule:
+        day = day_codes.get(booked.day)
+        if day is None:
+            continue  # No auditorium on that day
+        mask |= ((aud_day == day) & (aud_start < booked.time_slot.end_time_seconds)
+                 & (booked.time_slot.start_time_seconds < aud_end))
+    return mask
+
+
+def preference_lists_from_scores(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        scores: np.ndarray,
+        block_rows: int = DEFAULT_BLOCK_ROWS
+) -> Dict[str, List[Auditorium]]:
+    """
+    Builds the same ranked lists as build_teacher_preference_lists from a precomputed score matrix.
+
+    Duplicate auditoriums are dropped once, keeping each one's first column. Rows are then ranked
+    a block at a time with one stable argsort: infeasible pairs sort last and are cut off, and
+    ties keep the auditoriums list order. Pass the result to
+    gale_shapley_matching(preference_lists=...) to skip per-pair scoring.
+    """
+    first_columns: Dict[Auditorium, int] = {}
+    for j, aud in enumerate(auditoriums):
+        first_columns.setdefault(aud, j)  # Equal ids are the same auditorium, as in build_teacher_preference_lists
+    columns = np.fromiter(first_columns.values(), np.intp, len(first_columns))
+    unique = [auditoriums[j] for j in columns.tolist()]
+
+    day_codes: Dict[str, int] = {}
+    aud_day = np.fromiter((day_codes.setdefault(a.day, len(day_codes)) for a in unique), np.intp, len(unique))
+    aud_start = np.fromiter((a.time_slot.start_time_seconds for a in unique), np.int64, len(unique))
+    aud_end = np.fromiter((a.time_slot.end_time_seconds for a in unique), np.int64, len(unique))
+
+    items = list(teachers.items())
+    preference_lists: Dict[str, List[Auditorium]] = {}
+    for start in range(0, len(items), block_rows):
+        block_items = items[start:start + block_rows]
+        block = scores[start:start + len(block_items)][:, columns]
+        feasible = block >= 0
+        for i, (_, teacher) in enumerate(block_items):
+            if teacher.schedule:
+                feasible[i] &= ~_conflict_mask(teacher, aud_day, aud_start, aud_end, day_codes)
+        keys = np.where(feasible, -block, np.inf)
+        order = np.argsort(keys, axis=1, kind="stable")
+        lengths = feasible.sum(axis=1).tolist()
+        for i, (teacher_name, _) in enumerate(block_items):
+            preference_lists[teacher_name] = [unique[j] for j in order[i, :lengths[i]].tolist()]
+    return preference_lists
@@ -0,0 +1,369 @@
+# service.py
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional, Any
+
+from gale_shapley_matching import NO_MATCH, CandidateIndex, MatchingStats, ProposalOrder, match_problem
+from loader import ProblemLoader, Row
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK_ROWS = 1000  # Result lines per chunk written before waiting for the client to drain
+WORKER_INVENTORIES = 4  # Parsed inventories kept per worker process
+
+Job = Tuple[List[Row], str, int]  # Teacher rows, proposal order, seed
+
+logger = logging.getLogger(__name__)
+
+
+def inventory_key(auditorium_rows: List[Row]) -> str:
+    """Content hash of an auditorium inventory: jobs with equal rows get the same key."""
+    encoded = json.dumps(auditorium_rows, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+# --- Worker process side ---
+
+_inventories: "OrderedDict[str, Tuple[ProblemLoader, CandidateIndex]]" = OrderedDict()
+
+
+def _inventory(key: str, auditorium_rows: List[Row]) -> Tuple[ProblemLoader, CandidateIndex]:
+    """The parsed inventory and its CandidateIndex, kept for the next batches on the same key."""
+    cached = _inventories.get(key)
+    if cached is None:
+        loader = ProblemLoader()
+        loader.add_auditorium_rows(auditorium_rows)
+        cached = _inventories[key] = (loader, CandidateIndex(loader.problem))
+        if len(_inventories) > WORKER_INVENTORIES:
+            _inventories.popitem(last=False)
+    _inventories.move_to_end(key)
+    return cached
+
+
+def match_batch(key: str, auditorium_rows: List[Row], jobs: List[Job]) -> List[Dict[str, Any]]:
+    """
+    Runs a batch of jobs against one auditorium inventory (in a worker process).
+
+    The inventory is parsed and indexed once; every job gets a fork of it (ProblemLoader.fork)
+    with its own teachers and the shared CandidateIndex bound to it. Returns one dict per job:
+    "names" and "match" (auditorium row index per teacher, NO_MATCH if unmatched) plus "stats",
+    or "error" if the job's teacher rows are invalid.
+    """
+    base, index = _inventory(key, auditorium_rows)
+    results = []
+    for teacher_rows, order, seed in jobs:
+        loader = base.fork()
+        try:
+            loader.add_teacher_rows(teacher_rows)
+        except ValueError as error:
+            results.append({"error": str(error)})
+            continue
+        problem, stats = loader.problem, MatchingStats()
+        bound = index.for_problem(problem)
+        ranked = [bound.ranked(t) for t in range(problem.num_teachers)]
+        teacher_match = match_problem(problem, ranked, order, seed, stats)
+        results.append({"names": problem.teacher_names, "match": teacher_match, "stats": stats.as_dict()})
+    return results
+
+
+# --- Event loop side ---
+
+class ServiceError(Exception):
+    """A request the service rejects, with the HTTP status to answer it with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Batch:
+    __slots__ = ("key", "auditorium_rows", "jobs", "futures", "dispatched")
+
+    def __init__(self, key: str, auditorium_rows: List[Row]):
+        self.key = key
+        self.auditorium_rows = auditorium_rows
+        self.jobs: List[Job] = []
+        self.futures: List[asyncio.Future] = []
+        self.dispatched = False
+
+
+class MatchingService:
+    """
+    HTTP front end running matching jobs in a worker pool.
+
+    POST /match takes a JSON job: {"teachers": [...], "auditoriums": [...], "order": "insertion",
+    "seed": 0}, with rows in the loader.py format. Instead of "auditoriums" a job can name an
+    inventory sent earlier with {"inventory": key}; the key is in the first line of every response.
+
+    Jobs on the same inventory that arrive within batch_window seconds of each other are
+    coalesced into one batch (at most max_batch jobs), which a worker runs with the inventory
+    parsed and indexed once (see match_batch). Matching runs in the executor, a process pool by
+    default, so the event loop only parses requests and writes responses.
+
+    The response is chunked JSON lines: {"inventory", "batch_size", "teachers"}, then one
+    {"teacher", "auditorium", "day", "start", "end"} per teacher (auditorium null if unmatched),
+    then {"done": true, "matched", "unmatched", "stats"}. Errors are a JSON {"error"} with a 4xx
+    status, or 500 if a worker fails. An inventory sent inline is only kept for reference by key
+    once a batch has parsed it. GET /health reports the job and batch counters.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, workers: Optional[int] = None,
+                 batch_window: float = 0.005, max_batch: int = 64, max_inventories: int = 16):
+        self._own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_inventories = max_inventories
+        self.inventories: "OrderedDict[str, List[Row]]" = OrderedDict()
+        self.jobs = 0
+        self.batches = 0
+        self._open: Dict[str, _Batch] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}  # Handler task per open connection
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Starts listening; returns the bound address (port 0 picks a free port)."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in self._connections.values():  # Idle keep-alive connections see EOF and end
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._own_executor:
+            self.executor.shutdown()
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    # --- Jobs ---
+
+    def _remember(self, key: str, auditorium_rows: List[Row]) -> None:
+        self.inventories[key] = auditorium_rows
+        self.inventories.move_to_end(key)
+        if len(self.inventories) > self.max_inventories:
+            self.inventories.popitem(last=False)
+
+    async def submit(self, job: Dict[str, Any]) -> Tuple[str, int, List[Row], Dict[str, Any]]:
+        """Queues a parsed job; returns (inventory key, batch size, auditorium rows, match_batch result)."""
+        teacher_rows = job.get("teachers")
+        if not isinstance(teacher_rows, list):
+            raise ServiceError(400, "Job needs a list of teacher rows")
+        try:
+            order = ProposalOrder(job.get("order", ProposalOrder.INSERTION.value)).value
+            seed = int(job.get("seed", 0))
+        except (TypeError, ValueError) as error:
+            raise ServiceError(400, str(error)) from error
+        if "auditoriums" in job:
+            auditorium_rows = job["auditoriums"]
+            if not isinstance(auditorium_rows, list):
+                raise ServiceError(400, "Job needs a list of auditorium rows")
+            key = inventory_key(auditorium_rows)
+        else:
+            key = job.get("inventory")
+            auditorium_rows = self.inventories.get(key) if isinstance(key, str) else None
+            if auditorium_rows is None:
+                raise ServiceError(404, f"Unknown inventory {key!r}")
+
+        loop = asyncio.get_running_loop()
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _Batch(key, auditorium_rows)
+            loop.call_later(self.batch_window, self._dispatch, batch)
+        future = loop.create_future()
+        batch.jobs.append((teacher_rows, order, seed))
+        batch.futures.append(future)
+        self.jobs += 1
+        if len(batch.jobs) >= self.max_batch:
+            self._dispatch(batch)
+        result = await future
+        if "auditoriums" in job:  # Only inventories a worker managed to parse can be referenced later
+            self._remember(key, auditorium_rows)
+        if "error" in result:
+            raise ServiceError(400, result["error"])
+        return key, len(batch.jobs), auditorium_rows, result
+
+    def _dispatch(self, batch: _Batch) -> None:
+        if batch.dispatched:
+            return
+        batch.dispatched = True
+        if self._open.get(batch.key) is batch:
+            del self._open[batch.key]
+        self.batches += 1
+        loop = asyncio.get_running_loop()
+        running = loop.run_in_executor(self.executor, match_batch, batch.key, batch.auditorium_rows, batch.jobs)
+        running.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: _Batch, done: asyncio.Future) -> None:
+        error = None if done.cancelled() else done.exception()
+        if isinstance(error, ValueError):
+            error = ServiceError(400, str(error))  # Invalid auditorium rows fail the whole batch
+        elif error is not None or done.cancelled():
+            logger.error("Batch on inventory %s failed", batch.key, exc_info=error)
+            error = ServiceError(500, "Matching failed")
+        for i, future in enumerate(batch.futures):
+            if future.done():  # The client went away
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[i])
+
+    # --- HTTP ---
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        handler = asyncio.current_task()
+        self._connections[handler] = writer
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ServiceError as error:  # Part of the request may be unread, so close after answering
+                    await self._send_json(writer, error.status, {"error": str(error)}, close=True)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    await self._route(method, path, body, writer)
+                except ServiceError as error:
+                    await self._send_json(writer, error.status, {"error": str(error)})
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:  # Answer before closing; the response may be cut off if it was streaming
+                    logger.exception("Request failed")
+                    await self._send_json(writer, 500, {"error": "Internal error"})
+                    break
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Request failed")
+        finally:
+            del self._connections[handler]
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ServiceError(400, "Malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ServiceError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        if path == "/health":
+            if method != "GET":
+                raise ServiceError(405, "Use GET")
+            await self._send_json(writer, 200, {"status": "ok", "jobs": self.jobs, "batches": self.batches})
+        elif path == "/match":
+            if method != "POST":
+                raise ServiceError(405, "Use POST")
+            try:
+                job = json.loads(body)
+            except ValueError as error:
+                raise ServiceError(400, f"Invalid JSON: {error}") from error
+            if not isinstance(job, dict):
+                raise ServiceError(400, "Job must be a JSON object")
+            await self._stream_result(writer, *await self.submit(job))
+        else:
+            raise ServiceError(404, f"No route for {path}")
+
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any],
+                         close: bool = False) -> None:
+        body = json.dumps(payload).encode()
+        connection = "Connection: close\r\n" if close else ""
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                     f"{connection}Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _stream_result(writer: asyncio.StreamWriter, key: str, batch_size: int,
+                             auditorium_rows: List[Row], result: Dict[str, Any]) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+
+        def chunk(lines: List[str]) -> bytes:
+            data = "".join(lines).encode()
+            return b"%x\r\n%s\r\n" % (len(data), data)
+
+        names, teacher_match = result["names"], result["match"]
+        lines = [json.dumps({"inventory": key, "batch_size": batch_size, "teachers": len(names)}) + "\n"]
+        matched = 0
+        for name, a in zip(names, teacher_match):
+            if a == NO_MATCH:
+                line = {"teacher": name, "auditorium": None}
+            else:
+                row = auditorium_rows[a]
+                line = {"teacher": name, "auditorium": row["name"], "day": row["day"],
+                        "start": row["start"], "end": row["end"]}
+                matched += 1
+            lines.append(json.dumps(line) + "\n")
+            if len(lines) >= STREAM_CHUNK_ROWS:
+                writer.write(chunk(lines))
+                lines = []
+                await writer.drain()
+        lines.append(json.dumps({"done": True, "matched": matched, "unmatched": len(names) - matched,
+                                 "stats": result["stats"]}) + "\n")
+        writer.write(chunk(lines) + b"0\r\n\r\n")
+        await writer.drain()
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+async def serve(host: str, port: int, workers: Optional[int] = None, batch_window: float = 0.005) -> None:
+    service = MatchingService(workers=workers, batch_window=batch_window)
+    address = await service.start(host, port)
+    logger.info("Matching service listening on %s:%d", *address)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP matching service (POST /match, GET /health)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-window", type=float, default=0.005,
+                        help="Seconds to wait for more jobs on the same inventory")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.host, args.port, args.workers, args.batch_window))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# solvers.py
+
+from typing import List, Dict, Tuple, Set, Callable, Optional, Union
+
+import numpy as np
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, ProblemSet, CandidateIndex, MatchingStats, ScoreTable, NO_MATCH,
+    match_problem, apply_teacher_match, refuse_shared_groups, _phase,
+)
+
+# solve(problem, stats=None, **options) -> auditorium index per teacher (NO_MATCH if unmatched)
+Solver = Callable[..., List[int]]
+
+_solvers: Dict[str, Solver] = {}
+
+
+def register_solver(name: str, solver: Solver) -> None:
+    """Makes `solver` available to solve_problem / solve_matching under `name`."""
+    _solvers[name] = solver
+
+
+def get_solver(solver: Union[str, Solver]) -> Solver:
+    """A registered solver by name, or the callable itself."""
+    if callable(solver):
+        return solver
+    try:
+        return _solvers[solver]
+    except KeyError:
+        raise KeyError(f"Unknown solver {solver!r}; registered: {sorted(_solvers)}") from None
+
+
+def available_solvers() -> List[str]:
+    return sorted(_solvers)
+
+
+def total_score(problem: ProblemSet, teacher_match: List[int]) -> float:
+    """Sum of problem.score over the matched pairs."""
+    return sum(problem.score(t, a) for t, a in enumerate(teacher_match) if a != NO_MATCH)
+
+
+# --- Maximum-weight assignment ---
+
+class SparseScores:
+    """
+    The capacity-masked score matrix in CSR form: row t holds only the auditoriums teacher t fits
+    in without a schedule clash (from a CandidateIndex), each with weight score + match_bonus.
+    Pairs whose weight is not positive are left out, as leaving the teacher unmatched is as good.
+    """
+    __slots__ = ("indptr", "indices", "weights", "num_auditoriums")
+
+    def __init__(self, problem: ProblemSet, match_bonus: float = 0.0):
+        index = CandidateIndex(problem)
+        indptr, indices, weights = [0], [], []
+        for t in range(problem.num_teachers):
+            for level in index.candidate_levels(t):
+                weight = problem.score(t, level[0]) + match_bonus
+                if weight <= 0:
+                    break  # Levels come highest score first
+                indices.extend(level)
+                weights.extend([weight] * len(level))
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.weights = np.array(weights, dtype=np.float64)
+        self.num_auditoriums = problem.num_auditoriums
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def row(self, t: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[t], self.indptr[t + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+
+def max_weight_assignment(scores: SparseScores) -> List[int]:
+    """
+    Maximum-weight assignment on a SparseScores matrix, by shortest augmenting paths.
+
+    This is the Hungarian method, run as minimum cost (-weight) with one dummy column per
+    teacher at cost 0 (staying unmatched). Teachers are added one at a time. Each addition runs
+    a Dijkstra over reduced costs from the new teacher and stops at the first free column, either
+    an auditorium or one of the reached teachers' own dummy. Potentials on teachers and
+    auditoriums keep all reduced costs non-negative. Only the CSR rows of teachers the search
+    reaches are read, and each step is one vectorized relax and one argmin over the columns.
+    """
+    num_teachers, num_auditoriums = len(scores.indptr) - 1, scores.num_auditoriums
+    # Free columns (auditoriums and dummies) always have potential 0, so their distances compare directly
+    row_potential = np.zeros(num_teachers)
+    column_potential = np.zeros(num_auditoriums)
+    column_row = np.full(num_auditoriums, NO_MATCH, dtype=np.int64)
+    row_column = [NO_MATCH] * num_teachers
+
+    for first in range(num_teachers):
+        columns, weights = scores.row(first)
+        if not len(columns):
+            continue  # Nothing feasible: stays on its dummy
+        row_potential[first] = max(0.0, float((weights + column_potential[columns]).max()))
+        distance = np.full(num_auditoriums, np.inf)  # Tentative distances of unscanned columns
+        scanned = np.zeros(num_auditoriums, dtype=bool)
+        reached_from = np.full(num_auditoriums, NO_MATCH, dtype=np.int64)
+        rows = [(first, 0.0)]  # Rows in the search tree with their distance
+        final = []  # Scanned columns with their distance
+        best_dummy, dummy_row = row_potential[first], first  # Reduced cost of a row's dummy is its potential
+        _relax(distance, scanned, reached_from, columns, weights, first, 0.0, row_potential, column_potential)
+        while True:
+            j = int(np.argmin(distance))
+            dj = float(distance[j])
+            if best_dummy <= dj:
+                sink, total = None, best_dummy
+                break
+            i = int(column_row[j])
+            if i != NO_MATCH:  # Among equally near columns, a free one ends the search right away
+                free = np.flatnonzero((distance == dj) & (column_row == NO_MATCH))
+                if len(free):
+                    j, i = int(free[0]), NO_MATCH
+            distance[j] = np.inf
+            scanned[j] = True
+            final.append((j, dj))
+            if i == NO_MATCH:
+                sink, total = j, dj
+                break
+            rows.append((i, dj))  # Reached through its matched column at no cost
+            if dj + row_potential[i] < best_dummy:
+                best_dummy, dummy_row = dj + row_potential[i], i
+            columns, weights = scores.row(i)
+            _relax(distance, scanned, reached_from, columns, weights, i, dj, row_potential, column_potential)
+
+        for j, dj in final:
+            column_potential[j] += dj - total
+        for i, di in rows:
+            row_potential[i] += di - total
+
+        if sink is None:  # dummy_row gives up its auditorium, which the chain below refills
+            if dummy_row == first:
+                continue
+            sink = row_column[dummy_row]
+            row_column[dummy_row] = NO_MATCH
+        j = sink
+        while True:
+            i = int(reached_from[j])
+            previous = row_column[i]
+            column_row[j], row_column[i] = i, j
+            if i == first:
+                break
+            j = previous
+    return row_column
+
+
+def _relax(distance, scanned, reached_from, columns, weights, row, row_distance, row_potential, column_potential):
+    """Lowers the tentative distance of the unscanned columns reachable from `row`."""
+    candidate = row_distance - weights + row_potential[row] - column_potential[columns]
+    better = (candidate < distance[columns]) & ~scanned[columns]
+    columns = columns[better]
+    distance[columns] = candidate[better]
+    reached_from[columns] = row
+
+
+def max_weight_matching(problem: ProblemSet, stats: Optional[MatchingStats] = None,
+                        match_bonus: float = 0.0) -> List[int]:
+    """
+    The assignment maximizing the total problem.score (get_teacher_preference_score) over matched
+    pairs, instead of a stable one. Teachers only get rooms they fit in without a clash.
+
+    match_bonus is added to every feasible pair. With 0, a room scoring 0 for a teacher is worth
+    no more than leaving them unmatched. A bonus larger than the highest score times the number
+    of teachers maximizes the number of matched teachers first and the total score second.
+
+    The assignment knows nothing of shared student groups: if teachers share a Group, this
+    raises ValueError rather than return a timetable that may double-book it.
+    """
+    refuse_shared_groups(problem, "max_weight_matching")
+    with _phase(stats, "build"):
+        scores = SparseScores(problem, match_bonus)
+    with _phase(stats, "solve"):
+        return max_weight_assignment(scores)
+
+
+register_solver("gale_shapley", lambda problem, stats=None, **options: match_problem(problem, stats=stats, **options))
+register_solver("max_weight", max_weight_matching)
+
+
+def solve_problem(problem: ProblemSet, solver: Union[str, Solver] = "gale_shapley",
+                  stats: Optional[MatchingStats] = None, **options) -> List[int]:
+    """Runs a solver backend (a registered name or a callable) on a ProblemSet."""
+    return get_solver(solver)(problem, stats=stats, **options)
+
+
+def solve_matching(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        solver: Union[str, Solver] = "gale_shapley",
+        stats: Optional[MatchingStats] = None,
+        score_table: Union[str, ScoreTable, None] = None,
+        **options
+) -> Tuple[Dict[str, Auditorium], Set[str]]:
+    """
+    gale_shapley_matching with a choice of solver backend: "gale_shapley" (stable, the default)
+    or "max_weight" (highest total score, see max_weight_matching), or any registered solver.
+    Options are passed to the solver (e.g. order/seed, or match_bonus). Returns the same
+    (teacher_matches, unmatched_teachers) and appends the matches to the schedules the same way.
+    """
+    with _phase(stats, "build"):
+        problem = ProblemSet.from_objects(teachers, auditoriums, score_table)
+    teacher_match = solve_problem(problem, solver, stats, **options)
+    with _phase(stats, "apply"):
+        return apply_teacher_match(problem, teacher_match)
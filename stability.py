@@ -0,0 +1,415 @@
+# stability.py
+
+import argparse
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Union
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, ProblemSet, IntervalIndex, ScoreTable, PERIODS, SIZE_CATEGORIES, NO_MATCH, ProposalOrder,
+    match_problem,
+)
+
+_FIT_SHIFT = 1 << 31  # Auditorium preference key: fit level (Preference.value) first, then group size
+FREE = -8 * _FIT_SHIFT  # Threshold of an auditorium nobody holds: any teacher who fits beats it
+
+
+class StabilityReport:
+    """
+    What check_matching found wrong with a matching, as index pairs into its ProblemSet.
+
+    blocking_pairs: (t, a) where teacher t would rather have auditorium a than their match and a
+    would rather have t than whoever holds it (or holds nobody). infeasible: matched (t, a) where
+    the group doesn't fit or the room clashes with t's other bookings. double_booked: auditoriums
+    held by more than one teacher. group_clashes: teachers (t1, t2) of one shared group whose
+    auditoriums overlap, or where one's auditorium overlaps the other's existing bookings (see
+    group_clashes()). A pair (t, a) that would double-book t's group is not a blocking pair.
+    """
+    __slots__ = ("problem", "blocking_pairs", "infeasible", "double_booked", "group_clashes")
+
+    def __init__(self, problem: ProblemSet):
+        self.problem = problem
+        self.blocking_pairs: List[Tuple[int, int]] = []
+        self.infeasible: List[Tuple[int, int]] = []
+        self.double_booked: List[int] = []
+        self.group_clashes: List[Tuple[int, int]] = []
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.infeasible and not self.double_booked and not self.group_clashes
+
+    @property
+    def is_stable(self) -> bool:
+        return self.is_valid and not self.blocking_pairs
+
+    def named_blocking_pairs(self) -> List[Tuple[str, Auditorium]]:
+        """blocking_pairs as (teacher name, Auditorium)."""
+        return [(self.problem.teacher_names[t], self.problem.auditorium(a)) for t, a in self.blocking_pairs]
+
+    def __str__(self) -> str:
+        if self.is_stable:
+            return "stable"
+        return (f"{len(self.blocking_pairs)} blocking pairs, {len(self.infeasible)} infeasible assignments, "
+                f"{len(self.double_booked)} double-booked auditoriums, {len(self.group_clashes)} group clashes")
+
+
+class _MinTree:
+    """Min segment tree over a list of thresholds, reporting the positions below a value in a suffix."""
+    __slots__ = ("size", "tree")
+
+    def __init__(self, values: List[int]):
+        size = 1
+        while size < len(values):
+            size *= 2
+        tree = [_FIT_SHIFT * 8] * (2 * size)  # Above every key
+        tree[size:size + len(values)] = values
+        for node in range(size - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+        self.size, self.tree = size, tree
+
+    def __getitem__(self, position: int) -> int:
+        return self.tree[self.size + position]
+
+    def update(self, position: int, value: int) -> None:
+        node = self.size + position
+        tree = self.tree
+        tree[node] = value
+        node //= 2
+        while node:
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def below(self, lo: int, value: int) -> Iterator[int]:
+        """Positions >= lo whose threshold is < value, in increasing order; O((k + 1) log n)."""
+        tree, size = self.tree, self.size
+        if tree[1] >= value:
+            return
+        stack = [(1, 0, size)]
+        while stack:
+            node, node_lo, node_hi = stack.pop()
+            if node_hi <= lo or tree[node] >= value:
+                continue
+            if node >= size:
+                yield node - size
+            else:
+                middle = (node_lo + node_hi) // 2
+                stack.append((2 * node + 1, middle, node_hi))
+                stack.append((2 * node, node_lo, middle))
+
+
+def _threshold(problem: ProblemSet, holder: int, a: int) -> int:
+    """
+    Auditorium a's key for its holder: a fitting teacher t is preferred (problem.prefers) exactly
+    when fit * _FIT_SHIFT + group size of t is larger. A holder that doesn't fit loses every tie
+    on fit level, so it counts with size 0.
+    """
+    if holder == NO_MATCH:
+        return FREE
+    fit = problem.preference_tables[problem.preference_row[a]][problem.group_category[holder]]
+    size = problem.group_size[holder]
+    return fit * _FIT_SHIFT + (size if size <= problem.capacity[a] else 0)
+
+
+class BlockingPairIndex:
+    """
+    Finds blocking pairs around a matching that can be changed in place (see assign).
+
+    Every auditorium gets a threshold, the key of its current holder (see _threshold).
+    Auditoriums are bucketed by (period, preference row, day) like CandidateIndex, which fixes
+    both a teacher's score and their fit level within a bucket, and each bucket is sorted by
+    capacity with a min segment tree over the thresholds. teacher_blocks(t) visits only the
+    buckets t scores above their match: a bisect finds the rooms the group fits in and the tree
+    reports only the rooms whose threshold t beats, so a teacher costs O(buckets * log A) plus what
+    is reported. auditorium_blocks(a) goes the other way through the teachers grouped by time
+    preference and size category, each group sorted by group size.
+    """
+    __slots__ = ("problem", "match", "holder", "current_score", "_buckets", "_position", "_classes")
+
+    def __init__(self, problem: ProblemSet, teacher_match: List[int]):
+        self.problem = problem
+        self.match = list(teacher_match)
+        self.holder = [NO_MATCH] * problem.num_auditoriums
+        for t, a in enumerate(teacher_match):
+            if a != NO_MATCH:
+                self.holder[a] = t
+        self.current_score = [-1.0 if a == NO_MATCH else problem.score(t, a) for t, a in enumerate(teacher_match)]
+
+        grouped: Dict[Tuple[int, int, int], List[Tuple[int, int]]] = {}
+        for a in range(problem.num_auditoriums):
+            key = (problem.period[a], problem.preference_row[a], problem.day[a])
+            grouped.setdefault(key, []).append((problem.capacity[a], a))
+        # (score key, preference row, day, capacities ascending, auditoriums, threshold tree)
+        self._buckets: List[Tuple[int, int, int, List[int], List[int], _MinTree]] = []
+        self._position: List[Tuple[int, int]] = [(0, 0)] * problem.num_auditoriums  # (bucket, position)
+        for (period, row, day), rooms in grouped.items():
+            rooms.sort()
+            for position, (_, a) in enumerate(rooms):
+                self._position[a] = (len(self._buckets), position)
+            thresholds = [_threshold(problem, self.holder[a], a) for _, a in rooms]
+            self._buckets.append((row * len(PERIODS) + period, row, day, [c for c, _ in rooms], [a for _, a in rooms],
+                                  _MinTree(thresholds)))
+
+        by_class: Dict[int, List[Tuple[int, int]]] = {}
+        for t in range(problem.num_teachers):
+            key = problem.time_preference[t] * len(SIZE_CATEGORIES) + problem.group_category[t]
+            by_class.setdefault(key, []).append((problem.group_size[t], t))
+        # (score row, size category, group sizes ascending, teachers)
+        self._classes: List[Tuple[List[float], int, List[int], List[int]]] = []
+        for teachers in by_class.values():
+            teachers.sort()
+            first = teachers[0][1]
+            self._classes.append((problem.score_row(first), problem.group_category[first],
+                                  [size for size, _ in teachers], [t for _, t in teachers]))
+
+    def assign(self, t: int, a: int) -> None:
+        """Moves teacher t to auditorium a (NO_MATCH to unmatch); t's old room is freed if t still holds it."""
+        old = self.match[t]
+        if old != NO_MATCH and self.holder[old] == t:
+            self._set_holder(old, NO_MATCH)
+        self.match[t] = a
+        if a == NO_MATCH:
+            self.current_score[t] = -1.0
+        else:
+            self._set_holder(a, t)
+            self.current_score[t] = self.problem.score(t, a)
+
+    def _set_holder(self, a: int, t: int) -> None:
+        self.holder[a] = t
+        bucket, position = self._position[a]
+        self._buckets[bucket][5].update(position, _threshold(self.problem, t, a))
+
+    def teacher_blocks(self, t: int) -> Iterator[int]:
+        """Auditoriums forming a blocking pair with teacher t, bucket by bucket."""
+        problem = self.problem
+        scores, size, category = problem.score_row(t), problem.group_size[t], problem.group_category[t]
+        bookings, current_score = problem.bookings[t], self.current_score[t]
+        start, end = problem.start, problem.end
+        for score_key, row, day, capacities, rooms, tree in self._buckets:
+            if scores[score_key] <= current_score:
+                continue
+            key = problem.preference_tables[row][category] * _FIT_SHIFT + size
+            for position in tree.below(bisect_left(capacities, size), key):
+                a = rooms[position]
+                if bookings is None or not bookings.overlaps(problem.day[a], start[a], end[a]):
+                    yield a
+
+    def auditorium_blocks(self, a: int) -> Iterator[int]:
+        """Teachers forming a blocking pair with auditorium a."""
+        problem = self.problem
+        bucket, position = self._position[a]
+        threshold = self._buckets[bucket][5][position]
+        capacity, score_key = problem.capacity[a], problem.score_key[a]
+        fits = problem.preference_tables[problem.preference_row[a]]
+        for scores, category, sizes, teachers in self._classes:
+            score = scores[score_key]
+            lowest = max(threshold - fits[category] * _FIT_SHIFT + 1, 0)  # Smallest group size beating the holder
+            for i in range(bisect_left(sizes, lowest), bisect_right(sizes, capacity)):
+                t = teachers[i]
+                if self.current_score[t] < score and self.match[t] != a and not problem.conflicts(t, a):
+                    yield t
+
+    def is_stable_around(self, teachers: Iterable[int], auditoriums: Iterable[int]) -> bool:
+        """No blocking pair involves any of these teachers or auditoriums."""
+        return (not any(next(self.teacher_blocks(t), None) is not None for t in teachers)
+                and not any(next(self.auditorium_blocks(a), None) is not None for a in auditoriums))
+
+
+def check_matching(problem: ProblemSet, teacher_match: List[int]) -> StabilityReport:
+    """
+    Checks a matching (auditorium index per teacher, NO_MATCH if unmatched) against the problem's
+    preferences: teachers rank feasible auditoriums by problem.score, auditoriums compare
+    teachers with problem.prefers, and only strict preferences on both sides make a blocking pair.
+
+    Instead of trying all T*A pairs, the blocking pairs are found teacher by teacher through a
+    BlockingPairIndex, in O(T * buckets * log A) plus the blocking pairs reported (and the
+    schedule clashes skipped).
+    """
+    report = StabilityReport(problem)
+    holder = [NO_MATCH] * problem.num_auditoriums
+    for t, a in enumerate(teacher_match):
+        if a == NO_MATCH:
+            continue
+        if holder[a] != NO_MATCH:
+            report.double_booked.append(a)
+        holder[a] = t
+        if problem.group_size[t] > problem.capacity[a] or problem.conflicts(t, a):
+            report.infeasible.append((t, a))
+    report.double_booked = sorted(set(report.double_booked))
+
+    index = BlockingPairIndex(problem, teacher_match)
+    for t in range(problem.num_teachers):
+        report.blocking_pairs.extend((t, a) for a in sorted(index.teacher_blocks(t)))
+    members = _shared_groups(problem)
+    if members:
+        report.group_clashes = group_clashes(problem, teacher_match, members)
+        report.blocking_pairs = [(t, a) for t, a in report.blocking_pairs
+                                 if not _group_busy(problem, teacher_match, members.get(problem.group[t], ()), t, a)]
+    return report
+
+
+def _shared_groups(problem: ProblemSet) -> Dict[int, List[int]]:
+    """Teachers of each group code that more than one teacher shares."""
+    members: Dict[int, List[int]] = {}
+    for t, g in enumerate(problem.group):
+        members.setdefault(g, []).append(t)
+    return {g: teachers for g, teachers in members.items() if len(teachers) > 1}
+
+
+def _group_busy(problem: ProblemSet, teacher_match: List[int], members: Iterable[int], t: int, a: int) -> bool:
+    """Is t's group busy at auditorium a's time with another of its teachers (matched room or existing booking)?"""
+    day, start, end = problem.day[a], problem.start[a], problem.end[a]
+    for other in members:
+        if other == t:
+            continue
+        held, bookings = teacher_match[other], problem.bookings[other]
+        if held != NO_MATCH and problem.day[held] == day and problem.start[held] < end and start < problem.end[held]:
+            return True
+        if bookings is not None and bookings.overlaps(day, start, end):
+            return True
+    return False
+
+
+def group_clashes(problem: ProblemSet, teacher_match: List[int],
+                  members: Optional[Dict[int, List[int]]] = None) -> List[Tuple[int, int]]:
+    """
+    Sorted pairs (t1, t2), t1 < t2, of teachers sharing a group who put it in two places at once:
+    their matched auditoriums overlap, or one's auditorium overlaps the other's existing booking.
+    Each shared group's intervals are sorted per day and swept in start order, so only intervals
+    that are open at the same time are compared, not every pair of the group's teachers.
+    """
+    members = _shared_groups(problem) if members is None else members
+    found = set()
+    for teachers in members.values():
+        by_day: Dict[int, List[Tuple[int, int, int, bool]]] = {}  # (start, end, teacher, matched room?)
+        for t in teachers:
+            a = teacher_match[t]
+            if a != NO_MATCH:
+                by_day.setdefault(problem.day[a], []).append((problem.start[a], problem.end[a], t, True))
+            if problem.bookings[t] is not None:
+                for day, start, end in problem.bookings[t].intervals():
+                    by_day.setdefault(day, []).append((start, end, t, False))
+        for intervals in by_day.values():
+            intervals.sort()
+            active: List[Tuple[int, int, bool]] = []  # (end, teacher, matched room?) still open
+            for start, end, t, matched in intervals:
+                active = [entry for entry in active if entry[0] > start]
+                for _, other, other_matched in active:
+                    if other != t and (matched or other_matched):  # Clashes between old bookings aren't ours
+                        found.add((min(t, other), max(t, other)))
+                active.append((end, t, matched))
+    return sorted(found)
+
+
+def blocking_pairs_pairwise(problem: ProblemSet, teacher_match: List[int]) -> List[Tuple[int, int]]:
+    """The O(T*A) definition of blocking pairs, checked pair by pair (the oracle for check_matching)."""
+    holder = [NO_MATCH] * problem.num_auditoriums
+    for t, a in enumerate(teacher_match):
+        if a != NO_MATCH:
+            holder[a] = t
+    pairs = []
+    for t, current in enumerate(teacher_match):
+        current_score = -1.0 if current == NO_MATCH else problem.score(t, current)
+        for a in range(problem.num_auditoriums):
+            if a == current or problem.score(t, a) <= current_score or problem.conflicts(t, a):
+                continue
+            if holder[a] == NO_MATCH or problem.prefers(a, t, holder[a]):
+                pairs.append((t, a))
+    return pairs
+
+
+def problem_for_matches(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        teacher_matches: Dict[str, Auditorium],
+        score_table: Union[str, ScoreTable, None] = None
+) -> Tuple[ProblemSet, List[int]]:
+    """
+    The ProblemSet and index matching for a gale_shapley_matching result.
+
+    gale_shapley_matching appends each match to the teacher's schedule; that booking is left out
+    of the teacher's bookings here, so a teacher's own match doesn't clash with the rooms next to it.
+    """
+    problem = ProblemSet.from_objects(teachers, auditoriums, score_table)
+    teacher_match = [NO_MATCH] * problem.num_teachers
+    for t, name in enumerate(problem.teacher_names):
+        auditorium = teacher_matches.get(name)
+        if auditorium is None:
+            continue
+        teacher_match[t] = problem.auditorium_index(auditorium)
+        schedule = teachers[name].schedule
+        if any(booked is auditorium for booked in schedule):
+            bookings = IntervalIndex()
+            skipped = False
+            for booked in schedule:
+                if booked is auditorium and not skipped:
+                    skipped = True
+                    continue
+                bookings.add(problem.day_code(booked.day), booked.time_slot.start_time_seconds,
+                             booked.time_slot.end_time_seconds)
+            problem.bookings[t] = bookings if len(bookings) else None
+    return problem, teacher_match
+
+
+def verify_matching(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        teacher_matches: Dict[str, Auditorium],
+        score_table: Union[str, ScoreTable, None] = None
+) -> StabilityReport:
+    """check_matching for the result of gale_shapley_matching (see problem_for_matches)."""
+    return check_matching(*problem_for_matches(teachers, auditoriums, teacher_matches, score_table))
+
+
+def read_matches(path: str, loader) -> List[int]:
+    """
+    Reads a matching as JSON lines of {"teacher", "auditorium", "day", "start", "end"} (the
+    service.py result lines; other lines are skipped) into auditorium indices of loader.problem.
+    """
+    problem = loader.problem
+    rooms = {}
+    for a, name in enumerate(loader.auditorium_names):
+        slot = loader.time_slots[loader.auditorium_slot[a]]
+        rooms.setdefault((name, problem.day_names[problem.day[a]], slot.start_time_seconds, slot.end_time_seconds), a)
+    teachers = {name: t for t, name in enumerate(problem.teacher_names)}
+    teacher_match = [NO_MATCH] * problem.num_teachers
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            entry = json.loads(line) if line.strip() else {}
+            if entry.get("auditorium") is None or "teacher" not in entry:
+                continue
+            slot = loader.time_slots[loader.time_slot(entry["start"], entry["end"])]
+            key = (entry["auditorium"], entry["day"], slot.start_time_seconds, slot.end_time_seconds)
+            if key not in rooms:
+                raise ValueError(f"Unknown auditorium in {path}: {key[:2]} {entry['start']}-{entry['end']}")
+            teacher_match[teachers[entry["teacher"]]] = rooms[key]
+    return teacher_match
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check a matching for blocking pairs (exit status 1 if unstable).")
+    parser.add_argument("teachers", help="Teacher rows (CSV or JSON lines, see loader.py)")
+    parser.add_argument("auditoriums", help="Auditorium rows")
+    parser.add_argument("--matches", help="JSON lines matching to check (e.g. service.py output); default: run the matcher")
+    parser.add_argument("--order", default=ProposalOrder.INSERTION.value, choices=[o.value for o in ProposalOrder])
+    parser.add_argument("--show", type=int, default=10, help="Blocking pairs to print")
+    args = parser.parse_args(argv)
+
+    from loader import load_problem
+
+    loader = load_problem(args.teachers, args.auditoriums)
+    problem = loader.problem
+    if args.matches:
+        teacher_match = read_matches(args.matches, loader)
+    else:
+        teacher_match = match_problem(problem, order=args.order)
+    report = check_matching(problem, teacher_match)
+    print(report)
+    for t, a in report.blocking_pairs[:args.show]:
+        print(f"  {problem.teacher_names[t]} <-> {loader.auditorium_names[a]} "
+              f"({problem.day_names[problem.day[a]]}, capacity {problem.capacity[a]})")
+    return 0 if report.is_stable else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
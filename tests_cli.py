@@ -0,0 +1,131 @@
+# tests_cli.py
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from gale_shapley_matching import match_problem
+from cli import main
+from loader import load_problem
+from stability import read_matches
+from tests_loader import auditorium_rows, teacher_rows
+from tests_matching import make_random_problem, make_shared_group_problem
+
+
+def write_json_lines(path, rows):
+    with open(path, "w", encoding="utf-8") as output:
+        output.writelines(json.dumps(row) + "\n" for row in rows)
+    return path
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = lambda name: os.path.join(self.directory.name, name)
+        for seed in range(2):
+            teachers, auditoriums = make_random_problem(seed)
+            write_json_lines(self.path(f"teachers{seed}.jsonl"), teacher_rows(teachers))
+            write_json_lines(self.path(f"auditoriums{seed}.jsonl"), auditorium_rows(auditoriums))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_match_writes_service_lines(self):
+        teachers, auditoriums = self.path("teachers0.jsonl"), self.path("auditoriums0.jsonl")
+        output = self.path("matches.jsonl")
+        self.assertEqual(main(["--env-file", "", "match", teachers, auditoriums, "--format", "jsonl", "-o", output]), 0)
+        loader = load_problem(teachers, auditoriums)
+        self.assertEqual(read_matches(output, loader), match_problem(loader.problem))
+
+    def test_budget_and_checkpoint_resume(self):
+        teachers, auditoriums = self.path("teachers0.jsonl"), self.path("auditoriums0.jsonl")
+        output, checkpoint = self.path("matches.jsonl"), self.path("run.checkpoint")
+        command = ["--env-file", "", "match", teachers, auditoriums, "--format", "jsonl", "-o", output,
+                   "--budget-seconds", "0", "--checkpoint", checkpoint]
+        runs = 0
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            while main(command) == 75:  # One teacher's turn per run
+                runs += 1
+                self.assertTrue(os.path.exists(checkpoint))
+        self.assertGreater(runs, 5)
+        self.assertIn("checkpoint saved to", errors.getvalue())
+        self.assertFalse(os.path.exists(checkpoint))
+        loader = load_problem(teachers, auditoriums)
+        self.assertEqual(read_matches(output, loader), match_problem(loader.problem))
+
+    def test_bad_arguments_exit_with_a_message(self):
+        teachers, auditoriums = self.path("teachers0.jsonl"), self.path("auditoriums0.jsonl")
+        with contextlib.redirect_stderr(io.StringIO()) as errors, self.assertRaises(SystemExit):
+            main(["--env-file", "", "match", teachers, auditoriums, "--solver", "bogus"])
+        self.assertIn("invalid choice: 'bogus'", errors.getvalue())
+        for arguments in ([teachers, auditoriums, "--score-table", "nope"], [teachers, self.path("missing.jsonl")]):
+            with self.assertRaises(SystemExit) as exit:
+                main(["--env-file", "", "match"] + arguments)
+            self.assertTrue(str(exit.exception.code).startswith("error: "), exit.exception.code)
+        with open(self.path("manifest.jsonl"), "w", encoding="utf-8") as manifest:
+            manifest.write("{not json\n")
+        with self.assertRaises(SystemExit) as exit:
+            main(["--env-file", "", "batch", self.path("manifest.jsonl")])
+        self.assertIn("error: ", str(exit.exception.code))
+
+    def test_max_weight_refuses_shared_groups(self):
+        teachers, auditoriums = make_shared_group_problem(seed=0)
+        write_json_lines(self.path("shared.jsonl"), teacher_rows(teachers))
+        write_json_lines(self.path("rooms.jsonl"), auditorium_rows(auditoriums))
+        with self.assertRaises(SystemExit) as exit:
+            main(["--env-file", "", "match", self.path("shared.jsonl"), self.path("rooms.jsonl"), "--solver", "max_weight"])
+        self.assertIn("share a Group", str(exit.exception.code))
+
+        manifest = write_json_lines(self.path("manifest.jsonl"), [
+            {"teachers": "shared.jsonl", "auditoriums": "rooms.jsonl", "output": "out.jsonl", "solver": "max_weight"}])
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertEqual(main(["--env-file", "", "batch", manifest]), 1)
+        self.assertIn("job 1: --solver max_weight cannot keep shared student groups", errors.getvalue())
+
+    def test_solver_choices_are_registered(self):
+        from cli import SOLVERS
+        from solvers import available_solvers
+
+        self.assertLessEqual(set(SOLVERS), set(available_solvers()))
+
+    def test_manifest_runs_every_job(self):
+        jobs = [{"teachers": "teachers0.jsonl", "auditoriums": "auditoriums0.jsonl", "output": "out0.jsonl"},
+                {"teachers": "teachers1.jsonl", "auditoriums": "auditoriums0.jsonl", "output": "out1.jsonl",
+                 "order": "random", "seed": 3},
+                {"teachers": "missing.jsonl", "auditoriums": "auditoriums1.jsonl", "output": "out2.jsonl"},
+                {"teachers": "teachers1.jsonl", "auditoriums": "auditoriums1.jsonl", "output": "out3.jsonl",
+                 "solver": "max_weight"}]
+        manifest = write_json_lines(self.path("manifest.jsonl"), jobs)
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertEqual(main(["--env-file", "", "--timing", "batch", manifest]), 1)  # The missing file
+        self.assertIn("job 3", errors.getvalue())
+        self.assertIn("2 reused inventories", errors.getvalue())  # Jobs 2 and 4
+
+        for job, expected in zip(jobs, ({}, {"order": "random", "seed": 3})):
+            loader = load_problem(self.path(job["teachers"]), self.path(job["auditoriums"]))
+            self.assertEqual(read_matches(self.path(job["output"]), loader), match_problem(loader.problem, **expected))
+        self.assertFalse(os.path.exists(self.path("out2.jsonl")))
+        self.assertTrue(os.path.exists(self.path("out3.jsonl")))
+
+    def test_demo_and_lazy_imports(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(main(["--env-file", "", "demo"]), 0)
+        self.assertIn("All teachers were matched.", output.getvalue())
+
+        # A stable match in a fresh interpreter needs neither NumPy nor logging
+        script = ("import sys, cli; cli.main(['--env-file', '', 'match', sys.argv[1], sys.argv[2], '-o', sys.argv[3]]); "
+                  "print(sorted(m for m in ('numpy', 'logging', 'dotenv') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", script, self.path("teachers0.jsonl"),
+                                 self.path("auditoriums0.jsonl"), self.path("out.txt")],
+                                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), "[]", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# tests_incremental_matching.py
+
+import random
+import unittest
+from datetime import time
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod, ProblemSet, ProposalOrder, NO_MATCH, match_problem,
+)
+from incremental_matching import IncrementalMatcher
+from tests_matching import make_random_problem, make_shared_group_problem
+
+
+def from_scratch(teachers, auditoriums, order=ProposalOrder.INSERTION):
+    """gale_shapley_matching's result by name, without touching teacher schedules."""
+    problem = ProblemSet.from_objects(teachers, auditoriums)
+    teacher_match = match_problem(problem, order=order)
+    matches = {problem.teacher_names[t]: problem.auditorium(a).name for t, a in enumerate(teacher_match)
+               if a != NO_MATCH}
+    return matches, set(teachers) - set(matches)
+
+
+def by_name(result):
+    matches, unmatched = result
+    return {name: aud.name for name, aud in matches.items()}, unmatched
+
+
+def blocking_pairs(teachers, auditoriums, result):
+    """Brute-force stability check: (teacher, auditorium) pairs that would both rather be together."""
+    problem = ProblemSet.from_objects(teachers, auditoriums)
+    matches, _ = result
+    names = {name: t for t, name in enumerate(problem.teacher_names)}
+    holder = {problem.auditorium_index(aud): names[name] for name, aud in matches.items()}
+    pairs = []
+    for name, t in names.items():
+        current = matches.get(name)
+        current_score = problem.score(t, problem.auditorium_index(current)) if current else -1
+        for a in range(problem.num_auditoriums):
+            if problem.conflicts(t, a) or problem.score(t, a) <= current_score:
+                continue
+            if a not in holder or problem.prefers(a, t, holder[a]):
+                pairs.append((name, problem.auditorium(a).name))
+    return pairs
+
+
+def spare_problem(seed, num_teachers=10, num_auditoriums=10):
+    """Extra teachers and auditoriums whose names don't clash with make_random_problem's."""
+    teachers, auditoriums = make_random_problem(seed, num_teachers=num_teachers, num_auditoriums=num_auditoriums)
+    for aud in auditoriums:
+        aud.name = "Spare " + aud.name
+    return {"Spare " + name: teacher for name, teacher in teachers.items()}, auditoriums
+
+
+class TestIncrementalMatcher(unittest.TestCase):
+
+    def test_updates_match_from_scratch(self):
+        for seed in range(6):
+            rng = random.Random(seed)
+            teachers, auditoriums = make_random_problem(seed)
+            spare_teachers, spare_auditoriums = spare_problem(seed + 100)
+            order = list(ProposalOrder)[seed % len(ProposalOrder)]
+            matcher = IncrementalMatcher(teachers, auditoriums, order=order)
+            self.assertEqual(by_name(matcher.result()), from_scratch(teachers, auditoriums, order))
+
+            for step in range(8):
+                current = matcher.current_auditoriums()
+                names = list(matcher.current_teachers())
+                kind = step % 5
+                if kind == 0:
+                    matcher.update(removed_auditoriums=rng.sample(current, 2))
+                elif kind == 1:
+                    matcher.update(added_auditoriums=[spare_auditoriums.pop()])
+                elif kind == 2:
+                    name = rng.choice(names)
+                    old = matcher.current_teachers()[name]
+                    new = Teacher(old.name, old.surname, Group("Changed", rng.randint(3, 35)), rng.choice(list(TimePeriod)))
+                    matcher.update(modified_teachers={name: new})
+                elif kind == 3:
+                    matcher.update(removed_teachers=[rng.choice(names)], added_teachers=dict([spare_teachers.popitem()]))
+                else:
+                    aud = rng.choice(current)
+                    aud.capacity = rng.choice([8, 15, 30])
+                    aud.size_category = Auditorium._get_size_category(aud.capacity)
+                    aud.preferences = Auditorium._preferences_for(aud.size_category)
+                    matcher.update(modified_auditoriums=[aud])
+                expected = from_scratch(matcher.current_teachers(), matcher.current_auditoriums(), order)
+                self.assertEqual(by_name(matcher.result()), expected)
+
+    def test_warm_start_stays_stable(self):
+        for seed in range(6):
+            rng = random.Random(seed)
+            teachers, auditoriums = make_random_problem(seed)
+            spare_teachers, _ = spare_problem(seed + 100, num_teachers=5)
+            matcher = IncrementalMatcher(teachers, auditoriums)
+            proposals = matcher.stats.proposals
+
+            result = matcher.update(removed_auditoriums=rng.sample(auditoriums, 3), exact=False)
+            result = matcher.update(added_teachers=spare_teachers, exact=False)
+            self.assertEqual(blocking_pairs(matcher.current_teachers(), matcher.current_auditoriums(), result), [])
+            self.assertLess(matcher.stats.proposals - proposals, proposals)  # Much less work than the first run
+
+            # Vacancy chains: rooms freed by removed or modified teachers go to those they turned down
+            for step in range(4):
+                names = list(matcher.current_teachers())
+                if step % 2:
+                    name = rng.choice(names)
+                    old = matcher.current_teachers()[name]
+                    new = Teacher(old.name, old.surname, Group("Changed", rng.randint(3, 35)), rng.choice(list(TimePeriod)))
+                    result = matcher.update(modified_teachers={name: new}, exact=False)
+                else:
+                    result = matcher.update(removed_teachers=rng.sample(names, 2), exact=False)
+                self.assertEqual(blocking_pairs(matcher.current_teachers(), matcher.current_auditoriums(), result), [])
+                self.assertEqual(set(result[0]) | result[1], set(matcher.current_teachers()))
+
+    def test_warm_start_without_ties_matches_from_scratch(self):
+        # Distinct group sizes: no auditorium is ever indifferent between two teachers
+        slot = TimeSlot(time(9, 0), time(10, 0))
+        auditoriums = [Auditorium(f"Room {cap}", cap, "Mon", slot) for cap in (10, 20, 30, 40)]
+        teachers = {f"T {n}": Teacher("T", str(n), Group(f"G {n}", n), TimePeriod.MORNING) for n in (9, 18, 25, 35)}
+        matcher = IncrementalMatcher(teachers, auditoriums)
+
+        result = matcher.update(removed_auditoriums=[auditoriums[3]], exact=False)
+        self.assertEqual(by_name(result), from_scratch(matcher.current_teachers(), matcher.current_auditoriums()))
+        extra = {"T 28": Teacher("T", "28", Group("G 28", 28), TimePeriod.MORNING)}
+        result = matcher.update(added_teachers=extra, exact=False)
+        self.assertEqual(by_name(result), from_scratch(matcher.current_teachers(), matcher.current_auditoriums()))
+
+    def test_shared_groups_replay_from_scratch(self):
+        for seed in range(3):
+            rng = random.Random(seed)
+            teachers, auditoriums = make_shared_group_problem(seed)
+            matcher = IncrementalMatcher(teachers, auditoriums)
+            self.assertIsNotNone(matcher.state.groups)
+            matcher.update(removed_auditoriums=rng.sample(auditoriums, 3), exact=False)  # Replays
+            matcher.update(removed_teachers=rng.sample(list(teachers), 2), exact=False)
+            self.assertEqual(by_name(matcher.result()),
+                             from_scratch(matcher.current_teachers(), matcher.current_auditoriums()))
+
+
+if __name__ == "__main__":
+    unittest.main()
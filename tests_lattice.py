@@ -0,0 +1,103 @@
+# tests_lattice.py
+
+import random
+import unittest
+
+from gale_shapley_matching import ProblemSet, Preference, SizeCategory, ScoreTable, NO_MATCH
+from lattice import (
+    StableLattice, auditorium_optimal_matching, auditorium_proposing_matching, best_stable_matching, teacher_prefers,
+)
+from stability import check_matching
+from tests_matching import make_random_problem, make_shared_group_problem
+from utilization import utilization_summary
+
+# Teachers like the rooms that like their group size least, so the two sides disagree
+CONTRARY = ScoreTable("contrary", size_weights={Preference.HIGH: 0.0, Preference.MEDIUM: 1.0, Preference.LOW: 2.0})
+
+
+def make_contrary_problem(seed, num_teachers=8, num_auditoriums=7):
+    rng = random.Random(seed)
+    teachers, auditoriums = make_random_problem(seed, num_teachers, num_auditoriums, days=("Mon",))
+    for aud in auditoriums:
+        aud.preferences = {category: rng.choice(list(Preference)) for category in SizeCategory}
+    return ProblemSet.from_objects(teachers, auditoriums, CONTRARY)
+
+
+def brute_force_stable_matchings(problem, lattice):
+    """Every matching of acceptable pairs with no blocking pair under the lattice's strict preferences."""
+    acceptable = [[a for a in range(problem.num_auditoriums)
+                   if problem.group_size[t] <= problem.capacity[a] and not problem.conflicts(t, a)]
+                  for t in range(problem.num_teachers)]
+    found = []
+
+    def is_stable(match):
+        holder = [NO_MATCH] * problem.num_auditoriums
+        for t, a in enumerate(match):
+            if a != NO_MATCH:
+                holder[a] = t
+        return not any(teacher_prefers(problem, t, a, match[t]) and
+                       (holder[a] == NO_MATCH or lattice.ranking.position(a)[t] < lattice.ranking.position(a)[holder[a]])
+                       for t in range(problem.num_teachers) for a in acceptable[t] if a != match[t])
+
+    def extend(match, used):
+        if len(match) == problem.num_teachers:
+            if is_stable(match):
+                found.append(tuple(match))
+            return
+        for a in [NO_MATCH] + [a for a in acceptable[len(match)] if a not in used]:
+            extend(match + [a], used | {a})
+
+    extend([], set())
+    return sorted(found)
+
+
+class TestStableLattice(unittest.TestCase):
+
+    def test_endpoints_are_stable(self):
+        for seed in range(5):
+            problem = ProblemSet.from_objects(*make_random_problem(seed, num_teachers=80, num_auditoriums=60))
+            lattice = StableLattice(problem)
+            for teacher_match in (lattice.teacher_optimal, lattice.auditorium_optimal):
+                self.assertTrue(check_matching(problem, teacher_match).is_stable)
+            # The same teachers and rooms are matched in every stable matching
+            self.assertEqual([a == NO_MATCH for a in lattice.teacher_optimal],
+                             [a == NO_MATCH for a in lattice.auditorium_optimal])
+            self.assertEqual(sorted(lattice.teacher_optimal), sorted(lattice.auditorium_optimal))
+
+    def test_enumerates_every_stable_matching(self):
+        larger = 0
+        for seed in range(30):
+            problem = make_contrary_problem(seed)
+            lattice = StableLattice(problem)
+            matchings = [tuple(m) for m in lattice.matchings()]
+            self.assertEqual(sorted(matchings), brute_force_stable_matchings(problem, lattice), seed)
+            self.assertEqual(matchings[0], tuple(lattice.teacher_optimal))
+            self.assertIn(tuple(lattice.auditorium_optimal), matchings)
+            larger += len(matchings) > 1
+        self.assertGreater(larger, 1)
+
+    def test_objects_api_and_best_by_utilization(self):
+        teachers, auditoriums = make_random_problem(seed=3)
+        matches, unmatched = auditorium_proposing_matching(teachers, auditoriums)
+        self.assertEqual(len(matches) + len(unmatched), len(teachers))
+        for name, auditorium in matches.items():
+            self.assertIs(teachers[name].schedule[-1], auditorium)
+
+        problem = make_contrary_problem(1)
+        matchings = list(StableLattice(problem))
+        best = best_stable_matching(problem)
+        self.assertIn(best, matchings)
+        self.assertEqual(utilization_summary(problem, best)["utilization"],
+                         max(utilization_summary(problem, m)["utilization"] for m in matchings))
+        self.assertEqual(best_stable_matching(problem, key=lambda m: 0, limit=1), matchings[0])
+
+    def test_refuses_shared_groups(self):
+        problem = ProblemSet.from_objects(*make_shared_group_problem(seed=0))
+        with self.assertRaises(ValueError):
+            StableLattice(problem)
+        with self.assertRaises(ValueError):
+            auditorium_optimal_matching(problem)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# tests_loader.py
+
+import csv
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from gale_shapley_matching import TimePeriod, ProblemSet, NO_MATCH, gale_shapley_matching, match_problem
+from loader import ProblemLoader, load_problem, parse_time_period, read_rows
+from tests_matching import make_random_problem, match_by_auditorium_name
+
+AUDITORIUM_FIELDS = ["name", "capacity", "day", "start", "end"]
+TEACHER_FIELDS = ["name", "surname", "group", "students", "time_preference", "bookings"]
+
+
+def auditorium_rows(auditoriums):
+    return [{"name": aud.name, "capacity": aud.capacity, "day": aud.day,
+             "start": aud.time_slot.start_time.isoformat(), "end": aud.time_slot.end_time.isoformat()}
+            for aud in auditoriums]
+
+
+def teacher_rows(teachers):
+    return [{"name": teacher.name, "surname": teacher.surname, "group": teacher.group.name,
+             "students": teacher.group.num_students, "time_preference": teacher.time_preference.name.lower(),
+             "bookings": [f"{booked.day} {booked.time_slot.start_time:%H:%M}-{booked.time_slot.end_time:%H:%M}"
+                          for booked in teacher.schedule]}
+            for teacher in teachers.values()]
+
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_csv(self, name, fields, rows):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.DictWriter(output, fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "bookings": ";".join(row["bookings"])} if "bookings" in row else row)
+        return path
+
+    def write_json_lines(self, name, rows):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as output:
+            output.writelines(json.dumps(row) + "\n" for row in rows)
+        return path
+
+    def test_csv_and_json_lines_match_objects(self):
+        for seed in range(3):
+            teachers, auditoriums = make_random_problem(seed)
+            csv_loader = load_problem(self.write_csv("teachers.csv", TEACHER_FIELDS, teacher_rows(teachers)),
+                                      self.write_csv("auditoriums.csv", AUDITORIUM_FIELDS, auditorium_rows(auditoriums)))
+            json_loader = load_problem(self.write_json_lines("teachers.jsonl", teacher_rows(teachers)),
+                                       self.write_json_lines("auditoriums.jsonl", auditorium_rows(auditoriums)))
+            reference = ProblemSet.from_objects(teachers, auditoriums)
+            expected = match_problem(reference)
+
+            for loader in (csv_loader, json_loader):
+                problem = loader.problem
+                self.assertEqual(problem.teacher_names, reference.teacher_names)
+                for column in ("group_size", "group_category", "time_preference", "capacity", "period",
+                               "start", "end"):
+                    self.assertEqual(getattr(problem, column), getattr(reference, column))
+                self.assertEqual(match_problem(problem), expected)
+
+    def test_lazy_views(self):
+        teachers, auditoriums = make_random_problem(seed=5)
+        loader = ProblemLoader()
+        loader.add_auditorium_rows(auditorium_rows(auditoriums))
+        loader.add_teacher_rows(teacher_rows(teachers))
+        problem = loader.problem
+        self.assertEqual(problem._teachers.count(None), len(teachers))  # Nothing built yet
+        self.assertLess(len(loader.time_slots), len(auditoriums))  # Slots are interned
+
+        teacher_match = match_problem(problem)
+        matches = {problem.teacher_names[t]: problem.auditorium(a) for t, a in enumerate(teacher_match)
+                   if a != NO_MATCH}
+        ref_teachers, ref_auditoriums = make_random_problem(seed=5)
+        ref_matches, _ = gale_shapley_matching(ref_teachers, ref_auditoriums)
+        self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(ref_matches))
+
+        for t, (name, original) in enumerate(teachers.items()):
+            view = problem.teacher(t)
+            self.assertIs(problem.teacher(t), view)
+            self.assertEqual((view.full_name, view.group.num_students, view.time_preference),
+                             (name, original.group.num_students, original.time_preference))
+            self.assertEqual(len(view.schedule), len(original.schedule))
+        a = teacher_match[0] if teacher_match[0] != NO_MATCH else 0
+        self.assertEqual(problem.auditorium_index(problem.auditorium(a)), a)
+
+        restored = pickle.loads(pickle.dumps(problem))
+        self.assertEqual(match_problem(restored), teacher_match)
+
+    def test_invalid_rows(self):
+        loader = ProblemLoader()
+        with self.assertRaisesRegex(ValueError, "auditorium row 2"):
+            loader.add_auditorium_rows([{"name": "A", "capacity": "10", "day": "Mon", "start": "09:00", "end": "10:00"},
+                                        {"name": "B", "capacity": "0", "day": "Mon", "start": "09:00", "end": "10:00"}])
+        with self.assertRaisesRegex(ValueError, "auditorium row 1"):
+            loader.add_auditorium_rows([{"capacity": "10", "day": "Mon", "start": "09:00", "end": "10:00"}])
+        self.assertEqual(len(loader.auditorium_names), loader.problem.num_auditoriums)
+        with self.assertRaisesRegex(ValueError, "teacher row 1"):
+            loader.add_teacher_rows([{"name": "X", "surname": "Y", "group": "G", "students": "5",
+                                      "time_preference": "evening"}])
+
+    def test_parse_time_period(self):
+        self.assertEqual(parse_time_period("Morning"), TimePeriod.MORNING)
+        self.assertEqual(parse_time_period(TimePeriod.MIDDAY.value), TimePeriod.MIDDAY)
+        self.assertEqual(list(read_rows(self.write_json_lines("empty.jsonl", []))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,20 @@
 # test_matching.py
 
+import io
+import json
+import os
+import pickle
+import random
+import tempfile
 import unittest
 from datetime import time
 from gale_shapley_matching import (
     TimeSlot, Auditorium, Group, Teacher, TimePeriod, SizeCategory, Preference,
     is_schedule_conflict, get_teacher_preference_score, is_teacher_better_match,
+    build_teacher_preference_lists, ProblemSet, IntervalIndex, match_problem, NO_MATCH,
+    ProposalOrder, MatchingStats, MatchingMetrics, CandidateIndex, ScoreTable, register_score_table, get_score_table,
+    unregister_score_table, initial_proposal_order, gale_shapley_timetable,
+    Budget, MatchingCheckpoint, match_problem_budgeted, gale_shapley_matching_budgeted,
     gale_shapley_matching # Assuming overlap was defined or import if needed
 )
 
@@ -12,6 +22,67 @@ from gale_shapley_matching import (
 def overlap(ts1: TimeSlot, ts2: TimeSlot) -> bool:
     return ts1.start_time < ts2.end_time and ts2.start_time < ts1.end_time
 
+def reference_gale_shapley_matching(teachers, auditoriums):
+    """The original re-ranking implementation, kept as a regression oracle."""
+    unmatched_teacher_names = list(teachers.keys())
+    teacher_matches = {}
+    auditorium_matches = {aud: None for aud in auditoriums}
+    proposal_attempts = {name: set() for name in teachers}
+
+    while unmatched_teacher_names:
+        teacher_name = unmatched_teacher_names.pop(0)
+        teacher = teachers[teacher_name]
+        possible_auditoriums = []
+        for aud in auditoriums:
+            if (teacher.group.num_students <= aud.capacity and
+                    not is_schedule_conflict(teacher, aud) and
+                    aud not in proposal_attempts[teacher_name]):
+                score = get_teacher_preference_score(teacher, aud)
+                if score >= 0:
+                    possible_auditoriums.append((score, aud))
+        possible_auditoriums.sort(key=lambda x: x[0], reverse=True)
+
+        for score, preferred_auditorium in possible_auditoriums:
+            proposal_attempts[teacher_name].add(preferred_auditorium)
+            current_match_name = auditorium_matches.get(preferred_auditorium)
+            if current_match_name is None:
+                teacher_matches[teacher_name] = preferred_auditorium
+                auditorium_matches[preferred_auditorium] = teacher_name
+                teacher.schedule.append(preferred_auditorium)
+                break
+            current_matched_teacher = teachers[current_match_name]
+            if is_teacher_better_match(teacher, preferred_auditorium, current_matched_teacher):
+                teacher_matches[teacher_name] = preferred_auditorium
+                auditorium_matches[preferred_auditorium] = teacher_name
+                teacher.schedule.append(preferred_auditorium)
+                del teacher_matches[current_match_name]
+                current_matched_teacher.schedule.remove(preferred_auditorium)
+                unmatched_teacher_names.append(current_match_name)
+                break
+
+    return teacher_matches, {name for name in teachers if name not in teacher_matches}
+
+
+def make_random_problem(seed, num_teachers=30, num_auditoriums=40, days=("Mon", "Tue")):
+    """Builds a reproducible random instance; each teacher gets their own group and a few bookings."""
+    rng = random.Random(seed)
+    slots = [TimeSlot(time(h, 0), time(h + 1, 30)) for h in (8, 9, 10, 12, 13, 15, 16)]
+    auditoriums = [
+        Auditorium(f"Aud {i}", rng.choice([5, 8, 10, 12, 15, 20, 25, 30, 40]), rng.choice(days), rng.choice(slots))
+        for i in range(num_auditoriums)
+    ]
+    teachers = {}
+    for i in range(num_teachers):
+        group = Group(f"Group {i}", rng.randint(3, 35))
+        schedule = [Auditorium(f"Busy {i}-{j}", 40, rng.choice(days), rng.choice(slots)) for j in range(rng.randint(0, 2))]
+        teachers[f"Teacher {i}"] = Teacher("Teacher", str(i), group, rng.choice(list(TimePeriod)), schedule)
+    return teachers, auditoriums
+
+
+def match_by_auditorium_name(matches):
+    return {name: aud.name for name, aud in matches.items()}
+
+
 class TestTimeSlot(unittest.TestCase):
 
     def test_period_calculation(self):
@@ -120,6 +191,41 @@ class TestTeacherHelpers(unittest.TestCase):
         # No Conflict: Empty schedule
         self.assertFalse(is_schedule_conflict(self.t2, self.aud_m_mid))
 
+    def test_schedule_index_stays_in_sync(self):
+        slots = [TimeSlot(time(h, 0), time(h + 2, 0)) for h in range(8, 18)]
+        rng = random.Random(7)
+        booked = [Auditorium(f"Booked {i}", 10, rng.choice(["Mon", "Tue"]), rng.choice(slots)) for i in range(40)]
+        probes = [Auditorium(f"Probe {i}", 10, day, slot) for i, (day, slot) in
+                  enumerate((d, s) for d in ["Mon", "Tue", "Wed"] for s in slots)]
+
+        def linear_conflict(schedule, aud):
+            return any(b.day == aud.day and b.time_slot.overlaps(aud.time_slot) for b in schedule)
+
+        t = self.t1
+        for aud in booked:
+            t.schedule.append(aud)
+            if rng.random() < 0.3:
+                t.schedule.remove(rng.choice(t.schedule))
+            for probe in probes:
+                self.assertEqual(is_schedule_conflict(t, probe), linear_conflict(t.schedule, probe))
+
+        own = [booked[0]]
+        t.schedule = own  # Plain list assignment is indexed too
+        self.assertTrue(is_schedule_conflict(t, booked[0]))
+        own.append(booked[1])  # The list is wrapped, not copied: direct appends are seen
+        self.assertTrue(is_schedule_conflict(t, booked[1]))
+        t.schedule.clear()
+        self.assertEqual(own, [])
+        self.assertFalse(is_schedule_conflict(t, booked[0]))
+
+    def test_callers_schedule_list_receives_matches(self):
+        busy = Auditorium("Busy", 40, "Mon", self.ts_aft)
+        own = [busy]
+        teacher = Teacher("Own", "List", Group("GO", 12), TimePeriod.MORNING, own)
+        matches, _ = gale_shapley_matching({teacher.full_name: teacher}, [self.aud_l_morn])
+        self.assertEqual(own, [busy, matches[teacher.full_name]])
+        self.assertEqual(teacher.schedule, own)
+
     def test_teacher_preference_score(self):
          # t1 (Small, Prefers Morning) proposing to various auditoriums
          score_t1_aud_s_morn = get_teacher_preference_score(self.t1, self.aud_s_morn) # Perfect match: Time HIGH, Size HIGH
@@ -136,6 +242,45 @@ class TestTeacherHelpers(unittest.TestCase):
          score_t2_aud_too_small = get_teacher_preference_score(self.t2, aud_too_small) # t2 group size 15 > 5 capacity
          self.assertEqual(score_t2_aud_too_small, -1.0) # Should return -1 if doesn't fit
 
+    def test_score_tables(self):
+        def explicit_score(teacher, aud, table):
+            # The original per-call computation, with the table's weights
+            if teacher.group.num_students > aud.capacity:
+                return -1.0
+            time_pref = Teacher.calculate_time_preferences(teacher.time_preference, table.adjacent_periods)
+            return (table.time_weights[time_pref.get(aud.time_slot.period, Preference.LOW)]
+                    + table.size_weights[aud.preferences.get(teacher.group.size_category, Preference.LOW)])
+
+        custom = Auditorium("Custom Prefs", 30, "Mon", self.ts_mid)
+        custom.preferences = {SizeCategory.SMALL: Preference.HIGH}  # Falls back from the lookup table
+        weighted = ScoreTable("test_weighted",
+                              time_weights={Preference.HIGH: 5, Preference.MEDIUM: 2, Preference.LOW: 0},
+                              size_weights={Preference.HIGH: 2, Preference.MEDIUM: 1, Preference.LOW: 0})
+        register_score_table(weighted)
+        try:
+            teachers = [self.t1, self.t2, self.t3, self.t4]
+            auditoriums = [self.aud_s_morn, self.aud_m_mid, self.aud_l_aft, self.aud_l_morn, self.aud_s_mid, custom]
+            for table in (get_score_table(), get_score_table("adjacent_periods"), get_score_table("test_weighted")):
+                problem = ProblemSet.from_objects({t.full_name: t for t in teachers}, auditoriums, table.name)
+                for t, teacher in enumerate(teachers):
+                    for a, aud in enumerate(auditoriums):
+                        expected = explicit_score(teacher, aud, table)
+                        self.assertEqual(get_teacher_preference_score(teacher, aud, table), expected)
+                        self.assertEqual(problem.score(t, a), expected)
+        finally:
+            self.assertIs(unregister_score_table(weighted.name), weighted)  # Registered globally: don't leak
+        self.assertIs(get_score_table(), get_score_table("default"))
+        self.assertRaises(KeyError, get_score_table, weighted.name)
+        self.assertRaises(ValueError, unregister_score_table, "default")
+
+        # Adjacent periods: MIDDAY is next to both others, MORNING and AFTERNOON are not adjacent
+        self.assertEqual(get_teacher_preference_score(self.t1, self.aud_s_mid, "adjacent_periods"), 1 + 1.0)
+        self.assertEqual(get_teacher_preference_score(self.t1, self.aud_s_mid), 0 + 1.0)
+        adjacent = Teacher.calculate_time_preferences(TimePeriod.MORNING, adjacent_periods=True)
+        self.assertEqual(adjacent[TimePeriod.AFTERNOON], Preference.LOW)
+        with self.assertRaises(KeyError):
+            get_score_table("missing")
+
     def test_is_teacher_better_match(self):
          # Scenario: aud_m_mid (Medium Cap 20) is currently held by t4 (Small Group 8, Pref Midday)
          # Should t2 (Medium Group 15, Pref Midday) replace t4?
@@ -159,6 +304,80 @@ class TestTeacherHelpers(unittest.TestCase):
          self.assertFalse(is_teacher_better_match(self.t2, self.aud_s_morn, self.t1))
 
 
+class TestIntervalIndex(unittest.TestCase):
+
+    def test_overlaps_with_nested_intervals(self):
+        index = IntervalIndex()
+        index.add("Mon", 0, 100)  # Long interval hiding shorter ones that start later
+        index.add("Mon", 10, 20)
+        index.add("Mon", 200, 300)
+        self.assertTrue(index.overlaps("Mon", 50, 60))
+        self.assertFalse(index.overlaps("Mon", 100, 200))  # Touching is not overlapping
+        self.assertFalse(index.overlaps("Tue", 0, 1000))
+
+        index.remove("Mon", 0, 100)
+        self.assertFalse(index.overlaps("Mon", 50, 60))
+        self.assertTrue(index.overlaps("Mon", 15, 16))
+        self.assertEqual(len(index), 2)
+        with self.assertRaises(ValueError):
+            index.remove("Mon", 0, 100)
+
+
+class TestProblemSet(unittest.TestCase):
+
+    def test_shared_preference_tables(self):
+        ts = TimeSlot(time(9, 0), time(10, 0))
+        a1, a2 = Auditorium("A1", 15, "Mon", ts), Auditorium("A2", 18, "Tue", ts)
+        self.assertIs(a1.preferences, a2.preferences)  # One mapping per SizeCategory
+        with self.assertRaises(TypeError):
+            a1.preferences[SizeCategory.SMALL] = Preference.LOW  # Read-only: would change every such room
+        self.assertIs(pickle.loads(pickle.dumps(a1)).preferences, a1.preferences)
+        custom = Auditorium("A3", 15, "Wed", ts)
+        custom.preferences = {SizeCategory.SMALL: Preference.HIGH}
+        self.assertEqual(pickle.loads(pickle.dumps(custom)).preferences, custom.preferences)
+
+        teachers, auditoriums = make_random_problem(seed=4)
+        problem = ProblemSet.from_objects(teachers, auditoriums + auditoriums[:3])  # Duplicates kept once
+        self.assertEqual(problem.num_auditoriums, len(auditoriums))
+        self.assertLessEqual(len(problem.preference_tables), len(SizeCategory))
+
+    def test_index_helpers_match_object_helpers(self):
+        teachers, auditoriums = make_random_problem(seed=5)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        for t, (name, teacher) in enumerate(teachers.items()):
+            self.assertIs(problem.teacher(t), teacher)
+            self.assertEqual(problem.teacher_names[t], name)
+            for a, aud in enumerate(auditoriums):
+                self.assertIs(problem.auditorium(a), aud)
+                self.assertEqual(problem.score(t, a), get_teacher_preference_score(teacher, aud))
+                self.assertEqual(problem.conflicts(t, a), is_schedule_conflict(teacher, aud))
+                other = problem.teacher((t + 1) % problem.num_teachers)
+                self.assertEqual(problem.prefers(a, t, (t + 1) % problem.num_teachers),
+                                 is_teacher_better_match(teacher, aud, other))
+            self.assertEqual([problem.auditorium(a) for a in problem.rank_auditoriums(t)],
+                             build_teacher_preference_lists({name: teacher}, auditoriums)[name])
+
+
+    def test_candidate_index(self):
+        for seed in range(5):
+            teachers, auditoriums = make_random_problem(seed)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            index = CandidateIndex(problem)
+            for t in range(problem.num_teachers):
+                self.assertEqual(list(index.candidates(t)), problem.rank_auditoriums(t))
+                self.assertEqual(list(index.ranked(t)), problem.rank_auditoriums(t))
+                self.assertEqual(index.count(t), len(problem.rank_auditoriums(t)))
+
+            ranked = [index.ranked(t) for t in range(problem.num_teachers)]
+            eager = [problem.rank_auditoriums(t) for t in range(problem.num_teachers)]
+            self.assertEqual(initial_proposal_order(problem, ranked, ProposalOrder.MOST_CONSTRAINED),
+                             initial_proposal_order(problem, eager, ProposalOrder.MOST_CONSTRAINED))
+            self.assertEqual(sum(r.materialized for r in ranked), 0)  # Sorted by length without ranking
+            self.assertEqual(match_problem(problem, ranked), match_problem(problem, eager))
+            self.assertLess(sum(r.materialized for r in ranked), sum(len(r) for r in eager))  # Not fully ranked
+            self.assertEqual(len(ranked[0]), len(eager[0]))
+
+
 class TestGaleShapleyMatching(unittest.TestCase):
 
     def test_simple_match(self):
@@ -246,6 +465,269 @@ class TestGaleShapleyMatching(unittest.TestCase):
         self.assertIn(aud_s, t_a.schedule)
         self.assertNotIn(aud_m, t_a.schedule) # Ensure A was removed from Aud M's schedule
 
+    def test_preference_lists_ranked_once(self):
+        g = Group("Small", 8)
+        t = Teacher("List", "Teacher", g, TimePeriod.MORNING)
+        aud_mid = Auditorium("Mid", 10, "Mon", TimeSlot(time(12, 0), time(13, 0)))
+        aud_morn = Auditorium("Morn", 10, "Mon", TimeSlot(time(9, 0), time(10, 0)))
+        aud_tiny = Auditorium("Tiny", 5, "Mon", TimeSlot(time(9, 0), time(10, 0)))  # Group doesn't fit
+
+        lists = build_teacher_preference_lists({"List Teacher": t}, [aud_mid, aud_morn, aud_tiny, aud_morn])
+        self.assertEqual(lists["List Teacher"], [aud_morn, aud_mid])  # Best first, no duplicates
+
+    def test_matches_reference_implementation(self):
+        # Same (teacher_matches, unmatched) as the original re-ranking loop on random instances
+        for seed in range(25):
+            teachers, auditoriums = make_random_problem(seed)
+            matches, unmatched = gale_shapley_matching(teachers, auditoriums)
+
+            ref_teachers, ref_auditoriums = make_random_problem(seed)
+            ref_matches, ref_unmatched = reference_gale_shapley_matching(ref_teachers, ref_auditoriums)
+
+            self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(ref_matches))
+            self.assertEqual(unmatched, ref_unmatched)
+            for name, teacher in teachers.items():
+                self.assertEqual([a.name for a in teacher.schedule], [a.name for a in ref_teachers[name].schedule])
+
+    def test_match_problem_is_deterministic(self):
+        teachers, auditoriums = make_random_problem(seed=11)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        first = match_problem(problem)
+        self.assertEqual(match_problem(problem), first)  # Same input, same proposal order, same result
+
+        matches, unmatched = gale_shapley_matching(teachers, auditoriums)
+        for t, a in enumerate(first):
+            name = problem.teacher_names[t]
+            if a == NO_MATCH:
+                self.assertIn(name, unmatched)
+            else:
+                self.assertIs(matches[name], problem.auditorium(a))
+
+    def test_proposal_orders(self):
+        teachers, auditoriums = make_random_problem(seed=12)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        ranked = [problem.rank_auditoriums(t) for t in range(problem.num_teachers)]
+
+        by_constraint = initial_proposal_order(problem, ranked, ProposalOrder.MOST_CONSTRAINED)
+        self.assertEqual([len(ranked[t]) for t in by_constraint], sorted(len(r) for r in ranked))
+        by_size = initial_proposal_order(problem, ranked, "group_size")
+        self.assertEqual([problem.group_size[t] for t in by_size], sorted(problem.group_size, reverse=True))
+        self.assertEqual(initial_proposal_order(problem, ranked, ProposalOrder.RANDOM, seed=3),
+                         initial_proposal_order(problem, ranked, ProposalOrder.RANDOM, seed=3))
+
+        for order in ProposalOrder:
+            stats = MatchingStats()
+            teacher_match = match_problem(problem, ranked, order=order, seed=1, stats=stats)
+            matched = sum(a != NO_MATCH for a in teacher_match)
+            self.assertEqual(stats.proposals, matched + stats.displacements + stats.rejections)
+            self.assertEqual(len(set(a for a in teacher_match if a != NO_MATCH)), matched)  # No room used twice
+            self.assertEqual(match_problem(problem, ranked, order=order, seed=1), teacher_match)  # Reproducible
+
+    def test_metrics_and_trace(self):
+        teachers, auditoriums = make_random_problem(seed=13)
+        events = []
+        metrics = MatchingMetrics(trace=True, on_event=events.append, profile_ranking=True)
+        matches, unmatched = gale_shapley_matching(teachers, auditoriums, stats=metrics)
+
+        ref_teachers, ref_auditoriums = make_random_problem(seed=13)
+        stats = MatchingStats()
+        ref_matches, _ = gale_shapley_matching(ref_teachers, ref_auditoriums, stats=stats)
+        self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(ref_matches))
+        self.assertEqual({name: getattr(metrics, name) for name in MatchingStats.__slots__}, stats.as_dict())
+
+        exported = metrics.as_dict()
+        self.assertEqual(set(exported["timings"]), {"build", "conflicts", "scoring", "proposals", "apply"})
+        self.assertEqual((exported["runs"], exported["ranked_lists"]), (1, len(teachers)))
+        self.assertEqual(events, metrics.trace)
+        outcomes = [event["outcome"] for event in metrics.trace]
+        self.assertEqual(outcomes.count("rejected"), metrics.rejections)
+        self.assertEqual(outcomes.count("displaced"), metrics.displacements)
+        self.assertEqual(outcomes.count("accepted") + outcomes.count("rejected"), metrics.proposals)
+        for name, aud in matches.items():
+            self.assertEqual(metrics.teacher_trace(name)[-1]["outcome"], "accepted")
+
+        output = io.StringIO()
+        metrics.write_json_lines(output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[0]["type"], "summary")
+        self.assertEqual(len(lines), 1 + len(metrics.trace))
+
+
+def make_shared_group_problem(seed, num_teachers=60, num_auditoriums=50, num_groups=12):
+    """make_random_problem with teachers drawn from a few Groups, each group taught by several teachers."""
+    rng = random.Random(seed)
+    teachers, auditoriums = make_random_problem(seed, num_teachers, num_auditoriums)
+    groups = [Group(f"Shared {i}", rng.randint(3, 35)) for i in range(num_groups)]
+    for teacher in teachers.values():
+        teacher.group = rng.choice(groups)
+    return teachers, auditoriums
+
+
+class TestGroupBookings(unittest.TestCase):
+
+    def test_shared_groups_are_never_double_booked(self):
+        from stability import check_matching, group_clashes
+
+        for seed in range(6):
+            teachers, auditoriums = make_shared_group_problem(seed)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            stats = MatchingStats()
+            teacher_match = match_problem(problem, stats=stats)
+            self.assertGreater(stats.group_clashes, 0)
+            report = check_matching(problem, teacher_match)
+            self.assertEqual((report.infeasible, report.double_booked, report.group_clashes), ([], [], []))
+
+            # On a shuffled matching, the sweep finds what comparing every pair of group bookings finds
+            shuffled = teacher_match[:]
+            random.Random(seed).shuffle(shuffled)
+            busy = [[(problem.day[a], problem.start[a], problem.end[a], True)] if a != NO_MATCH else []
+                    for a in shuffled]
+            for t, bookings in enumerate(problem.bookings):
+                busy[t] += [(*interval, False) for interval in (bookings.intervals() if bookings else ())]
+            expected = [(t1, t2) for t1 in range(problem.num_teachers) for t2 in range(t1 + 1, problem.num_teachers)
+                        if problem.group[t1] == problem.group[t2] and any(
+                            d1 == d2 and s1 < e2 and s2 < e1 and (matched1 or matched2)
+                            for d1, s1, e1, matched1 in busy[t1] for d2, s2, e2, matched2 in busy[t2])]
+            self.assertTrue(expected)
+            self.assertEqual(group_clashes(problem, shuffled), expected)
+
+    def test_deferred_room_is_retried_after_release(self):
+        late = Auditorium("Late morning", 10, "Monday", TimeSlot(time(11, 0), time(12, 30)))
+        early = Auditorium("Early", 30, "Monday", TimeSlot(time(10, 0), time(11, 30)))
+        noon = Auditorium("Noon", 30, "Monday", TimeSlot(time(12, 0), time(13, 30)))
+        seminar = Group("Seminar", 8)
+        teachers = {
+            "A": Teacher("A", "", seminar, TimePeriod.MORNING),
+            "B": Teacher("B", "", seminar, TimePeriod.MIDDAY),
+            "C": Teacher("C", "", Group("Lab", 9), TimePeriod.MORNING),
+        }
+        metrics = MatchingMetrics(trace=True)
+        matches, unmatched = gale_shapley_matching(teachers, [late, early, noon], stats=metrics)
+        # Every room overlaps A's "Late morning": B skips two, finds the Seminar full at the third and
+        # waits. C displaces A, A moves to "Early", and the released booking wakes B for noon.
+        self.assertEqual(match_by_auditorium_name(matches), {"A": "Early", "B": "Noon", "C": "Late morning"})
+        self.assertEqual(unmatched, set())
+        self.assertEqual([event["outcome"] for event in metrics.teacher_trace("B")], ["group_clash"] * 2 + ["accepted"])
+        self.assertEqual(metrics.group_clashes, 2)
+
+
+class TestCheckpoints(unittest.TestCase):
+
+    def test_resumed_runs_match_uninterrupted_runs(self):
+        for seed in range(8):
+            make = make_shared_group_problem if seed % 2 else make_random_problem
+            teachers, auditoriums = make(seed, num_teachers=50, num_auditoriums=40)
+            order = list(ProposalOrder)[seed % len(ProposalOrder)]
+            expected_stats = MatchingStats()
+            expected = match_problem(ProblemSet.from_objects(teachers, auditoriums), order=order, seed=seed,
+                                     stats=expected_stats)
+
+            stats, checkpoint, calls = MatchingStats(), None, 0
+            while True:
+                # A fresh problem each call, as in a new process, and the checkpoint through bytes
+                problem = ProblemSet.from_objects(teachers, auditoriums)
+                teacher_match, checkpoint = match_problem_budgeted(problem, order=order, seed=seed, stats=stats,
+                                                                   budget=Budget(proposals=1 + seed % 4),
+                                                                   checkpoint=checkpoint)
+                calls += 1
+                if checkpoint is None:
+                    break
+                checkpoint = MatchingCheckpoint.from_bytes(checkpoint.to_bytes())
+            self.assertGreater(calls, 10)
+            self.assertEqual(teacher_match, expected)
+            self.assertEqual(stats.as_dict(), expected_stats.as_dict())
+
+    def test_gale_shapley_matching_budgeted(self):
+        teachers, auditoriums = make_random_problem(seed=3)
+        expected = match_by_auditorium_name(gale_shapley_matching(*make_random_problem(seed=3))[0])
+        schedules = {name: list(teacher.schedule) for name, teacher in teachers.items()}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.checkpoint")
+            matches, unmatched, checkpoint = gale_shapley_matching_budgeted(teachers, auditoriums,
+                                                                            budget=Budget(proposals=5))
+            self.assertEqual(len(matches) + len(unmatched), len(teachers))
+            self.assertEqual({name: teacher.schedule for name, teacher in teachers.items()}, schedules)  # Tentative
+            while checkpoint is not None:
+                checkpoint.save(path)
+                matches, unmatched, checkpoint = gale_shapley_matching_budgeted(
+                    teachers, auditoriums, budget=Budget(seconds=0), checkpoint=MatchingCheckpoint.load(path))
+        self.assertEqual(match_by_auditorium_name(matches), expected)
+        for name, auditorium in matches.items():
+            self.assertIs(teachers[name].schedule[-1], auditorium)
+
+    def test_checkpoint_checks_its_problem(self):
+        teachers, auditoriums = make_random_problem(seed=4)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        _, checkpoint = match_problem_budgeted(problem, budget=Budget(proposals=3))
+        data = checkpoint.to_bytes()
+        self.assertLess(len(data), 400 + 12 * problem.num_teachers)
+        auditoriums[0].capacity += 1
+        with self.assertRaises(ValueError):
+            match_problem_budgeted(ProblemSet.from_objects(teachers, auditoriums), checkpoint=checkpoint)
+        for corrupt in (b"not a checkpoint", data[:-4]):
+            with self.assertRaises(ValueError):
+                MatchingCheckpoint.from_bytes(corrupt)
+
+
+class TestGaleShapleyTimetable(unittest.TestCase):
+
+    def test_quota_one_is_gale_shapley(self):
+        for seed in range(5):
+            teachers, auditoriums = make_random_problem(seed)
+            sessions, underfilled = gale_shapley_timetable(teachers, auditoriums, quotas=1)
+            ref_teachers, ref_auditoriums = make_random_problem(seed)
+            ref_matches, ref_unmatched = gale_shapley_matching(ref_teachers, ref_auditoriums)
+            self.assertEqual({name: [aud.name] for name, aud in ref_matches.items()},
+                             {name: [aud.name for aud in booked] for name, booked in sessions.items()})
+            self.assertEqual(underfilled, ref_unmatched)
+
+    def test_weekly_timetable(self):
+        for seed in range(5):
+            teachers, auditoriums = make_random_problem(seed, num_teachers=15, num_auditoriums=60,
+                                                        days=("Mon", "Tue", "Wed"))
+            quotas = {name: 1 + i % 4 for i, name in enumerate(teachers)}
+            existing = {name: list(teacher.schedule) for name, teacher in teachers.items()}
+            sessions, underfilled = gale_shapley_timetable(teachers, auditoriums, quotas=quotas)
+
+            holders = {}
+            for name, booked in sessions.items():
+                self.assertLessEqual(len(booked), quotas[name])
+                for i, aud in enumerate(booked):
+                    self.assertNotIn(aud, holders)  # One teacher per auditorium slot
+                    holders[aud] = teachers[name]
+                    others = existing[name] + booked[i + 1:]
+                    self.assertFalse(any(o.day == aud.day and o.time_slot.overlaps(aud.time_slot) for o in others))
+            self.assertEqual(underfilled, {name for name in teachers if len(sessions.get(name, [])) < quotas[name]})
+
+            # An underfilled teacher could not take any room they fit in without an overlap
+            for name in underfilled:
+                teacher = teachers[name]
+                for aud in auditoriums:
+                    if aud in sessions.get(name, []) or get_teacher_preference_score(teacher, aud) < 0:
+                        continue
+                    if any(o.day == aud.day and o.time_slot.overlaps(aud.time_slot) for o in teacher.schedule):
+                        continue
+                    self.assertIn(aud, holders)
+                    self.assertFalse(is_teacher_better_match(teacher, aud, holders[aud]))
+
+    def test_shared_groups_in_timetable(self):
+        for seed in range(5):
+            teachers, auditoriums = make_shared_group_problem(seed)
+            expected, _ = gale_shapley_matching(*make_shared_group_problem(seed))
+            sessions, _ = gale_shapley_timetable(teachers, auditoriums, quotas=1)
+            self.assertEqual({name: [aud.name for aud in booked] for name, booked in sessions.items()},
+                             {name: [aud.name] for name, aud in expected.items()})
+
+            teachers, auditoriums = make_shared_group_problem(seed)
+            existing = {name: list(teacher.schedule) for name, teacher in teachers.items()}
+            sessions, _ = gale_shapley_timetable(teachers, auditoriums, quotas=3)
+            booked = [(teachers[name].group, aud, name) for name, rooms in sessions.items() for aud in rooms]
+            busy = booked + [(teachers[name].group, aud, None) for name, rooms in existing.items() for aud in rooms]
+            for group, aud, name in booked:
+                self.assertFalse(any(other_group is group and other is not aud and other.day == aud.day
+                                     and other.time_slot.overlaps(aud.time_slot) for other_group, other, _ in busy),
+                                 (name, aud.name))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,47 @@
+# tests_parallel_matching.py
+
+import pickle
+import unittest
+
+from gale_shapley_matching import ProblemSet, gale_shapley_matching, match_problem
+from parallel_matching import match_per_day
+from tests_matching import make_random_problem, match_by_auditorium_name
+
+DAYS = ("Mon", "Tue", "Wed")
+
+
+class TestMatchPerDay(unittest.TestCase):
+
+    def test_problem_set_pickles_arrays_only(self):
+        teachers, auditoriums = make_random_problem(seed=2, days=DAYS)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        restored = pickle.loads(pickle.dumps(problem))
+        self.assertEqual(match_problem(restored), match_problem(problem))
+        with self.assertRaises(IndexError):
+            restored.teacher(0)  # Object views don't travel
+
+    def test_matches_serial_runs_per_day(self):
+        for max_workers in (1, 2):
+            teachers, auditoriums = make_random_problem(seed=3, days=DAYS)
+            per_day = match_per_day(teachers, auditoriums, max_workers=max_workers)
+            self.assertEqual(list(per_day), list(dict.fromkeys(aud.day for aud in auditoriums)))
+
+            for day, (matches, unmatched) in per_day.items():
+                ref_teachers, ref_auditoriums = make_random_problem(seed=3, days=DAYS)
+                ref_matches, ref_unmatched = gale_shapley_matching(
+                    ref_teachers, [aud for aud in ref_auditoriums if aud.day == day])
+                self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(ref_matches))
+                self.assertEqual(unmatched, ref_unmatched)
+                for name, aud in matches.items():
+                    self.assertIn(aud, teachers[name].schedule)
+
+    def test_days_by_teacher(self):
+        teachers, auditoriums = make_random_problem(seed=4, days=DAYS)
+        only_monday = {name: ["Mon"] for name in teachers}
+        per_day = match_per_day(teachers, auditoriums, days_by_teacher=only_monday, max_workers=1)
+        self.assertTrue(per_day["Mon"][0])
+        self.assertEqual(per_day["Tue"], ({}, set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
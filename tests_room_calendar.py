@@ -0,0 +1,79 @@
+# tests_room_calendar.py
+
+import random
+import unittest
+from datetime import time
+
+from gale_shapley_matching import TimeSlot, Auditorium, Group, Teacher, TimePeriod, gale_shapley_matching
+from room_calendar import RoomCalendar, RoomInventory, weekly_template, calendar_matching
+
+DAYS = ("Monday", "Tuesday", "Wednesday")
+SLOTS = [TimeSlot(time(h, 0), time(h + 1, 30)) for h in (8, 10, 12, 15)]
+EVENING = TimeSlot(time(18, 0), time(19, 30))
+
+
+def make_inventory(seed, num_rooms=12):
+    rng = random.Random(seed)
+    template = weekly_template(DAYS, SLOTS)
+    inventory = RoomInventory()
+    for i in range(num_rooms):
+        closed = [rng.choice(DAYS)] if rng.random() < 0.3 else []
+        closed += [(rng.choice(DAYS), rng.choice(SLOTS)) for _ in range(rng.randint(0, 2))]
+        extra = [(rng.choice(DAYS), EVENING)] if rng.random() < 0.3 else []
+        inventory.add(RoomCalendar(f"Room {i}", rng.choice([8, 12, 20, 30, 45]), template, closed, extra))
+    return inventory
+
+
+def make_teachers(seed, num_teachers=30):
+    rng = random.Random(seed)
+    return {f"Teacher {i}": Teacher("Teacher", str(i), Group(f"Group {i}", rng.randint(3, 40)),
+                                    rng.choice(list(TimePeriod)),
+                                    [Auditorium("Busy", 40, rng.choice(DAYS), rng.choice(SLOTS))])
+            for i in range(num_teachers)}
+
+
+class TestRoomCalendar(unittest.TestCase):
+
+    def test_template_with_exceptions(self):
+        calendar = RoomCalendar("Lab", 20, weekly_template(DAYS, SLOTS), closed=["Tuesday", ("Monday", SLOTS[0])],
+                                extra=[("Wednesday", EVENING)])
+        slots = list(calendar.slots())
+        self.assertEqual(len(slots), len(calendar))
+        self.assertEqual(slots[0], ("Monday", SLOTS[1]))
+        self.assertEqual(slots[-1], ("Wednesday", EVENING))
+        self.assertEqual(len(slots), 3 + 4 + 1)
+        self.assertFalse(calendar.is_open("Tuesday", SLOTS[1]))
+        self.assertFalse(calendar.is_open("Monday", TimeSlot(time(8, 0), time(9, 30))))  # Same times, other object
+        self.assertTrue(calendar.is_open("Wednesday", EVENING))
+        calendar.close("Wednesday", EVENING)
+        self.assertEqual(len(calendar), 7)
+
+    def test_problem_columns_and_views(self):
+        inventory = make_inventory(seed=0)
+        problem = inventory.problem()
+        self.assertEqual(problem.num_auditoriums, len(inventory))
+        for a, (calendar, day, slot) in enumerate(inventory.room_slots()):
+            self.assertEqual((problem.capacity[a], problem.day_names[problem.day[a]], problem.start[a]),
+                             (calendar.capacity, day, slot.start_time_seconds))
+            if a % 7 == 0:
+                auditorium = problem.auditorium(a)
+                self.assertEqual((auditorium.name, auditorium.day), (calendar.name, day))
+                self.assertIs(auditorium.time_slot, slot)  # Shared with the calendar, not copied
+
+    def test_same_result_as_materialized_auditoriums(self):
+        for seed in range(5):
+            inventory = make_inventory(seed)
+            auditoriums = [Auditorium(calendar.name, calendar.capacity, day, slot)
+                           for calendar, day, slot in inventory.room_slots()]
+            expected, expected_unmatched = gale_shapley_matching(make_teachers(seed), auditoriums)
+            teachers = make_teachers(seed)
+            matches, unmatched = calendar_matching(teachers, inventory)
+            self.assertEqual(unmatched, expected_unmatched)
+            self.assertEqual({name: (aud.name, aud.day, aud.time_slot) for name, aud in matches.items()},
+                             {name: (aud.name, aud.day, aud.time_slot) for name, aud in expected.items()})
+            for name, auditorium in matches.items():
+                self.assertIs(teachers[name].schedule[-1], auditorium)
+
+
+if __name__ == "__main__":
+    unittest.main()
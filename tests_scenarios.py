@@ -0,0 +1,83 @@
+# tests_scenarios.py
+
+import random
+import unittest
+
+from gale_shapley_matching import Group, Teacher, TimePeriod, NO_MATCH, ProposalOrder, gale_shapley_matching
+from scenarios import Scenario, ScenarioRunner
+from tests_matching import make_random_problem, match_by_auditorium_name
+
+
+def random_scenarios(teachers, auditoriums, count, seed=0):
+    rng = random.Random(seed)
+    names = list(teachers)
+    scenarios = []
+    for i in range(count):
+        scenarios.append(Scenario(
+            f"scenario {i}",
+            closed=rng.sample(auditoriums, rng.randint(0, 4)),
+            removed=rng.sample(names, rng.randint(0, 2)),
+            group_sizes={name: rng.randint(3, 40) for name in rng.sample(names, rng.randint(0, 3))},
+            time_preferences={name: rng.choice(list(TimePeriod)) for name in rng.sample(names, rng.randint(0, 5))},
+        ))
+    return scenarios
+
+
+def apply_scenario(scenario, teachers, auditoriums):
+    """The scenario applied to fresh copies of the inputs, for a from-scratch run."""
+    closed = {id(aud) for aud in scenario.closed}
+    changed = {}
+    for name, teacher in teachers.items():
+        if name in scenario.removed:
+            continue
+        group = teacher.group
+        if name in scenario.group_sizes:
+            group = Group(group.name, scenario.group_sizes[name])
+        changed[name] = Teacher(teacher.name, teacher.surname, group,
+                                scenario.time_preferences.get(name, teacher.time_preference), list(teacher.schedule))
+    return changed, [aud for aud in auditoriums if id(aud) not in closed]
+
+
+class TestScenarios(unittest.TestCase):
+
+    def test_matches_from_scratch_runs(self):
+        for order in (ProposalOrder.INSERTION, ProposalOrder.GROUP_SIZE):
+            teachers, auditoriums = make_random_problem(seed=7, num_teachers=50, num_auditoriums=40)
+            runner = ScenarioRunner(teachers, auditoriums, order=order)
+            scenarios = random_scenarios(teachers, auditoriums, 12)
+            for scenario, result in zip(scenarios, runner.run(scenarios)):
+                expected, expected_unmatched = gale_shapley_matching(*apply_scenario(scenario, teachers, auditoriums),
+                                                                     order=order)
+                matches, unmatched = result.matches()
+                self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(expected), scenario.name)
+                self.assertEqual(unmatched, expected_unmatched | set(scenario.removed))
+                self.assertEqual(result.matched, len(matches))
+            self.assertTrue(all(len(teacher.schedule) <= 2 for teacher in teachers.values()))  # Schedules untouched
+
+    def test_diff_against_baseline(self):
+        teachers, auditoriums = make_random_problem(seed=8)
+        runner = ScenarioRunner(teachers, auditoriums)
+        taken = [a for a in runner.baseline if a != NO_MATCH]
+        unchanged, closing = runner.run([Scenario("nothing"), Scenario("close one", closed=[taken[0]])])
+        self.assertEqual((unchanged.changes, unchanged.teacher_match), ([], runner.baseline))
+        holder = runner.baseline.index(taken[0])
+        self.assertIn(holder, [t for t, _, _ in closing.changes])
+        name, before, after = next(change for change in closing.named_changes() if change[0] ==
+                                   runner.problem.teacher_names[holder])
+        self.assertIs(before, runner.problem.auditorium(taken[0]))
+        self.assertIsNot(after, before)
+        with self.assertRaises(KeyError):
+            runner.run([Scenario("unknown", removed=["Nobody"])])
+
+    def test_worker_pool_gives_same_results(self):
+        teachers, auditoriums = make_random_problem(seed=9, num_teachers=60, num_auditoriums=45)
+        runner = ScenarioRunner(teachers, auditoriums)
+        scenarios = random_scenarios(teachers, auditoriums, 10, seed=1)
+        serial = runner.run(scenarios)
+        parallel = runner.run(scenarios, max_workers=2)
+        self.assertEqual([(r.name, r.changes, r.matched, r.total_score) for r in parallel],
+                         [(r.name, r.changes, r.matched, r.total_score) for r in serial])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# tests_score_cache.py
+
+import tempfile
+import unittest
+from datetime import time
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod, ProblemSet, gale_shapley_matching,
+)
+from score_cache import ScoreCache, teacher_fingerprint
+from tests_matching import make_random_problem, match_by_auditorium_name
+
+
+def rank_all(problem):
+    return [problem.rank_auditoriums(t) for t in range(problem.num_teachers)]
+
+
+class TestScoreCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cold_and_warm_runs_match_rank_auditoriums(self):
+        teachers, auditoriums = make_random_problem(seed=1)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        with ScoreCache(self.directory.name) as cache:
+            self.assertEqual(cache.ranked_lists(problem), rank_all(problem))
+            self.assertEqual(cache.hits, 0)
+        with ScoreCache(self.directory.name) as cache:  # Reopened from disk
+            self.assertEqual(cache.ranked_lists(problem), rank_all(problem))
+            self.assertEqual(cache.misses, 0)
+            self.assertGreater(cache.hits, 0)
+
+    def test_only_changes_are_recomputed(self):
+        teachers, auditoriums = make_random_problem(seed=2)
+        with ScoreCache(self.directory.name) as cache:
+            cache.ranked_lists(ProblemSet.from_objects(teachers, auditoriums))
+
+        name = next(iter(teachers))
+        teachers[name] = Teacher("Changed", "Teacher", Group("Odd Group", 7), TimePeriod.AFTERNOON)
+        auditoriums.append(Auditorium("New Room", 25, "Mon", TimeSlot(time(7, 0), time(7, 45))))
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        with ScoreCache(self.directory.name) as cache:
+            self.assertEqual(cache.ranked_lists(problem), rank_all(problem))
+            self.assertEqual(cache.misses, 1)  # The changed teacher
+            distinct = {teacher_fingerprint(problem, t) for t in range(problem.num_teachers)}
+            self.assertEqual(cache.partial_hits, len(distinct) - 1)  # Everybody else: the new column only
+            self.assertEqual(cache.hits, 0)
+
+    def test_lru_eviction_keeps_file_bounded(self):
+        teachers, auditoriums = make_random_problem(seed=3)
+        max_bytes = 4 * len(auditoriums) * 10  # About ten rows
+        with ScoreCache(self.directory.name, max_bytes=max_bytes) as cache:
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            self.assertEqual(cache.ranked_lists(problem), rank_all(problem))  # Correct even when rows don't fit
+            self.assertLess(len(cache.rows), len(teachers))
+            self.assertLessEqual(len(cache.rows), cache.row_capacity)
+            self.assertLessEqual(cache.row_capacity * len(cache.columns) * 4, max_bytes)
+
+            few = dict(list(teachers.items())[:3])
+            cache.ranked_lists(ProblemSet.from_objects(few, auditoriums))
+            other_teachers, _ = make_random_problem(seed=4)
+            cache.ranked_lists(ProblemSet.from_objects(other_teachers, auditoriums))
+            self.assertGreater(cache.evictions, 0)
+            self.assertLessEqual(len(cache.rows), cache.row_capacity)
+
+    def test_preference_lists_for_gale_shapley(self):
+        teachers, auditoriums = make_random_problem(seed=5)
+        with ScoreCache(self.directory.name) as cache:
+            lists = cache.preference_lists(teachers, auditoriums)
+        matches, unmatched = gale_shapley_matching(teachers, auditoriums, preference_lists=lists)
+        ref_teachers, ref_auditoriums = make_random_problem(seed=5)
+        ref_matches, ref_unmatched = gale_shapley_matching(ref_teachers, ref_auditoriums)
+        self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(ref_matches))
+        self.assertEqual(unmatched, ref_unmatched)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# tests_score_matrix.py
+
+import copy
+import unittest
+from datetime import time
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod,
+    get_teacher_preference_score, build_teacher_preference_lists, gale_shapley_matching,
+)
+from score_matrix import teacher_auditorium_score_matrix, preference_lists_from_scores
+from tests_matching import make_random_problem, match_by_auditorium_name
+
+
+class TestScoreMatrix(unittest.TestCase):
+
+    def test_matches_per_pair_scores(self):
+        teachers, auditoriums = make_random_problem(seed=1, num_teachers=40, num_auditoriums=30)
+        scores = teacher_auditorium_score_matrix(teachers, auditoriums, block_rows=7)  # Several row blocks
+
+        self.assertEqual(scores.shape, (len(teachers), len(auditoriums)))
+        for i, teacher in enumerate(teachers.values()):
+            for j, aud in enumerate(auditoriums):
+                self.assertEqual(float(scores[i, j]), get_teacher_preference_score(teacher, aud))
+
+    def test_capacity_mask(self):
+        t = Teacher("Big", "Teacher", Group("Big Group", 20), TimePeriod.MORNING)
+        a = Auditorium("Small Aud", 10, "Mon", TimeSlot(time(9, 0), time(10, 0)))
+        self.assertEqual(float(teacher_auditorium_score_matrix({"Big Teacher": t}, [a])[0, 0]), -1.0)
+
+    def test_preference_lists_and_matching(self):
+        for seed in range(5):
+            teachers, auditoriums = make_random_problem(seed, num_teachers=40, num_auditoriums=30)
+            scores = teacher_auditorium_score_matrix(teachers, auditoriums)
+            lists = preference_lists_from_scores(teachers, auditoriums, scores)
+            self.assertEqual(lists, build_teacher_preference_lists(teachers, auditoriums))
+            with_duplicates = auditoriums + auditoriums[::3] + [copy.copy(a) for a in auditoriums[1::4]]  # Equal by id
+            scores = teacher_auditorium_score_matrix(teachers, with_duplicates)
+            duplicate_lists = preference_lists_from_scores(teachers, with_duplicates, scores, block_rows=7)
+            self.assertEqual(duplicate_lists, lists)
+            self.assertEqual(duplicate_lists, build_teacher_preference_lists(teachers, with_duplicates))
+
+            matches, unmatched = gale_shapley_matching(teachers, auditoriums, preference_lists=lists)
+            ref_teachers, ref_auditoriums = make_random_problem(seed, num_teachers=40, num_auditoriums=30)
+            ref_matches, ref_unmatched = gale_shapley_matching(ref_teachers, ref_auditoriums)
+            self.assertEqual(match_by_auditorium_name(matches), match_by_auditorium_name(ref_matches))
+            self.assertEqual(unmatched, ref_unmatched)
+
+
+if __name__ == "__main__":
+    unittest.main()
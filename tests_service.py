@@ -0,0 +1,179 @@
+# tests_service.py
+
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from gale_shapley_matching import NO_MATCH, match_problem
+from loader import ProblemLoader
+from service import MatchingService, match_batch, inventory_key, MAX_BODY_BYTES
+from tests_loader import auditorium_rows, teacher_rows
+from tests_matching import make_random_problem
+
+
+def expected_matches(auditoriums, teachers):
+    loader = ProblemLoader()
+    loader.add_auditorium_rows(auditoriums)
+    loader.add_teacher_rows(teachers)
+    problem = loader.problem
+    return {problem.teacher_names[t]: (auditoriums[a]["name"] if a != NO_MATCH else None)
+            for t, a in enumerate(match_problem(problem))}
+
+
+class FailingExecutor(ThreadPoolExecutor):
+    """Runs every batch as a worker that crashes."""
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(self._crash)
+
+    @staticmethod
+    def _crash():
+        raise RuntimeError("worker crashed")
+
+
+class ServiceThread:
+    """A MatchingService on its own event loop in a background thread."""
+
+    def __init__(self, **options):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.service = MatchingService(**options)
+        self.host, self.port = self.call(self.service.start())
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=60)
+
+    def stop(self):
+        self.call(self.service.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def request(self, method, path, payload=None):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            body = None if payload is None else (payload if isinstance(payload, bytes) else json.dumps(payload))
+            connection.request(method, path, body=body)
+            response = connection.getresponse()
+            lines = [json.loads(line) for line in response.read().decode().splitlines()]
+            return response.status, lines
+        finally:
+            connection.close()
+
+    def raw_request(self, data):
+        """Sends `data` as is and reads the response until the server closes the connection."""
+        with socket.create_connection((self.host, self.port), timeout=60) as connection:
+            connection.sendall(data)
+            response = b"".join(iter(lambda: connection.recv(65536), b""))
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    def match(self, job):
+        status, lines = self.request("POST", "/match", job)
+        if status != 200:
+            return status, lines[0]
+        return status, (lines[0], {line["teacher"]: line["auditorium"] for line in lines[1:-1]}, lines[-1])
+
+
+class TestMatchingService(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ServiceThread(batch_window=0.2)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_results_are_streamed_and_match_the_library(self):
+        teachers, auditoriums = make_random_problem(seed=1)
+        job = {"teachers": teacher_rows(teachers), "auditoriums": auditorium_rows(auditoriums)}
+        status, (header, matches, summary) = self.server.match(job)
+        self.assertEqual(status, 200)
+        self.assertEqual(header["inventory"], inventory_key(job["auditoriums"]))
+        self.assertEqual(matches, expected_matches(job["auditoriums"], job["teachers"]))
+        self.assertTrue(summary["done"])
+        self.assertEqual(summary["matched"], sum(name is not None for name in matches.values()))
+
+        # The inventory can be referenced by key instead of being sent again
+        status, (_, again, _) = self.server.match({"teachers": job["teachers"], "inventory": header["inventory"]})
+        self.assertEqual((status, again), (200, matches))
+
+    def test_concurrent_jobs_on_one_inventory_are_coalesced(self):
+        _, auditoriums = make_random_problem(seed=2)
+        inventory = auditorium_rows(auditoriums)
+        jobs = [{"teachers": teacher_rows(make_random_problem(seed)[0]), "auditoriums": inventory}
+                for seed in range(3, 7)]
+        with ThreadPoolExecutor(len(jobs)) as clients:
+            results = list(clients.map(self.server.match, jobs))
+        for job, (status, (header, matches, _)) in zip(jobs, results):
+            self.assertEqual(status, 200)
+            self.assertEqual(header["batch_size"], len(jobs))
+            self.assertEqual(matches, expected_matches(inventory, job["teachers"]))
+        status, (health,) = self.server.request("GET", "/health")
+        self.assertEqual((status, health["jobs"], health["batches"]), (200, len(jobs), 1))
+
+    def test_errors(self):
+        teachers, auditoriums = make_random_problem(seed=7)
+        rows = teacher_rows(teachers)
+        self.assertEqual(self.server.request("POST", "/match", b"{not json")[0], 400)
+        self.assertEqual(self.server.match({"teachers": rows, "inventory": "missing"})[0], 404)
+        self.assertEqual(self.server.match({"teachers": rows, "auditoriums": [], "order": "alphabetical"})[0], 400)
+        status, error = self.server.match({"teachers": [{"name": "X"}], "auditoriums": auditorium_rows(auditoriums)})
+        self.assertEqual(status, 400)
+        self.assertIn("teacher row 1", error["error"])
+        self.assertEqual(self.server.request("GET", "/match")[0], 405)
+        self.assertEqual(self.server.request("GET", "/elsewhere")[0], 404)
+
+        # Requests that can't be read are answered too, and the connection is closed
+        self.assertEqual(self.server.raw_request(b"GARBAGE\r\n\r\n"), (400, {"error": "Malformed request line"}))
+        bad_length = b"POST /match HTTP/1.1\r\nContent-Length: many\r\n\r\n"
+        self.assertEqual(self.server.raw_request(bad_length), (400, {"error": "Invalid Content-Length"}))
+        too_large = f"POST /match HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n{{}}".encode()
+        self.assertEqual(self.server.raw_request(too_large)[0], 413)
+        self.assertEqual(self.server.request("GET", "/health")[0], 200)
+
+    def test_invalid_inventories_are_not_remembered(self):
+        teachers, auditoriums = make_random_problem(seed=7)
+        inventory = auditorium_rows(auditoriums)
+        inventory[-1] = dict(inventory[-1], capacity="0")
+        status, error = self.server.match({"teachers": teacher_rows(teachers), "auditoriums": inventory})
+        self.assertEqual(status, 400)
+        self.assertIn("auditorium row", error["error"])
+        status, _ = self.server.match({"teachers": teacher_rows(teachers), "inventory": inventory_key(inventory)})
+        self.assertEqual(status, 404)
+
+    def test_worker_failures_get_a_response(self):
+        executor = FailingExecutor(1)
+        server = ServiceThread(executor=executor)
+        try:
+            teachers, auditoriums = make_random_problem(seed=7)
+            job = {"teachers": teacher_rows(teachers), "auditoriums": auditorium_rows(auditoriums)}
+            with self.assertLogs("service", "ERROR"):
+                status, error = server.match(job)
+            self.assertEqual((status, error), (500, {"error": "Matching failed"}))
+            by_key = {"teachers": job["teachers"], "inventory": inventory_key(job["auditoriums"])}
+            self.assertEqual(server.match(by_key)[0], 404)
+        finally:
+            server.stop()
+            executor.shutdown()
+
+
+class TestMatchBatch(unittest.TestCase):
+
+    def test_jobs_share_one_parsed_inventory(self):
+        _, auditoriums = make_random_problem(seed=8)
+        inventory = auditorium_rows(auditoriums)
+        jobs = [(teacher_rows(make_random_problem(seed)[0]), "insertion", 0) for seed in (9, 10)]
+        results = match_batch(inventory_key(inventory), inventory, jobs)
+        for (rows, _, _), result in zip(jobs, results):
+            matches = {name: (inventory[a]["name"] if a != NO_MATCH else None)
+                       for name, a in zip(result["names"], result["match"])}
+            self.assertEqual(matches, expected_matches(inventory, rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# tests_solvers.py
+
+import unittest
+from datetime import time
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod, ProblemSet, NO_MATCH, match_problem,
+)
+from solvers import (
+    SparseScores, register_solver, get_solver, available_solvers, solve_problem, solve_matching,
+    max_weight_matching, total_score,
+)
+from stability import check_matching
+from tests_matching import make_random_problem, make_shared_group_problem
+
+
+def best_total_score(problem):
+    """Highest total score over every assignment, by exhaustive search."""
+    scores = SparseScores(problem)
+    options = [list(zip(*map(list, scores.row(t)))) for t in range(problem.num_teachers)]
+
+    def best(t, taken):
+        if t == problem.num_teachers:
+            return 0.0
+        result = best(t + 1, taken)
+        for a, weight in options[t]:
+            if a not in taken:
+                result = max(result, weight + best(t + 1, taken | {a}))
+        return result
+
+    return best(0, frozenset())
+
+
+class TestMaxWeight(unittest.TestCase):
+
+    def test_matches_exhaustive_search(self):
+        for seed in range(25):
+            teachers, auditoriums = make_random_problem(seed, num_teachers=6, num_auditoriums=5)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            teacher_match = max_weight_matching(problem)
+            self.assertTrue(check_matching(problem, teacher_match).is_valid, f"seed {seed}")
+            self.assertEqual(total_score(problem, teacher_match), best_total_score(problem), f"seed {seed}")
+
+    def test_never_below_stable_matching(self):
+        for seed in range(10):
+            teachers, auditoriums = make_random_problem(seed, num_teachers=80, num_auditoriums=60)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            teacher_match = max_weight_matching(problem)
+            self.assertTrue(check_matching(problem, teacher_match).is_valid)
+            self.assertGreaterEqual(total_score(problem, teacher_match), total_score(problem, match_problem(problem)))
+
+    def test_trades_stability_for_total_score(self):
+        morning, afternoon = TimeSlot(time(9, 0), time(10, 30)), TimeSlot(time(15, 0), time(16, 30))
+        # X gains 1 from the morning room, Y would lose 3 without it
+        auditoriums = [Auditorium("Morning", 30, "Mon", morning), Auditorium("Afternoon", 30, "Mon", afternoon)]
+        teachers = {
+            "X A": Teacher("X", "A", Group("GX", 25), TimePeriod.MIDDAY),
+            "Y B": Teacher("Y", "B", Group("GY", 25), TimePeriod.MORNING, [Auditorium("Busy", 30, "Mon", afternoon)]),
+        }
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        self.assertEqual(total_score(problem, max_weight_matching(problem)),
+                         max(total_score(problem, [0, 1]), total_score(problem, [1, 0])))
+
+        matches, unmatched = solve_matching(teachers, auditoriums, solver="max_weight")
+        self.assertEqual({name: aud.name for name, aud in matches.items()}, {"X A": "Afternoon", "Y B": "Morning"})
+        self.assertEqual(unmatched, set())
+        self.assertIs(teachers["Y B"].schedule[-1], auditoriums[0])
+
+    def test_match_bonus_seats_more_teachers(self):
+        teachers, auditoriums = make_random_problem(seed=5, num_teachers=60, num_auditoriums=50)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        plain = max_weight_matching(problem)
+        seated = max_weight_matching(problem, match_bonus=4 * problem.num_teachers)
+        count = lambda teacher_match: sum(a != NO_MATCH for a in teacher_match)
+        self.assertGreaterEqual(count(seated), count(plain))
+        self.assertGreaterEqual(count(seated), count(match_problem(problem)))
+
+    def test_refuses_shared_groups(self):
+        problem = ProblemSet.from_objects(*make_shared_group_problem(seed=0))
+        with self.assertRaises(ValueError):
+            max_weight_matching(problem)
+        with self.assertRaises(ValueError):
+            solve_problem(problem, "max_weight")
+
+
+class TestSolverRegistry(unittest.TestCase):
+
+    def test_registry(self):
+        self.assertIn("gale_shapley", available_solvers())
+        self.assertIn("max_weight", available_solvers())
+        with self.assertRaises(KeyError):
+            get_solver("simplex")
+
+        register_solver("nobody", lambda problem, stats=None: [NO_MATCH] * problem.num_teachers)
+        teachers, auditoriums = make_random_problem(seed=0)
+        matches, unmatched = solve_matching(teachers, auditoriums, solver="nobody")
+        self.assertEqual((matches, unmatched), ({}, set(teachers)))
+
+        problem = ProblemSet.from_objects(*make_random_problem(seed=0))
+        self.assertEqual(solve_problem(problem), match_problem(problem))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# tests_stability.py
+
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from gale_shapley_matching import ProblemSet, ProposalOrder, NO_MATCH, match_problem, gale_shapley_matching
+from loader import ProblemLoader
+from stability import (
+    BlockingPairIndex, check_matching, blocking_pairs_pairwise, verify_matching, read_matches, main,
+)
+from tests_loader import auditorium_rows, teacher_rows
+from tests_matching import make_random_problem
+
+
+def perturb(teacher_match, num_auditoriums, rng):
+    """A different (not necessarily stable) matching: a few teachers moved to random free rooms or unmatched."""
+    result = list(teacher_match)
+    taken = {a for a in result if a != NO_MATCH}
+    for t in rng.sample(range(len(result)), min(5, len(result))):
+        free = [a for a in range(num_auditoriums) if a not in taken]
+        if result[t] != NO_MATCH:
+            taken.discard(result[t])
+        result[t] = rng.choice(free + [NO_MATCH])
+        taken.add(result[t])
+    return result
+
+
+class TestStability(unittest.TestCase):
+
+    def test_matcher_results_are_stable(self):
+        for seed in range(10):
+            teachers, auditoriums = make_random_problem(seed, num_teachers=60, num_auditoriums=40)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            for order in ProposalOrder:
+                teacher_match = match_problem(problem, order=order, seed=seed)
+                report = check_matching(problem, teacher_match)
+                self.assertTrue(report.is_stable, f"seed {seed}, {order}: {report}")
+                self.assertEqual(blocking_pairs_pairwise(problem, teacher_match), [])
+
+    def test_agrees_with_pairwise_check(self):
+        rng = random.Random(0)
+        for seed in range(20):
+            teachers, auditoriums = make_random_problem(seed)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            teacher_match = perturb(match_problem(problem), problem.num_auditoriums, rng)
+            report = check_matching(problem, teacher_match)
+            self.assertEqual(report.blocking_pairs, blocking_pairs_pairwise(problem, teacher_match))
+        self.assertFalse(report.is_stable)
+
+    def test_index_follows_assignments(self):
+        rng = random.Random(1)
+        teachers, auditoriums = make_random_problem(seed=4)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        index = BlockingPairIndex(problem, match_problem(problem))
+        for _ in range(5):
+            teacher_match = perturb(index.match, problem.num_auditoriums, rng)
+            for t, a in enumerate(teacher_match):
+                if a != index.match[t]:
+                    index.assign(t, NO_MATCH)
+            for t, a in enumerate(teacher_match):
+                index.assign(t, a)
+            expected = blocking_pairs_pairwise(problem, teacher_match)
+            self.assertEqual(sorted((t, a) for t in range(problem.num_teachers) for a in index.teacher_blocks(t)),
+                             expected)
+            self.assertEqual(sorted((t, a) for a in range(problem.num_auditoriums) for t in index.auditorium_blocks(a)),
+                             expected)
+
+    def test_invalid_matchings(self):
+        teachers, auditoriums = make_random_problem(seed=1)
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        small = min(range(problem.num_auditoriums), key=lambda a: problem.capacity[a])
+        large = max(range(problem.num_teachers), key=lambda t: problem.group_size[t])
+        teacher_match = [NO_MATCH] * problem.num_teachers
+        teacher_match[large] = small
+        teacher_match[min(range(problem.num_teachers), key=lambda t: problem.group_size[t])] = small
+        report = check_matching(problem, teacher_match)
+        self.assertEqual(report.infeasible, [(large, small)])
+        self.assertEqual(report.double_booked, [small])
+        self.assertFalse(report.is_valid)
+
+    def test_verify_gale_shapley_result(self):
+        teachers, auditoriums = make_random_problem(seed=2)
+        matches, _ = gale_shapley_matching(teachers, auditoriums)  # Appends each match to the schedule
+        report = verify_matching(teachers, auditoriums, matches)
+        self.assertTrue(report.is_stable, str(report))
+
+        name = next(iter(matches))
+        matches.pop(name)  # Unmatching someone leaves their room free for them
+        report = verify_matching(teachers, auditoriums, matches)
+        self.assertIn(name, {teacher for teacher, _ in report.named_blocking_pairs()})
+
+    def test_cli_checks_service_output(self):
+        teachers, auditoriums = make_random_problem(seed=3)
+        rooms, people = auditorium_rows(auditoriums), teacher_rows(teachers)
+        loader = ProblemLoader()
+        loader.add_auditorium_rows(rooms)
+        loader.add_teacher_rows(people)
+        teacher_match = match_problem(loader.problem)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {}
+            for name, rows in (("teachers", people), ("auditoriums", rooms)):
+                paths[name] = os.path.join(directory, f"{name}.jsonl")
+                with open(paths[name], "w", encoding="utf-8") as output:
+                    output.writelines(json.dumps(row) + "\n" for row in rows)
+            paths["matches"] = os.path.join(directory, "matches.jsonl")
+            with open(paths["matches"], "w", encoding="utf-8") as output:
+                for t, a in enumerate(teacher_match):
+                    line = {"teacher": loader.problem.teacher_names[t], "auditorium": None}
+                    if a != NO_MATCH:
+                        line.update(auditorium=rooms[a]["name"], day=rooms[a]["day"], start=rooms[a]["start"],
+                                    end=rooms[a]["end"])
+                    output.write(json.dumps(line) + "\n")
+            self.assertEqual(read_matches(paths["matches"], loader), teacher_match)
+            self.assertEqual(main([paths["teachers"], paths["auditoriums"], "--matches", paths["matches"]]), 0)
+            self.assertEqual(main([paths["teachers"], paths["auditoriums"]]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# tests_utilization.py
+
+import unittest
+from datetime import time
+
+from gale_shapley_matching import (
+    TimeSlot, Auditorium, Group, Teacher, TimePeriod, ProblemSet, NO_MATCH, match_problem, gale_shapley_matching,
+)
+from stability import check_matching, verify_matching, group_clashes
+from utilization import improve_utilization, improve_teacher_matches, utilization_summary
+from tests_matching import make_random_problem, make_shared_group_problem
+
+MORNING = TimeSlot(time(9, 0), time(10, 30))
+AFTERNOON = TimeSlot(time(15, 0), time(16, 30))
+
+
+class TestUtilization(unittest.TestCase):
+
+    def test_augmenting_path_seats_unmatched_teacher(self):
+        # Both want the morning room; Y lost it and clashes with the afternoon room, X could move there
+        auditoriums = [Auditorium("Morning", 30, "Mon", MORNING), Auditorium("Afternoon", 30, "Mon", AFTERNOON)]
+        teachers = {
+            "X A": Teacher("X", "A", Group("GX", 25), TimePeriod.MORNING),
+            "Y B": Teacher("Y", "B", Group("GY", 25), TimePeriod.MORNING,
+                           [Auditorium("Busy", 30, "Mon", AFTERNOON)]),
+        }
+        problem = ProblemSet.from_objects(teachers, auditoriums)
+        teacher_match = match_problem(problem)
+        self.assertEqual(teacher_match, [0, NO_MATCH])
+
+        unchanged, report = improve_utilization(problem, teacher_match)  # X won't take a worse room
+        self.assertEqual((unchanged, report.augmentations), (teacher_match, 0))
+        improved, report = improve_utilization(problem, teacher_match, keep_scores=False)
+        self.assertEqual(improved, [1, 0])
+        self.assertEqual((report.before["matched"], report.after["matched"]), (1, 2))
+        self.assertTrue(check_matching(problem, improved).is_stable)  # The morning room is indifferent
+
+    def test_moves_into_smaller_free_rooms(self):
+        auditoriums = [Auditorium("Hall", 150, "Mon", MORNING), Auditorium("Room", 130, "Mon", MORNING)]
+        teachers = {"X A": Teacher("X", "A", Group("GX", 120), TimePeriod.MORNING)}
+        matches, unmatched = gale_shapley_matching(teachers, auditoriums)
+        self.assertIs(matches["X A"], auditoriums[0])
+
+        matches, unmatched, report = improve_teacher_matches(teachers, auditoriums, matches)
+        self.assertIs(matches["X A"], auditoriums[1])
+        self.assertEqual(list(teachers["X A"].schedule), [auditoriums[1]])
+        self.assertEqual((report.moves, report.before["held_seats"], report.after["held_seats"]), (1, 150, 130))
+        self.assertTrue(verify_matching(teachers, auditoriums, matches).is_stable)
+
+    def test_stable_matchings_stay_stable(self):
+        for seed in range(10):
+            teachers, auditoriums = make_random_problem(seed, num_teachers=30, num_auditoriums=45)
+            problem = ProblemSet.from_objects(teachers, auditoriums)
+            teacher_match = match_problem(problem)
+            improved, report = improve_utilization(problem, teacher_match)
+            self.assertTrue(check_matching(problem, improved).is_stable, f"seed {seed}")
+            self.assertEqual(report.after, utilization_summary(problem, improved))
+            self.assertGreaterEqual(report.after["matched"], report.before["matched"])
+            self.assertLessEqual(report.after["wasted_seats"], report.before["wasted_seats"])
+            for t, a in enumerate(teacher_match):
+                if a != NO_MATCH:  # Nobody loses their room or gets one they like less
+                    self.assertNotEqual(improved[t], NO_MATCH)
+                    self.assertGreaterEqual(problem.score(t, improved[t]), problem.score(t, a))
+
+            unconstrained, _ = improve_utilization(problem, teacher_match, require_stable=False, keep_scores=False)
+            self.assertTrue(check_matching(problem, unconstrained).is_valid)
+
+    def test_shared_groups_are_never_double_booked(self):
+        changed = 0
+        for seed in range(10):
+            problem = ProblemSet.from_objects(*make_shared_group_problem(seed))
+            teacher_match = match_problem(problem)
+            for options in ({}, {"require_stable": False, "keep_scores": False}):
+                improved, report = improve_utilization(problem, teacher_match, **options)
+                self.assertEqual(group_clashes(problem, improved), [], f"seed {seed}, {options}")
+                changed += report.moves + report.augmentations
+        self.assertGreater(changed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
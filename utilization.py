@@ -0,0 +1,304 @@
+# utilization.py
+
+from bisect import bisect_left, insort
+from typing import List, Dict, Tuple, Optional, Iterator, Set, Union
+
+from gale_shapley_matching import (
+    Auditorium, Teacher, ProblemSet, CandidateIndex, ScoreTable, GroupBookings, NO_MATCH,
+)
+from stability import BlockingPairIndex, problem_for_matches
+
+Path = List[Tuple[int, int]]  # (teacher, auditorium) assignments, applied last to first
+NO_LIMIT = float("-inf")  # Minimum score when keep_scores is off
+
+
+def utilization_summary(problem: ProblemSet, teacher_match: List[int]) -> Dict[str, float]:
+    """Matched teachers, seated students, seats in the auditoriums they hold, and seated / held seats."""
+    matched = [(t, a) for t, a in enumerate(teacher_match) if a != NO_MATCH]
+    seated = sum(problem.group_size[t] for t, _ in matched)
+    held = sum(problem.capacity[a] for _, a in matched)
+    return {"matched": len(matched), "seated": seated, "held_seats": held, "wasted_seats": held - seated,
+            "utilization": seated / held if held else 0.0}
+
+
+class UtilizationReport:
+    """Utilization before and after improve_utilization, and what it changed."""
+    __slots__ = ("before", "after", "moves", "augmentations", "rejected")
+
+    def __init__(self, before: Dict[str, float]):
+        self.before = before
+        self.after = before
+        self.moves = 0  # Teachers moved into a smaller free auditorium
+        self.augmentations = 0  # Unmatched teachers seated along an augmenting path
+        self.rejected = 0  # Changes undone because they broke stability
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"before": self.before, "after": self.after, "moves": self.moves,
+                "augmentations": self.augmentations, "rejected": self.rejected}
+
+    def __str__(self) -> str:
+        lines = [f"{'':>13} {'before':>10} {'after':>10}"]
+        for name in ("matched", "seated", "held_seats", "wasted_seats"):
+            lines.append(f"{name:>13} {self.before[name]:>10} {self.after[name]:>10}")
+        lines.append(f"{'utilization':>13} {self.before['utilization']:>10.1%} {self.after['utilization']:>10.1%}")
+        lines.append(f"{self.moves} moves, {self.augmentations} teachers seated, "
+                     f"{self.rejected} changes rejected for stability")
+        return "\n".join(lines)
+
+
+class _FreeRooms:
+    """Free auditoriums per (score key, day) bucket, each kept sorted by capacity."""
+    __slots__ = ("problem", "buckets", "_bucket_of")
+
+    def __init__(self, problem: ProblemSet, holder: List[int]):
+        self.problem = problem
+        self.buckets: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self._bucket_of = [(problem.score_key[a], problem.day[a]) for a in range(problem.num_auditoriums)]
+        for a in range(problem.num_auditoriums):
+            self.buckets.setdefault(self._bucket_of[a], [])
+            if holder[a] == NO_MATCH:
+                self.buckets[self._bucket_of[a]].append((problem.capacity[a], a))
+        for rooms in self.buckets.values():
+            rooms.sort()
+
+    def take(self, a: int) -> None:
+        rooms = self.buckets[self._bucket_of[a]]
+        del rooms[bisect_left(rooms, (self.problem.capacity[a], a))]
+
+    def release(self, a: int) -> None:
+        insort(self.buckets[self._bucket_of[a]], (self.problem.capacity[a], a))
+
+    def for_teacher(self, t: int, min_score: float, below_capacity: Optional[int] = None) -> List[int]:
+        """Free auditoriums t fits in without a clash, scoring at least min_score, smallest capacity first."""
+        problem = self.problem
+        scores, size, bookings = problem.score_row(t), problem.group_size[t], problem.bookings[t]
+        found = []
+        for (score_key, day), rooms in self.buckets.items():
+            if scores[score_key] < min_score:
+                continue
+            for capacity, a in rooms[bisect_left(rooms, (size, -1)):]:
+                if below_capacity is not None and capacity >= below_capacity:
+                    break
+                if bookings is None or not bookings.overlaps(day, problem.start[a], problem.end[a]):
+                    found.append((capacity, a))
+        found.sort()
+        return [a for _, a in found]
+
+
+def improve_utilization(
+        problem: ProblemSet,
+        teacher_match: List[int],
+        require_stable: bool = True,
+        keep_scores: bool = True,
+        max_path: int = 3,
+        max_visits: int = 2000,
+        max_rounds: int = 5
+) -> Tuple[List[int], UtilizationReport]:
+    """
+    Post-pass over a matching that seats more students and holds fewer seats.
+
+    1. Augmenting paths: for each unmatched teacher, largest group first, search for a chain
+       "u takes room r1, r1's holder moves to r2, ..." ending in a free room, at most max_path
+       rooms long and visiting at most max_visits holders per teacher. Holders found to have no
+       way out are remembered until the next change. Everybody matched stays matched.
+    2. Moves: matched teachers, most wasted seats first, move to the smallest free room that
+       still fits them; repeated for up to max_rounds rounds, so a room freed by one move can take
+       a bigger group in the next. (Swapping two matched teachers never changes the totals, as
+       the same rooms stay held by the same groups.)
+
+    keep_scores: a teacher who is moved never gets a room they score lower than their current one.
+    require_stable: every change is checked with a BlockingPairIndex around the teachers and
+    rooms it touched, and undone if it creates a blocking pair, so a stable input stays stable.
+    Teachers sharing a Group are tracked in GroupBookings, and a change that would put a group in
+    two overlapping slots is never made.
+
+    Returns the new matching (the input list is not changed) and a UtilizationReport.
+    """
+    report = UtilizationReport(utilization_summary(problem, teacher_match))
+    index = BlockingPairIndex(problem, teacher_match)
+    match, holder, current_score = index.match, index.holder, index.current_score
+    free = _FreeRooms(problem, holder)
+    candidates = CandidateIndex(problem)
+    groups = GroupBookings.for_problem(problem)
+    if groups is not None:
+        for t, a in enumerate(match):
+            if a != NO_MATCH:
+                groups.book(t, a)
+
+    def rebook(changes: List[Tuple[int, int, int]]) -> None:
+        """Moves (teacher, old room, new room) in GroupBookings: all old rooms out, then the new ones in."""
+        for t, old, _ in changes:
+            if old != NO_MATCH:
+                groups.release(t, old)
+        for t, _, new in changes:
+            if new != NO_MATCH:
+                groups.book(t, new)
+
+    def keeps_groups_apart(path: Path) -> bool:
+        """Books the path's rooms in GroupBookings if none of them double-books a group."""
+        changes = [(t, match[t], a) for t, a in path]
+        rebook([(t, old, NO_MATCH) for t, old, _ in changes])
+        for i, (t, _, a) in enumerate(changes):
+            if groups.clashes(t, a):
+                rebook([(t, new, old) for t, old, new in changes[:i]] +
+                       [(t, NO_MATCH, old) for t, old, _ in changes[i:]])
+                return False
+            groups.book(t, a)
+        return True
+
+    def blocked(t: int, a: int) -> bool:
+        """Would t taking room a double-book their group, whatever else moves? Prunes path searches."""
+        if groups is None or not groups.clashes(t, a):
+            return False
+        old = match[t]  # The clash may be t's own room, which t leaves
+        return old == NO_MATCH or problem.day[old] != problem.day[a] or \
+            not (problem.start[old] < problem.end[a] and problem.start[a] < problem.end[old])
+
+    def apply(path: Path) -> List[Tuple[int, int]]:
+        undo = [(t, match[t]) for t, _ in path]
+        for t, a in reversed(path):
+            old = match[t]
+            index.assign(t, a)
+            free.take(a)
+            if old != NO_MATCH and holder[old] == NO_MATCH:
+                free.release(old)
+        return undo
+
+    def revert(path: Path, undo: List[Tuple[int, int]]) -> None:
+        for t, a in path:
+            if holder[a] == t:
+                index.assign(t, NO_MATCH)
+                free.release(a)
+        for t, a in undo:
+            if a != NO_MATCH:
+                free.take(a)
+                index.assign(t, a)
+
+    def accept(path: Path, vacated: Optional[int] = None) -> bool:
+        if groups is not None and not keeps_groups_apart(path):
+            return False
+        undo = apply(path)
+        if not require_stable:
+            return True
+        rooms = [a for _, a in path] + ([] if vacated is None else [vacated])
+        if index.is_stable_around([t for t, _ in path], rooms):
+            return True
+        revert(path, undo)
+        if groups is not None:
+            rebook([(t, new, old) for (t, new), (_, old) in zip(path, undo)])
+        report.rejected += 1
+        return False
+
+    # Holders known to have no way out within a path depth; valid until the next accepted change
+    stuck: Dict[int, int] = {}
+    visits = 0
+
+    def alternatives(t: int) -> Iterator[int]:
+        """Rooms teacher t could move to, in t's preference order."""
+        min_score = current_score[t] if keep_scores else NO_LIMIT
+        for level in candidates.candidate_levels(t):
+            if problem.score(t, level[0]) < min_score:
+                return
+            for a in level:
+                if a != match[t]:
+                    yield a
+
+    def escapes(h: int, depth: int, seen: Set[int]) -> Iterator[Path]:
+        """Ways for holder h to leave their room: a free room, or (depth > 1) another holder's room and so on."""
+        nonlocal visits
+        if stuck.get(h, 0) >= depth or visits >= max_visits:
+            return
+        visits += 1
+        found = pruned = False
+        for end in free.for_teacher(h, current_score[h] if keep_scores else NO_LIMIT):  # Smallest room first
+            if blocked(h, end):
+                continue
+            found = True
+            yield [(h, end)]
+        if depth > 1:
+            for b in alternatives(h):
+                next_holder = holder[b]
+                if next_holder == NO_MATCH:
+                    continue  # Already offered above
+                if next_holder in seen or blocked(h, b):
+                    pruned = True
+                    continue
+                for tail in escapes(next_holder, depth - 1, seen | {next_holder}):
+                    found = True
+                    yield [(h, b)] + tail
+        if not found and not pruned and visits < max_visits:
+            stuck[h] = depth
+
+    def augmenting_paths(u: int) -> Iterator[Path]:
+        """Chains seating u, in u's preference order: u takes a room and its holder escapes."""
+        for a in candidates.candidates(u):
+            if blocked(u, a):
+                continue
+            h = holder[a]
+            if h == NO_MATCH:
+                yield [(u, a)]
+            elif max_path > 1:
+                for tail in escapes(h, max_path - 1, {h}):
+                    yield [(u, a)] + tail
+
+    # 1. Seat unmatched teachers, largest groups first
+    if any(free.buckets.values()):
+        for u in sorted((t for t in range(problem.num_teachers) if match[t] == NO_MATCH),
+                        key=lambda t: -problem.group_size[t]):
+            visits = 0
+            for path in augmenting_paths(u):
+                if accept(path):
+                    report.augmentations += 1
+                    stuck.clear()
+                    break
+
+    # 2. Move matched teachers into smaller free rooms
+    for _ in range(max_rounds):
+        moved = 0
+        order = sorted((t for t in range(problem.num_teachers) if match[t] != NO_MATCH),
+                       key=lambda t: problem.group_size[t] - problem.capacity[match[t]])
+        for t in order:
+            current = match[t]
+            min_score = current_score[t] if keep_scores else NO_LIMIT
+            for a in free.for_teacher(t, min_score, below_capacity=problem.capacity[current]):
+                if not blocked(t, a) and accept([(t, a)], vacated=current):
+                    moved += 1
+                    break
+        report.moves += moved
+        if not moved:
+            break
+
+    report.after = utilization_summary(problem, match)
+    return list(match), report
+
+
+def improve_teacher_matches(
+        teachers: Dict[str, Teacher],
+        auditoriums: List[Auditorium],
+        teacher_matches: Dict[str, Auditorium],
+        score_table: Union[str, ScoreTable, None] = None,
+        **options
+) -> Tuple[Dict[str, Auditorium], Set[str], UtilizationReport]:
+    """
+    improve_utilization for the result of gale_shapley_matching.
+
+    Teachers whose room changed get the old one removed from their schedule and the new one
+    appended, as gale_shapley_matching would have left it. Returns (teacher_matches,
+    unmatched_teachers, report).
+    """
+    problem, teacher_match = problem_for_matches(teachers, auditoriums, teacher_matches, score_table)
+    improved, report = improve_utilization(problem, teacher_match, **options)
+    matches: Dict[str, Auditorium] = {}
+    unmatched: Set[str] = set()
+    for t, (before, after) in enumerate(zip(teacher_match, improved)):
+        name = problem.teacher_names[t]
+        if after == NO_MATCH:
+            unmatched.add(name)
+            continue
+        matches[name] = problem.auditorium(after)
+        if before != after:
+            schedule = teachers[name].schedule
+            if before != NO_MATCH and any(booked is teacher_matches[name] for booked in schedule):
+                schedule.remove(teacher_matches[name])
+            schedule.append(matches[name])
+    return matches, unmatched, report